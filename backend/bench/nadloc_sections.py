@@ -0,0 +1,112 @@
+"""Сверка и бенчмарк разбора детальных страниц reestr.nadloc.kz
+(AdvancedTenderParser.parse_completed_tender / parse_published_tender).
+
+Текущая реализация сравнивается с версией парсера из указанной ревизии git:
+
+    python -m bench.nadloc_sections <fixtures> --baseline <rev> [--repeat 5]
+
+В ревизиях до переноса парсера в backend/parsers он берётся из LEGACY_PARSER_PATH.
+
+Страницы берутся из <fixtures>/nadloc/detail/*.html (см. parsers/page_recorder.py).
+Время считается только на разбор: BeautifulSoup и get_text() строятся один раз
+на страницу и общие для обеих версий. При любом расхождении — код выхода 1.
+"""
+
+import argparse
+import logging
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+PARSER_PATH = "backend/parsers/ultimate_parser.py"
+LEGACY_PARSER_PATH = "parser_data/ultimate_parser.py"
+
+
+def load_current():
+    from parsers import ultimate_parser
+    return ultimate_parser
+
+
+def load_baseline(rev: str, path: str = None):
+    for candidate in ([path] if path else [PARSER_PATH, LEGACY_PARSER_PATH]):
+        try:
+            source = subprocess.check_output(
+                ["git", "show", f"{rev}:{candidate}"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+            )
+            path = candidate
+            break
+        except subprocess.CalledProcessError:
+            continue
+    else:
+        raise SystemExit(f"Парсер не найден в ревизии {rev}")
+    module = types.ModuleType("ultimate_parser_baseline")
+    exec(compile(source, f"{rev}:{path}", "exec"), module.__dict__)
+    return module
+
+
+def load_pages(fixtures_dir: Path):
+    pages = []
+    for p in sorted((fixtures_dir / "nadloc" / "detail").glob("*.html")):
+        soup = BeautifulSoup(p.read_text(encoding="utf-8"), "html.parser")
+        pages.append((p.name, soup, soup.get_text()))
+    return pages
+
+
+def parse(parser, soup, text):
+    return (
+        parser.parse_completed_tender(soup, text, "CODE", "LINK"),
+        parser.parse_published_tender(soup, text, "CODE", "LINK"),
+    )
+
+
+def bench(name, parser, pages, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, soup, text in pages:
+            parse(parser, soup, text)
+    per_page = (time.perf_counter() - start) / (len(pages) * repeat)
+    print(f"{name:9} {per_page * 1000:8.2f} мс/стр.")
+    return per_page
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("fixtures", type=Path)
+    ap.add_argument("--baseline", required=True, help="ревизия git с исходной версией парсера")
+    ap.add_argument("--baseline-path", help=f"путь к парсеру в ревизии (по умолчанию {PARSER_PATH} или {LEGACY_PARSER_PATH})")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    current = load_current().AdvancedTenderParser()
+    baseline = load_baseline(args.baseline, args.baseline_path).AdvancedTenderParser()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    pages = load_pages(args.fixtures)
+    if not pages:
+        print(f"Нет страниц в {args.fixtures / 'nadloc' / 'detail'}")
+        return 1
+
+    mismatches = 0
+    for name, soup, text in pages:
+        if parse(current, soup, text) != parse(baseline, soup, text):
+            mismatches += 1
+            print(f"[MISMATCH] {name}")
+
+    base = bench("baseline", baseline, pages, args.repeat)
+    new = bench("current", current, pages, args.repeat)
+    print(f"Ускорение: x{base / new:.2f} на {len(pages)} стр.")
+
+    if mismatches:
+        print(f"Расхождений: {mismatches}")
+        return 1
+    print("Результаты совпадают")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Сверка и бенчмарк бэкендов парсинга goszakup на записанных страницах.
+
+Ожидаемая структура каталога с фикстурами:
+    <fixtures>/list/*.html    — страницы-списки (/ru/search/announce)
+    <fixtures>/detail/*.html  — детальные страницы (?tab=general)
+    <fixtures>/tabs/<tab>/*.html — дополнительные вкладки (?tab=lots, ?tab=documents)
+
+Запуск из backend/:
+    python -m bench.parse_backends <fixtures> [--repeat 3]
+
+Обезличенный набор страниц лежит в tests/fixtures/goszakup; паритет на нём
+проверяет tests/test_parse_backends.py.
+
+Для каждой страницы результаты всех бэкендов сравниваются с bs4 (эталон);
+при любом расхождении скрипт завершается с кодом 1.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from parsers.ai_procure_parser import PARSER_BACKENDS, get_parser_backend
+
+REFERENCE_BACKEND = "bs4"
+# индекс функции в кортеже get_parser_backend()
+KINDS = {"list": 0, "detail": 1, "tabs": 2}
+
+
+def load_pages(fixtures_dir: Path, kind: str):
+    root = fixtures_dir / kind
+    return [(str(p.relative_to(root)), p.read_bytes()) for p in sorted(root.rglob("*.html"))]
+
+
+def check_parity(pages, kind: str) -> int:
+    idx = KINDS[kind]
+    reference = get_parser_backend(REFERENCE_BACKEND)[idx]
+    mismatches = 0
+    for name, content in pages:
+        expected = reference(content)
+        for backend in PARSER_BACKENDS:
+            if backend == REFERENCE_BACKEND:
+                continue
+            got = get_parser_backend(backend)[idx](content)
+            if got != expected:
+                mismatches += 1
+                print(f"[MISMATCH] {kind}/{name}: {backend} != {REFERENCE_BACKEND}")
+    return mismatches
+
+
+def bench(pages, kind: str, repeat: int):
+    idx = KINDS[kind]
+    for backend in PARSER_BACKENDS:
+        parse = get_parser_backend(backend)[idx]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for _, content in pages:
+                parse(content)
+        elapsed = time.perf_counter() - start
+        total = len(pages) * repeat
+        print(f"{kind:6} {backend:5} {total / elapsed:10.1f} pages/sec  ({elapsed:.2f} сек на {total} стр.)")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("fixtures", type=Path)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    mismatches = 0
+    for kind in KINDS:
+        pages = load_pages(args.fixtures, kind)
+        if not pages:
+            print(f"{kind}: нет страниц в {args.fixtures / kind}")
+            continue
+        mismatches += check_parity(pages, kind)
+        bench(pages, kind, args.repeat)
+
+    if mismatches:
+        print(f"Расхождений: {mismatches}")
+        return 1
+    print("Результаты всех бэкендов совпадают")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
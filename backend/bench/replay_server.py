@@ -0,0 +1,116 @@
+"""Локальный стенд, отдающий записанные страницы goszakup / nadloc.
+
+Страницы берутся из каталога фикстур (см. parsers/page_recorder.py) по
+manifest.jsonl; абсолютные ссылки на исходные сайты переписываются на адрес
+стенда. Поддерживаются искусственная задержка и инъекция ошибок (429/5xx).
+
+Запуск из backend/:
+    python -m bench.replay_server <fixtures> --port 8089 --latency-ms 80 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+ORIGINAL_HOSTS = (
+    b"https://goszakup.gov.kz",
+    b"https://www.reestr.nadloc.kz",
+)
+
+
+def _route_key(path: str, query: str) -> str:
+    # порядок параметров в query не важен
+    return path + "?" + "&".join(sorted(p for p in query.split("&") if p))
+
+
+def load_manifest(fixtures_dir: Path) -> Dict[str, Path]:
+    routes = {}
+    manifest = fixtures_dir / "manifest.jsonl"
+    with open(manifest, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            parts = urlsplit(entry["url"])
+            routes[_route_key(parts.path, parts.query)] = fixtures_dir / entry["file"]
+    return routes
+
+
+def make_app(
+    fixtures_dir: Path,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    error_statuses=(429, 503),
+    retry_after: Optional[int] = 1,
+    seed: Optional[int] = None,
+) -> web.Application:
+    routes = load_manifest(fixtures_dir)
+    rng = random.Random(seed)
+    stats = {"served": 0, "errors": 0, "missing": 0}
+
+    async def handler(request: web.Request) -> web.Response:
+        delay = latency_ms + rng.uniform(0, jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            status = rng.choice(error_statuses)
+            headers = {"Retry-After": str(retry_after)} if status == 429 and retry_after else None
+            return web.Response(status=status, headers=headers)
+
+        path = routes.get(_route_key(request.path, request.query_string))
+        if path is None or not path.exists():
+            stats["missing"] += 1
+            raise web.HTTPNotFound()
+
+        body = path.read_bytes()
+        origin = f"http://{request.host}".encode()
+        for host in ORIGINAL_HOSTS:
+            body = body.replace(host, origin)
+        stats["served"] += 1
+        return web.Response(body=body, content_type="text/html", charset="utf-8")
+
+    async def stats_handler(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get("/__stats__", stats_handler)
+    app.router.add_route("GET", "/{tail:.*}", handler)
+    return app
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("fixtures", type=Path)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--error-statuses", default="429,503")
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    app = make_app(
+        args.fixtures,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_statuses.split(",")),
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Сверка и бенчмарк артефакта модели риска (services/risk_artifact.py)
+с исходным pickle:
+
+    python -m bench.risk_artifact [--n 5000] [--seed 0]
+
+Наименования тендеров собираются из случайных терминов словаря TF-IDF
+(с шумом и пустыми строками); кластеры и весь кадр predict() обеих моделей
+должны совпадать точно. Выводится время загрузки и скоринга.
+При любом расхождении — код выхода 1. Запускать из backend/.
+"""
+
+import argparse
+import random
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from services.risk_artifact import load_artifact
+from services.risk_model import RISK_MODEL_ARTIFACT, RISK_MODEL_PATH, load_pickle_model
+
+NOISE_WORDS = ["ТОО", "г.", "Алматы", "2024", "№15", "для", "нужд", "xyz", "лот", "услуги"]
+METHODS = ["Из одного источника", "Запрос ценовых предложений", "Открытый конкурс", None]
+INVITED = ["", "нет", "ТОО Ромашка", None, "-"]
+DATES = [
+    ("2024-02-10", "2024-02-12"),
+    ("10.02.2024 12:00", "25.02.2024 18:00"),
+    ("2024-03-01", "2024-02-27"),
+    (None, "2024-01-01"),
+]
+
+
+def make_texts(terms, n: int, rng: random.Random):
+    texts = []
+    for _ in range(n):
+        k = rng.randint(0, 8)
+        words = [rng.choice(terms) if rng.random() < 0.8 else rng.choice(NOISE_WORDS) for _ in range(k)]
+        if rng.random() < 0.3:
+            words = [w.upper() for w in words]
+        texts.append(" ".join(words))
+    return texts
+
+
+def make_frame(model, texts, rng: random.Random) -> pd.DataFrame:
+    n = len(texts)
+    dates = [rng.choice(DATES) for _ in range(n)]
+    return pd.DataFrame({
+        "ID": [str(i) for i in range(n)],
+        model.text_col: [t if rng.random() > 0.02 else None for t in texts],
+        model.price_col: [rng.choice([rng.uniform(1e3, 1e9), float("nan")]) for _ in range(n)],
+        model.invited_col: [rng.choice(INVITED) for _ in range(n)],
+        model.method_col: [rng.choice(METHODS) for _ in range(n)],
+        model.start_date_col: [d[0] for d in dates],
+        model.end_date_col: [d[1] for d in dates],
+    })
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pkl", default=RISK_MODEL_PATH)
+    ap.add_argument("--artifact", default=RISK_MODEL_ARTIFACT)
+    ap.add_argument("--n", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        pickled, pkl_load = timed(load_pickle_model, args.pkl)
+    artifact, art_load = timed(load_artifact, args.artifact)
+    print(f"загрузка  pickle {pkl_load * 1000:8.1f} мс   артефакт {art_load * 1000:8.1f} мс")
+
+    rng = random.Random(args.seed)
+    terms = list(pickled.tfidf.vocabulary_)
+    df = make_frame(pickled, make_texts(terms, args.n, rng), rng)
+
+    expected, pkl_time = timed(pickled.predict, df)
+    actual, art_time = timed(artifact.predict, df)
+    print(f"predict   pickle {pkl_time * 1000:8.1f} мс   артефакт {art_time * 1000:8.1f} мс   ({args.n} тендеров)")
+
+    mismatches = int(np.count_nonzero(expected["cluster"].to_numpy() != actual["cluster"].to_numpy()))
+    try:
+        pd.testing.assert_frame_equal(expected, actual, check_exact=True)
+    except AssertionError as e:
+        print(f"[MISMATCH] кадры predict() различаются: {e}")
+        mismatches = max(mismatches, 1)
+
+    if mismatches:
+        print(f"Расхождений: {mismatches}")
+        return 1
+    print("Результаты совпадают")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Бенчмарк микро-батчинга скоринга риска (services/risk_batcher.py):
+
+    python -m bench.risk_batching [--clients 64] [--size 5] [--seconds 5]
+
+--clients конкурентных клиентов в цикле шлют запросы по --size тендеров.
+Сравниваются прямой вызов (asyncio.to_thread(score_tenders) на каждый запрос,
+как раньше в /tender-risk/score) и RISK_BATCHER: запросы/сек, p50/p99
+задержки. Ответы батчера сверяются с прямым вызовом. Запускать из backend/.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from bench.risk_scoring import make_items
+from services.risk_batcher import RISK_BATCH_MAX_ITEMS, RISK_BATCH_MAX_WAIT_MS, RiskScoreBatcher
+from services.risk_model import get_risk_model, score_tenders
+
+
+async def load(score, requests, clients: int, seconds: float):
+    latencies = []
+    deadline = time.monotonic() + seconds
+
+    async def client(i: int):
+        n = i
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            await score(requests[n % len(requests)])
+            latencies.append(time.perf_counter() - started)
+            n += clients
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def report(name, rate, p50, p99):
+    print(f"{name:8} {rate:8.0f} запр./сек   p50 {p50 * 1000:7.1f} мс   p99 {p99 * 1000:7.1f} мс")
+
+
+async def run(args):
+    model = get_risk_model()
+    items = make_items(model, args.clients * args.size * 4, args.seed)
+    requests = [items[i:i + args.size] for i in range(0, len(items), args.size)]
+
+    async def direct(tenders):
+        return await asyncio.to_thread(score_tenders, tenders)
+
+    batcher = RiskScoreBatcher(max_items=args.max_items, max_wait_ms=args.max_wait_ms)
+
+    # ответы батчера совпадают с прямым вызовом
+    batched = await asyncio.gather(*(batcher.score(r) for r in requests))
+    mismatches = sum(b != score_tenders(r) for b, r in zip(batched, requests))
+
+    report("direct", *await load(direct, requests, args.clients, args.seconds))
+    report("batcher", *await load(batcher.score, requests, args.clients, args.seconds))
+    snap = batcher.snapshot()
+    print(f"пачек {snap['batches']}, в среднем {snap['avg_batch_requests']} запросов / {snap['avg_batch_items']} тендеров")
+    await batcher.close()
+
+    if mismatches:
+        print(f"Ответы батчера расходятся с прямым вызовом: {mismatches}")
+        return 1
+    print("Ответы совпадают")
+    return 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clients", type=int, default=64)
+    ap.add_argument("--size", type=int, default=5)
+    ap.add_argument("--seconds", type=float, default=5)
+    ap.add_argument("--max-items", type=int, default=RISK_BATCH_MAX_ITEMS)
+    ap.add_argument("--max-wait-ms", type=float, default=RISK_BATCH_MAX_WAIT_MS)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Сравнение варианта модели риска на HashingVectorizer (services/risk_hashing.py)
+с текущей моделью:
+
+    python -m bench.risk_hashing [--csv tenders.csv | --n 100000] [--features 16384] [--chunk 5000]
+
+Вариант обучается потоком на выгрузке тендеров (--csv, схема goszakup) или
+на синтетическом корпусе (bench.risk_training). В синтетике наименования —
+случайные сочетания терминов словаря, поэтому различных биграмм и активных
+корзин там заметно больше, чем в реальном реестре. Сравниваются:
+
+* размер: pickle векторизатора и модели целиком;
+* скорость преобразования текста в TF-IDF (строк/сек);
+* согласие разбиения на кластеры (ARI и доля тендеров, попавших в
+  «свой» кластер при сопоставлении кластеров по большинству);
+* доля тендеров с тем же risk_score.
+
+Запускать из backend/.
+"""
+
+import argparse
+import pickle
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from bench.risk_training import chunks_of, make_corpus
+from services.risk_hashing import RISK_HASH_FEATURES, fit_hashing_model
+from services.risk_model import RISK_MODEL_PATH, load_pickle_model
+from services.risk_training import clean_chunk
+
+
+def majority_agreement(reference: np.ndarray, labels: np.ndarray) -> float:
+    """Каждый кластер варианта сопоставляется самому частому кластеру эталона."""
+    matched = 0
+    for label in np.unique(labels):
+        matched += np.bincount(reference[labels == label]).max()
+    return matched / len(labels)
+
+
+def throughput(transform, texts, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        transform(texts)
+        best = min(best, time.perf_counter() - started)
+    return len(texts) / best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pkl", default=RISK_MODEL_PATH)
+    ap.add_argument("--csv", help="выгрузка тендеров; без неё — синтетический корпус")
+    ap.add_argument("--n", type=int, default=100000)
+    ap.add_argument("--features", type=int, default=RISK_HASH_FEATURES)
+    ap.add_argument("--chunk", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    from sklearn.metrics import adjusted_rand_score
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        current = load_pickle_model(args.pkl)
+    if args.csv:
+        corpus = clean_chunk(pd.read_csv(args.csv), current).reset_index(drop=True)
+    else:
+        corpus = make_corpus(current, args.n, args.seed)
+    texts = corpus[current.text_col].fillna("")
+
+    started = time.perf_counter()
+    hashing = fit_hashing_model(lambda: chunks_of(corpus, args.chunk), n_features=args.features)
+    print(f"обучение варианта: {time.perf_counter() - started:.1f} сек на {len(corpus)} тендеров (2 прохода)")
+
+    def size(obj) -> float:
+        return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)) / 1024
+
+    print(
+        f"векторизатор  текущий {size(current.tfidf):8.0f} КБ ({len(current.tfidf.vocabulary_)} терминов)   "
+        f"hashing {size((hashing.hasher, hashing.active_, hashing.idf_)):8.0f} КБ "
+        f"({len(hashing.active_)} активных из {args.features} корзин)"
+    )
+    print(f"модель        текущая {size(current):8.0f} КБ   hashing {size(hashing):8.0f} КБ")
+
+    tfidf_rate = throughput(current.tfidf.transform, texts)
+    hashing_rate = throughput(hashing.transform, texts)
+    print(f"transform     текущий {tfidf_rate:8.0f} строк/сек   hashing {hashing_rate:8.0f} строк/сек")
+
+    reference = np.asarray(current.predict_clusters(texts))
+    labels = np.asarray(hashing.predict_clusters(texts))
+    print(
+        f"кластеры      ARI {adjusted_rand_score(reference, labels):.3f}   "
+        f"совпадение по большинству {majority_agreement(reference, labels):.1%}"
+    )
+    same_score = np.mean(current.predict(corpus)["risk_score"].to_numpy() == hashing.predict(corpus)["risk_score"].to_numpy())
+    print(f"risk_score    совпадает у {same_score:.1%} тендеров")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
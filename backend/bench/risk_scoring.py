@@ -0,0 +1,97 @@
+"""Сверка и бенчмарк пакетного скоринга score_tenders (services/risk_model.py)
+с версией из указанной ревизии git:
+
+    python -m bench.risk_scoring --baseline <rev> [--n 10000] [--distinct 2000] [--repeat 3]
+
+Обе версии используют одну и ту же загруженную модель, так что разница —
+только в сборке кадра и ответа. Время делится на predict и сборку ответа.
+При расхождении ответов — код выхода 1. Запускать из backend/.
+"""
+
+import argparse
+import random
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+from bench.risk_artifact import INVITED, METHODS, make_texts
+from models.risk import TenderRiskItem
+from services import risk_model
+from services.risk_model import get_risk_model, tenders_to_frame
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+MODULE_PATH = "backend/services/risk_model.py"
+
+
+def load_baseline(rev: str):
+    source = subprocess.check_output(["git", "show", f"{rev}:{MODULE_PATH}"], cwd=REPO_ROOT)
+    module = types.ModuleType("risk_model_baseline")
+    module.__file__ = str(REPO_ROOT / MODULE_PATH)
+    exec(compile(source, f"{rev}:{MODULE_PATH}", "exec"), module.__dict__)
+    return module
+
+
+def make_items(model, n: int, seed: int, distinct: int = 0):
+    rng = random.Random(seed)
+    vocabulary = getattr(model, "vocabulary", None) or model.tfidf.vocabulary_
+    texts = make_texts(list(vocabulary), distinct or n, rng)
+    if distinct:
+        texts = [rng.choice(texts) for _ in range(n)]
+    return [
+        TenderRiskItem(
+            id=str(i),
+            name=text,
+            price=rng.uniform(1e3, 1e9),
+            organizer="ТОО Организатор",
+            invited_supplier=rng.choice(INVITED),
+            method=rng.choice(METHODS),
+            start_date="2024-02-10",
+            end_date=rng.choice(["2024-02-11", "2024-03-10", None]),
+        )
+        for i, text in enumerate(texts)
+    ]
+
+
+def bench(name, score, items, model, repeat: int):
+    best_total = best_predict = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = score(items)
+        best_total = min(best_total, time.perf_counter() - started)
+        started = time.perf_counter()
+        model.predict(tenders_to_frame(items, model))
+        best_predict = min(best_predict, time.perf_counter() - started)
+    print(
+        f"{name:9} всего {best_total * 1000:7.1f} мс   predict {best_predict * 1000:7.1f} мс   "
+        f"сборка ответа {(best_total - best_predict) * 1000:7.1f} мс"
+    )
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--baseline", required=True, help="ревизия git с исходной версией services/risk_model.py")
+    ap.add_argument("--n", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--distinct", type=int, default=0, help="число разных наименований (0 — все разные)")
+    args = ap.parse_args(argv)
+
+    model = get_risk_model()
+    baseline = load_baseline(args.baseline)
+    baseline._model = model
+    items = make_items(model, args.n, args.seed, args.distinct)
+
+    expected = bench("baseline", baseline.score_tenders, items, model, args.repeat)
+    actual = bench("current", risk_model.score_tenders, items, model, args.repeat)
+    if expected != actual:
+        print("Ответы различаются")
+        return 1
+    print(f"Ответы совпадают ({args.n} тендеров)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
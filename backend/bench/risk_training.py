@@ -0,0 +1,135 @@
+"""Бенчмарк инкрементального дообучения модели риска (services/risk_training.py):
+
+    python -m bench.risk_training [--n 200000] [--new 20000] [--chunk 5000]
+
+На синтетическом корпусе (наименования из словаря TF-IDF, лог-нормальные цены
+со своим масштабом на кластер) сравниваются:
+
+* квартили t-digest с точными groupby().quantile() — погрешность по рангу
+  (и у точных квартилей — для сравнения);
+* обновление границ IQR после «обновления тендеров» на --new записей:
+  слияние в скетчи против пересчёта квантилей по всему корпусу;
+* partial_fit по чанкам против KMeans(n_init=10) по всему корпусу —
+  время, инерция и доля тендеров, оставшихся в своём кластере.
+
+Запускать из backend/.
+"""
+
+import argparse
+import random
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from bench.risk_artifact import make_frame, make_texts
+from services.risk_model import RISK_MODEL_PATH, load_pickle_model
+from services.risk_training import ClusterPriceSketches, IncrementalRiskTrainer, update_bounds
+
+MIN_CLUSTER_SIZE = 500
+
+
+def make_corpus(model, n: int, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    df = make_frame(model, make_texts(list(model.tfidf.vocabulary_), n, rng), rng)
+    clusters = model.predict_clusters(df[model.text_col].fillna(""))
+    np_rng = np.random.default_rng(seed)
+    scale = np.exp(np_rng.uniform(9, 16, size=model.kmeans.n_clusters))
+    df[model.price_col] = scale[clusters] * np_rng.lognormal(0, 1, size=n)
+    return df
+
+
+def exact_quartiles(df: pd.DataFrame, clusters, price_col: str) -> pd.DataFrame:
+    return df.assign(cluster=clusters).groupby("cluster")[price_col].quantile([0.25, 0.5, 0.75]).unstack()
+
+
+def rank_error(df: pd.DataFrame, clusters, price_col: str, stats: pd.DataFrame) -> float:
+    """Наибольшее отклонение |F(оценка) - q| по квартилям кластеров от MIN_CLUSTER_SIZE
+    тендеров: в маленьких кластерах ранг слишком грубый (скетч там точный)."""
+    worst = 0.0
+    prices = df[price_col].to_numpy()
+    for cluster, row in stats.iterrows():
+        values = np.sort(prices[clusters == cluster])
+        if len(values) < MIN_CLUSTER_SIZE:
+            continue
+        for q, col in ((0.25, "q1"), (0.5, "median"), (0.75, "q3")):
+            rank = np.searchsorted(values, row[col]) / len(values)
+            worst = max(worst, abs(rank - q))
+    return worst
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def chunks_of(df: pd.DataFrame, size: int):
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pkl", default=RISK_MODEL_PATH)
+    ap.add_argument("--n", type=int, default=200000)
+    ap.add_argument("--new", type=int, default=20000)
+    ap.add_argument("--chunk", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = load_pickle_model(args.pkl)
+    price = model.price_col
+    corpus = make_corpus(model, args.n, args.seed)
+    fresh = make_corpus(model, args.new, args.seed + 1)
+    clusters = model.predict_clusters(corpus[model.text_col].fillna(""))
+
+    # скетчи по исходному корпусу против точных квантилей
+    sketches = ClusterPriceSketches()
+    _, sketch_time = timed(update_bounds, model, sketches, chunks_of(corpus, args.chunk))
+    error = rank_error(corpus, clusters, price, sketches.stats_frame())
+    exact = exact_quartiles(corpus, clusters, price).set_axis(["q1", "median", "q3"], axis=1)
+    exact_error = rank_error(corpus, clusters, price, exact)
+    print(
+        f"скетчи     {args.n} тендеров за {sketch_time:6.2f} сек, погрешность квартилей по рангу "
+        f"{error:.4f} (у точных {exact_error:.4f})"
+    )
+
+    # обновление границ после прихода новых тендеров
+    _, merge_time = timed(update_bounds, model, sketches, chunks_of(fresh, args.chunk))
+    _, stats_time = timed(sketches.stats_frame)
+    full = pd.concat([corpus, fresh], ignore_index=True)
+    full_clusters, predict_time = timed(model.predict_clusters, full[model.text_col].fillna(""))
+    _, exact_time = timed(exact_quartiles, full, full_clusters, price)
+    error = rank_error(full, full_clusters, price, sketches.stats_frame())
+    print(
+        f"границы    +{args.new}: слияние {merge_time + stats_time:6.2f} сек "
+        f"против полного пересчёта {predict_time + exact_time:6.2f} сек, погрешность {error:.4f}"
+    )
+
+    # центроиды: partial_fit по чанкам против полного KMeans
+    from scipy.sparse import vstack
+    from sklearn.cluster import KMeans
+
+    trainer = IncrementalRiskTrainer(load_pickle_model(args.pkl))
+    started = time.perf_counter()
+    for chunk in chunks_of(full, args.chunk):
+        trainer.partial_fit(chunk)
+    partial_time = time.perf_counter() - started
+    X = vstack([model.tfidf.transform(c[model.text_col].fillna("")) for c in chunks_of(full, args.chunk)])
+    full_kmeans, full_fit_time = timed(KMeans(n_clusters=model.kmeans.n_clusters, random_state=42, n_init=10).fit, X)
+    kept = float(np.mean(trainer.kmeans.predict(X) == full_clusters))
+    print(
+        f"центроиды  partial_fit {partial_time:6.2f} сек против KMeans(n_init=10) {full_fit_time:6.2f} сек; "
+        f"инерция: исходные {-model.kmeans.score(X):.0f}, partial_fit {-trainer.kmeans.score(X):.0f}, "
+        f"полный KMeans {-full_kmeans.score(X):.0f}; кластер сохранился у {kept:.1%} тендеров"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Офлайн-бенчмарк парсеров на записанных страницах.
+
+    # 1) записать корпус с живых сайтов (один раз)
+    python -m bench.scraper_bench record fixtures/ --goszakup-pages 1 --nadloc-pages 2
+
+    # 2) прогнать парсеры против локального стенда bench.replay_server
+    python -m bench.scraper_bench run fixtures/ --latency-ms 80 --error-rate 0.02
+
+Для каждого парсера (goszakup: parsers.ai_procure_parser,
+nadloc: parsers.ultimate_parser.AdvancedTenderParser) выводятся pages/sec,
+p50/p99 задержки загрузки и процессорное время на страницу (включая пул парсинга).
+Запускать из backend/.
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+def _configure_goszakup_env(data_dir: str, base_url: str = None, record_dir: str = None):
+    # конфигурация парсера читается из окружения при импорте модуля
+    os.environ["SCRAPER_DATA_DIR"] = data_dir
+    os.environ["DETAIL_CACHE"] = "false"
+    os.environ["INCREMENTAL_SCRAPE"] = "false"
+    if base_url:
+        os.environ["GOSZAKUP_BASE_URL"] = base_url
+    if record_dir:
+        os.environ["SCRAPE_RECORD_DIR"] = record_dir
+
+
+def _load_nadloc_module():
+    from parsers import ultimate_parser
+    return ultimate_parser
+
+
+def _nadloc_parser_class(module, record_dir: str = None, latencies: List[float] = None):
+    from parsers.page_recorder import record_page
+
+    class BenchTenderParser(module.AdvancedTenderParser):
+        async def fetch_page(self, url, retry=3):
+            started = time.perf_counter()
+            html = await super().fetch_page(url, retry)
+            if latencies is not None and html is not None:
+                latencies.append(time.perf_counter() - started)
+            if record_dir and html is not None:
+                kind = "nadloc/list" if "/tender/list" in url else "nadloc/detail"
+                record_page(kind, url, html.encode("utf-8"), record_dir)
+            return html
+
+    return BenchTenderParser
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _cpu_seconds() -> float:
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def _report(name: str, pages: int, wall: float, cpu: float, latencies: List[float]) -> Dict:
+    row = {
+        "scraper": name,
+        "pages": pages,
+        "wall_sec": round(wall, 2),
+        "pages_per_sec": round(pages / wall, 1) if wall else None,
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "cpu_ms_per_page": round(cpu / pages * 1000, 2) if pages else None,
+    }
+    print(
+        f"{name:9} {row['pages']:6d} стр. {row['wall_sec']:8.2f} сек "
+        f"{row['pages_per_sec']!s:>8} pages/sec  p50 {row['p50_ms']} мс  p99 {row['p99_ms']} мс  "
+        f"CPU {row['cpu_ms_per_page']} мс/стр."
+    )
+    return row
+
+
+# ------------------------- RECORD -------------------------
+
+def record(args):
+    fixtures = str(args.fixtures.resolve())
+    with tempfile.TemporaryDirectory() as data_dir:
+        if args.goszakup_pages:
+            _configure_goszakup_env(data_dir, record_dir=fixtures)
+            from parsers import ai_procure_parser
+
+            ai_procure_parser.PAGES_TO_SCRAPE = list(range(1, args.goszakup_pages + 1))
+            records = ai_procure_parser.scrape_tenders_sync(incremental=False)
+            print(f"goszakup: записано {len(records)} тендеров")
+
+        if args.nadloc_pages:
+            parser_cls = _nadloc_parser_class(_load_nadloc_module(), record_dir=fixtures)
+
+            async def run():
+                async with parser_cls(output_dir=None) as parser:
+                    await parser.parse_all(start_page=1, end_page=args.nadloc_pages)
+                    return len(parser.tenders_list)
+
+            print(f"nadloc: записано {asyncio.run(run())} тендеров")
+
+
+# ------------------------- RUN -------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_replay_server(args, port: int) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "bench.replay_server", str(args.fixtures),
+        "--port", str(port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--seed", "42",
+    ]
+    proc = subprocess.Popen(cmd)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("replay_server не запустился")
+
+
+def bench_goszakup(args, base_url: str, data_dir: str) -> Dict:
+    import aiohttp
+
+    _configure_goszakup_env(data_dir, base_url=base_url)
+    from parsers import ai_procure_parser
+
+    list_pages = sorted((args.fixtures / "list").glob("page*.html"))
+    ai_procure_parser.PAGES_TO_SCRAPE = list(range(1, len(list_pages) + 1))
+
+    latencies: List[float] = []
+    trace = aiohttp.TraceConfig()
+
+    async def on_start(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def on_end(session, ctx, params):
+        if params.response.status == 200:
+            latencies.append(time.perf_counter() - ctx.started)
+
+    trace.on_request_start.append(on_start)
+    trace.on_request_end.append(on_end)
+    ai_procure_parser.SESSION_TRACE_CONFIGS.append(trace)
+
+    async def collect(record):
+        pass
+
+    cpu_before, started = _cpu_seconds(), time.perf_counter()
+    asyncio.run(ai_procure_parser.scrape_tenders(collect, incremental=False))
+    # дожидаемся завершения пула, чтобы его CPU попал в RUSAGE_CHILDREN
+    ai_procure_parser.shutdown_parse_pool(wait=True)
+    wall, cpu = time.perf_counter() - started, _cpu_seconds() - cpu_before
+    return _report("goszakup", len(latencies), wall, cpu, latencies)
+
+
+def bench_nadloc(args, base_url: str) -> Dict:
+    latencies: List[float] = []
+    parser_cls = _nadloc_parser_class(_load_nadloc_module(), latencies=latencies)
+    list_pages = sorted((args.fixtures / "nadloc" / "list").glob("page*.html"))
+
+    async def run():
+        # результаты бенчмарка на диск не пишем
+        async with parser_cls(base_url=base_url, output_dir=None, keep_in_memory=False) as parser:
+            await parser.parse_all(start_page=1, end_page=len(list_pages))
+
+    cpu_before, started = _cpu_seconds(), time.perf_counter()
+    asyncio.run(run())
+    wall, cpu = time.perf_counter() - started, _cpu_seconds() - cpu_before
+    return _report("nadloc", len(latencies), wall, cpu, latencies)
+
+
+def run(args):
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = _start_replay_server(args, port)
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            if args.scraper in ("goszakup", "all") and (args.fixtures / "list").exists():
+                bench_goszakup(args, base_url, data_dir)
+            if args.scraper in ("nadloc", "all") and (args.fixtures / "nadloc" / "list").exists():
+                bench_nadloc(args, base_url)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="записать страницы с живых сайтов")
+    rec.add_argument("fixtures", type=Path)
+    rec.add_argument("--goszakup-pages", type=int, default=1)
+    rec.add_argument("--nadloc-pages", type=int, default=1)
+
+    rn = sub.add_parser("run", help="бенчмарк против replay_server")
+    rn.add_argument("fixtures", type=Path)
+    rn.add_argument("--scraper", choices=("goszakup", "nadloc", "all"), default="all")
+    rn.add_argument("--latency-ms", type=float, default=50.0)
+    rn.add_argument("--jitter-ms", type=float, default=20.0)
+    rn.add_argument("--error-rate", type=float, default=0.0)
+
+    args = ap.parse_args(argv)
+    if args.command == "record":
+        record(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Бенчмарк графа поставщиков (services/supplier_graph.py):
+
+    python -m bench.supplier_graph [--history 200000] [--organizers 2000] [--suppliers 5000] [--batch 200]
+
+Синтетическая история: у части организаторов есть «свой» поставщик, которому
+уходит большинство закупок из одного источника. Сравниваются:
+
+* запись истории в граф пачками по --batch (тендеров/сек) и загрузка из SQLite;
+* признаки пар для пачки: поиск в графе против просмотра всей истории
+  (маски pandas по организатору и поставщику на каждый тендер пачки).
+
+Признаки обоих способов сверяются; при расхождении — код выхода 1.
+Запускать из backend/.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from services.supplier_graph import (
+    SUPPLIER_PAIR_FIELDS,
+    SUPPLIER_PAIR_MIN_SHARE,
+    SUPPLIER_PAIR_MIN_TENDERS,
+    SupplierGraph,
+)
+
+
+def make_history(n: int, organizers: int, suppliers: int, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    favourite = {o: rng.randrange(suppliers) if rng.random() < 0.2 else None for o in range(organizers)}
+    rows = []
+    for i in range(n):
+        organizer = rng.randrange(organizers)
+        single = rng.random() < 0.3
+        if single and favourite[organizer] is not None and rng.random() < 0.8:
+            supplier = favourite[organizer]
+        elif rng.random() < 0.5:
+            supplier = rng.randrange(suppliers)
+        else:
+            supplier = None
+        rows.append((
+            f"{i}-1",
+            f"ГУ «Организатор №{organizer}»",
+            None if supplier is None else f"ТОО «Поставщик {supplier}»",
+            round(rng.uniform(1e4, 1e8), 2),
+            single,
+        ))
+    return pd.DataFrame(rows, columns=["ID", "organizer", "supplier", "amount", "single_source"])
+
+
+def scan_history(history: pd.DataFrame, organizers, suppliers):
+    """Признаки пар просмотром всей истории — то, что заменяет граф."""
+    columns = {name: [] for name in SUPPLIER_PAIR_FIELDS}
+    for organizer, supplier in zip(organizers, suppliers):
+        own = history["organizer"] == organizer
+        # пропущенный поставщик (NaN) ни с чем не совпадает — пары нет
+        pair = own & (history["supplier"] == supplier)
+        tenders = int(pair.sum())
+        single = int((pair & history["single_source"]).sum())
+        organizer_single = int((own & history["single_source"]).sum())
+        share = round(single / organizer_single, 4) if tenders and organizer_single else 0.0
+        columns["supplier_pair_tenders"].append(tenders)
+        columns["supplier_pair_single_source"].append(single)
+        columns["supplier_pair_share"].append(share)
+        columns["repeated_supplier_pair"].append(
+            single >= SUPPLIER_PAIR_MIN_TENDERS and share >= SUPPLIER_PAIR_MIN_SHARE
+        )
+    return columns
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--history", type=int, default=200000)
+    ap.add_argument("--organizers", type=int, default=2000)
+    ap.add_argument("--suppliers", type=int, default=5000)
+    ap.add_argument("--batch", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    history = make_history(args.history, args.organizers, args.suppliers, args.seed)
+    rows = list(history.itertuples(index=False, name=None))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "supplier_graph.sqlite3")
+        graph = SupplierGraph(path)
+        started = time.perf_counter()
+        for i in range(0, len(rows), args.batch):
+            graph.record(rows[i:i + args.batch])
+        elapsed = time.perf_counter() - started
+        print(f"запись      {len(rows) / elapsed:10.0f} тендеров/сек пачками по {args.batch}")
+        # повторный ingest тех же тендеров граф не меняет
+        again = graph.record(rows[:args.batch])
+
+        started = time.perf_counter()
+        reloaded = SupplierGraph(path)
+        reloaded.load()
+        print(f"загрузка    {(time.perf_counter() - started) * 1000:10.1f} мс, {reloaded.snapshot()}")
+        graph.conn.close()
+        reloaded.conn.close()
+
+    batch = history.sample(args.batch, random_state=args.seed)
+    organizers, suppliers = batch["organizer"].tolist(), batch["supplier"].tolist()
+
+    started = time.perf_counter()
+    expected = scan_history(history, organizers, suppliers)
+    scan = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = reloaded.pair_columns(organizers, suppliers)
+    lookup = time.perf_counter() - started
+    print(
+        f"признаки    просмотр истории {scan * 1000:8.1f} мс   граф {lookup * 1000:6.2f} мс   "
+        f"на пачку из {args.batch} (история {len(history)})"
+    )
+    print(f"repeated_supplier_pair у {sum(actual['repeated_supplier_pair'])} из {args.batch}")
+
+    if again or expected != actual:
+        print(f"Расхождение: повторная запись изменила {again} тендеров или признаки не совпали")
+        return 1
+    print("Признаки совпадают")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
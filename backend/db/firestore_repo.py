@@ -1,9 +1,27 @@
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Iterable, Iterator, Optional, List, Set, Tuple
 from google.cloud import firestore
 import logging
 
 logger = logging.getLogger(__name__)
 
+# поля, которые ingest добавляет в каждый документ (services/tender_sources.py)
+SOURCE_FIELD = "Источник"
+DEDUP_FIELD = "Ключ дедупликации"
+# лимит значений в фильтре "in"
+IN_QUERY_LIMIT = 30
+# лимит операций в одном batch Firestore
+BATCH_WRITE_LIMIT = 500
+# поля риска, которые ingest пишет в документ (services/risk_model.py)
+RISK_SCORE_FIELD = "risk_score"
+RISK_LEVEL_FIELD = "risk_level"
+
+def changed_fields(stored: Dict, item: Dict) -> Dict:
+    """Поля item, которые отличаются от сохранённых (NaN равен NaN)."""
+    return {
+        k: v for k, v in item.items()
+        if k not in stored or not (stored[k] == v or (stored[k] != stored[k] and v != v))
+    }
+
 class FirestoreTenderRepo:
     def __init__(self, collection_name: str = "tenders"):
         self.db = firestore.Client()
@@ -20,6 +38,7 @@ class FirestoreTenderRepo:
         limit: int,
         cursor: Optional[str],
         sort_amount: Optional[str],
+        sort_risk: Optional[str] = None,
     ) -> Tuple[List[Dict], Optional[str]]:
         q = self.collection
 
@@ -27,6 +46,7 @@ class FirestoreTenderRepo:
         method_vals = filters.get("method") or []
         purchase_vals = filters.get("purchaseType") or []
         status_vals = filters.get("status") or []
+        risk_level_vals = filters.get("riskLevel") or []
 
         if category_vals:
             q = q.where("`Общие_Вид предмета закупок`", "in", category_vals)
@@ -40,6 +60,18 @@ class FirestoreTenderRepo:
         if status_vals:
             q = q.where("`Статус`", "in", status_vals)
 
+        if risk_level_vals:
+            q = q.where(RISK_LEVEL_FIELD, "in", risk_level_vals)
+
+        # сортировка по риску исключает документы без risk_score (ещё не оценённые)
+        if sort_risk in ("asc", "desc"):
+            direction = (
+                firestore.Query.DESCENDING
+                if sort_risk == "desc"
+                else firestore.Query.ASCENDING
+            )
+            q = q.order_by(RISK_SCORE_FIELD, direction=direction)
+
         if sort_amount in ("asc", "desc"):
             direction = (
                 firestore.Query.DESCENDING
@@ -47,7 +79,7 @@ class FirestoreTenderRepo:
                 else firestore.Query.ASCENDING
             )
             q = q.order_by("`Сумма, тг.`", direction=direction)
-        else:
+        elif sort_risk not in ("asc", "desc"):
             q = q.order_by("__name__")
 
         if cursor:
@@ -66,42 +98,94 @@ class FirestoreTenderRepo:
 
         return items, last_cursor
     
-    def upsert_many_if_new(self, items: List[Dict], dry_run: bool = False) -> int:
+    def sources_by_dedup_key(self, keys: Iterable[str]) -> Dict[str, Set[str]]:
+        """Ключ дедупликации -> источники, из которых тендер уже сохранён."""
+        keys = sorted(set(keys))
+        found: Dict[str, Set[str]] = {}
+        for i in range(0, len(keys), IN_QUERY_LIMIT):
+            q = self.collection.where(f"`{DEDUP_FIELD}`", "in", keys[i:i + IN_QUERY_LIMIT])
+            for snap in q.select([f"`{DEDUP_FIELD}`", f"`{SOURCE_FIELD}`"]).stream():
+                data = snap.to_dict() or {}
+                found.setdefault(data.get(DEDUP_FIELD), set()).add(data.get(SOURCE_FIELD))
+        return found
+
+    def stream_fields(self, fields: Iterable[str]) -> Iterator[Tuple[str, Dict]]:
+        """(id, данные) всех документов коллекции, только с указанными полями."""
+        for snap in self.collection.select([f"`{f}`" for f in fields]).stream():
+            yield snap.id, snap.to_dict() or {}
+
+    def update_many(self, updates: Dict[str, Dict]) -> int:
+        """Частичное обновление полей документов батчами по BATCH_WRITE_LIMIT."""
+        ids = list(updates)
+        for i in range(0, len(ids), BATCH_WRITE_LIMIT):
+            batch = self.db.batch()
+            for tender_id in ids[i:i + BATCH_WRITE_LIMIT]:
+                batch.update(self.collection.document(tender_id), updates[tender_id])
+            batch.commit()
+        return len(ids)
+
+    def upsert_many(self, items: List[Dict], dry_run: bool = False) -> Tuple[List[str], List[str]]:
+        """Новые тендеры добавляет, у уже сохранённых перезаписывает только изменившиеся поля
+        (статус, сумма, поля риска). Возвращает ID (новых, обновлённых) — записанных
+        после commit (в DRY_RUN — тех, что были бы записаны)."""
         batch = self.db.batch()
-        new_count = 0
+        new_ids: List[str] = []
+        updated_ids: List[str] = []
+
+        items_by_id: Dict[str, Dict] = {}
         for item in items:
             tender_id = str(item.get("ID") or "").strip()
-            if not tender_id:
-                continue
+            if tender_id:
+                items_by_id[tender_id] = item
+
+        if dry_run:
+            existing = {}
+            stored_sources = {}
+        else:
+            # одно batch-чтение вместо отдельного get() на каждый документ
+            refs = [self.collection.document(tender_id) for tender_id in items_by_id]
+            existing = {snap.id: snap.to_dict() or {} for snap in self.db.get_all(refs) if snap.exists}
+            stored_sources = self.sources_by_dedup_key(
+                item[DEDUP_FIELD] for item in items_by_id.values() if item.get(DEDUP_FIELD)
+            )
+
+        for tender_id, item in items_by_id.items():
             if dry_run:
                 logger.debug(f"[DRY_RUN] Проверка наличия тендера ID={tender_id} в Firestore")
-                is_new = True
-            else:
-                doc_ref = self.collection.document(tender_id)
-                doc = doc_ref.get()
-                is_new = not doc.exists
 
-            if not is_new:
-                continue
             item["ID"] = tender_id
+            if tender_id in existing:
+                changed = changed_fields(existing[tender_id], item)
+                if changed:
+                    # set(merge=True), а не update(): ключи с пробелами update() разобрал бы как пути полей
+                    batch.set(self.collection.document(tender_id), changed, merge=True)
+                    updated_ids.append(tender_id)
+                continue
+            # тот же тендер уже сохранён из другого источника
+            other_sources = stored_sources.get(item.get(DEDUP_FIELD), set()) - {item.get(SOURCE_FIELD)}
+            if other_sources:
+                logger.debug("Дубликат ID=%s уже есть из %s", tender_id, other_sources)
+                continue
 
             if dry_run:
                 logger.info(f"[DRY_RUN] Добавили бы НОВЫЙ тендер ID={tender_id}")
             else:
                 batch.set(self.collection.document(tender_id), item)
 
-            new_count += 1
+            new_ids.append(tender_id)
 
-        if new_count > 0 and not dry_run:
+        if (new_ids or updated_ids) and not dry_run:
             batch.commit()
 
+        if new_ids and not dry_run:
             meta_ref = self.db.collection("metadata").document("tenders")
-            meta_ref.set({"total": firestore.Increment(new_count)}, merge=True)
+            meta_ref.set({"total": firestore.Increment(len(new_ids))}, merge=True)
 
         logger.info(
-            "[upsert_many_if_new] %s режим. Новых тендеров: %d",
+            "[upsert_many] %s режим. Новых тендеров: %d, обновлено: %d",
             "DRY_RUN" if dry_run else "REAL",
-            new_count,
+            len(new_ids),
+            len(updated_ids),
         )
 
-        return new_count
\ No newline at end of file
+        return new_ids, updated_ids
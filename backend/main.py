@@ -2,10 +2,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers.tenders import router as tenders_router
 from routers.risk import router as risk_router
+from routers.metrics import router as metrics_router
 from routers import tenders, risk, chat
 
 import asyncio
-from services.scheduler import start_tenders_scheduler
+import logging
+
+from services.risk_batcher import RISK_BATCHER
+from services.risk_model import get_risk_model
+from services.scheduler import run_tenders_scheduler, stop_tenders_scheduler
+from services.supplier_graph import SUPPLIER_GRAPH
 
 app = FastAPI()
 
@@ -19,10 +25,26 @@ app.add_middleware(
 
 app.include_router(tenders_router)
 app.include_router(risk_router, prefix="/api/v1", tags=["risk"])
+app.include_router(metrics_router)
 
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(start_tenders_scheduler())
+    run_tenders_scheduler()
+    # модель риска грузится заранее, чтобы первый запрос к /tender-risk/score не ждал
+    try:
+        await asyncio.to_thread(get_risk_model)
+    except Exception:
+        logging.getLogger(__name__).exception("Не удалось загрузить модель риска")
+    # граф поставщиков собирается в память из SQLite — тоже до первого запроса
+    try:
+        await asyncio.to_thread(SUPPLIER_GRAPH.load)
+    except Exception:
+        logging.getLogger(__name__).exception("Не удалось загрузить граф поставщиков")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_tenders_scheduler()
+    await RISK_BATCHER.close()
 
 @app.get("/")
 def root():
@@ -14,3 +14,6 @@ class TenderFilters(BaseModel):
     dateRange: Optional[DateRange] = None
 
     amountSort: Optional[Literal["asc", "desc"]] = None
+    # risk_level / risk_score документа (считаются при ingest, services/risk_model.py)
+    riskLevel: Optional[List[Literal["high", "medium", "low", "none"]]] = None
+    riskSort: Optional[Literal["asc", "desc"]] = None
@@ -1,13 +1,20 @@
-# !pip install requests beautifulsoup4 pandas aiohttp nest_asyncio
+# !pip install beautifulsoup4 lxml pandas aiohttp
 
-import re, time, random, asyncio, aiohttp, requests
+import os, re, time, random, asyncio, aiohttp, contextlib, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from bs4 import BeautifulSoup
 import pandas as pd
 from urllib.parse import urljoin
-import asyncio
-import nest_asyncio
 
-BASE_URL = "https://goszakup.gov.kz"
+from parsers.page_cache import PageCache, body_hash
+from parsers.page_recorder import is_recording, record_page
+from parsers.rate_limiter import RETRYABLE_STATUSES, AdaptiveLimiter, parse_retry_after
+from parsers.scrape_journal import MAX_DETAIL_ATTEMPTS, ScrapeJournal
+from parsers.scrape_state import ScrapeState
+from parsers.telemetry import SCRAPER_TELEMETRY
+from parsers.work_queue import WorkQueue
+
+BASE_URL = os.getenv("GOSZAKUP_BASE_URL", "https://goszakup.gov.kz")
 PAGINATION_URL_TEMPLATE = BASE_URL + "/ru/search/announce?count_record=2000&page={}"
 
 HEADERS = {
@@ -19,24 +26,151 @@ HEADERS = {
     "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8"
 }
 
+# "lxml" — быстрый C-парсер (parsers/lxml_backend.py), "bs4" — BeautifulSoup + html.parser.
+# Если lxml не установлен, автоматически используется bs4.
+PARSER_BACKEND = os.getenv("PARSER_BACKEND", "lxml")
+PARSER_BACKENDS = ("lxml", "bs4")
+
+# Локальные данные парсера: состояние, кэш страниц
+SCRAPER_DATA_DIR = os.getenv("SCRAPER_DATA_DIR", "data")
+
+# Кэш детальных страниц с условными запросами (ETag / Last-Modified / sha256)
+DETAIL_CACHE = os.getenv("DETAIL_CACHE", "true").lower() == "true"
+DETAIL_CACHE_DIR = os.path.join(SCRAPER_DATA_DIR, "pages")
+# в конце прогона из кэша удаляются страницы, к которым не обращались дольше
+# DETAIL_CACHE_TTL_DAYS, и самые давние сверх DETAIL_CACHE_MAX_MB
+DETAIL_CACHE_MAX_MB = float(os.getenv("DETAIL_CACHE_MAX_MB", 2048))
+DETAIL_CACHE_TTL_DAYS = float(os.getenv("DETAIL_CACHE_TTL_DAYS", 30))
+
+# Общий для всех detail-запросов адаптивный лимитер (AIMD + token bucket + Retry-After).
+# Выученный лимит параллельности сохраняется между обновлениями.
+DETAIL_LIMITER = AdaptiveLimiter(
+    initial_concurrency=int(os.getenv("SCRAPER_INITIAL_CONCURRENCY", 20)),
+    min_concurrency=int(os.getenv("SCRAPER_MIN_CONCURRENCY", 2)),
+    max_concurrency=int(os.getenv("SCRAPER_MAX_CONCURRENCY", 50)),
+    rate_per_sec=float(os.getenv("SCRAPER_RATE_PER_SEC", 25)),
+)
+
+# Вкладки объявления, загружаемые параллельно и сливаемые в один документ.
+# general обязательна; остальные (lots, documents) включаются через DETAIL_TABS
+# и отбрасываются, если не уложились в бюджет DETAIL_TAB_BUDGET_SECONDS на тендер.
+DETAIL_TABS_AVAILABLE = ("general", "lots", "documents")
+DETAIL_TABS = tuple(t.strip() for t in os.getenv("DETAIL_TABS", "general").split(",") if t.strip())
+DETAIL_TAB_BUDGET_SECONDS = float(os.getenv("DETAIL_TAB_BUDGET_SECONDS", 20))
+# Поле документа, в которое попадают строки таблицы дополнительной вкладки
+TAB_FIELDS = {"lots": "Лоты", "documents": "Документы"}
+
+# Пул процессов для парсинга деталей и размер очереди fetch -> parse
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", os.cpu_count() or 1))
+PARSE_QUEUE_SIZE = int(os.getenv("PARSE_QUEUE_SIZE", 100))
+
 # ------------------------- LIST PARSER -------------------------
 
-def parse_page(page_number):
+# Страница-список (count_record=2000) — несколько МБ HTML; с lxml-бэкендом строки
+# разбираются по мере прихода тела ответа кусками LIST_STREAM_CHUNK байт.
+LIST_STREAM_CHUNK = 64 * 1024
+
+def list_row_stream():
+    """Потоковый парсер строк списка или None (bs4-бэкенд — парсим страницу целиком)."""
+    if PARSER_BACKEND != "lxml":
+        return None
+    try:
+        from parsers import lxml_backend
+    except ImportError:
+        return None
+    return lxml_backend.ListRowStream()
+
+async def stream_page(session, page_number, limiter=None):
+    """Отдаёт строки страницы-списка по мере загрузки. Сетевые ошибки и
+    статусы >= 400 пробрасываются (ClientResponseError несёт заголовки с
+    Retry-After) — часть строк к этому моменту уже может быть отдана.
+
+    Запрос идёт через тот же адаптивный лимитер, что и detail-запросы:
+    слот держится до конца тела, а в AIMD уходят статус и время до заголовков
+    (тело списка — мегабайты, его загрузка не говорит о перегрузке сайта)."""
+    limiter = limiter or DETAIL_LIMITER
     url = PAGINATION_URL_TEMPLATE.format(page_number)
     print(f"Парсинг страницы-списка: {url}")
 
+    stream = list_row_stream()
+    # целиком тело держим, только если без него не обойтись
+    chunks = [] if stream is None or is_recording() else None
+    parse_seconds = 0.0
+    await limiter.acquire()
+    SCRAPER_TELEMETRY.fetch_started("list")
+    started = time.monotonic()
+    status, nbytes = None, 0
+    headers_latency = retry_after = None
+    released = False
+    try:
+        async with session.get(url, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=60)) as response:
+            headers_latency = time.monotonic() - started
+            status = response.status
+            if status in RETRYABLE_STATUSES:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(LIST_STREAM_CHUNK):
+                nbytes += len(chunk)
+                if chunks is not None:
+                    chunks.append(chunk)
+                if stream is not None:
+                    parse_started = time.monotonic()
+                    rows = stream.feed(chunk)
+                    parse_seconds += time.monotonic() - parse_started
+                    for row in rows:
+                        yield row
+        released = True
+        await limiter.release(status, headers_latency, retry_after)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        SCRAPER_TELEMETRY.count_failure("list")
+        if not released:
+            released = True
+            # оборвалось тело после 200 — это сетевая ошибка, как таймаут
+            failed_status = status if status is not None and status >= 400 else None
+            await limiter.release(failed_status, headers_latency or time.monotonic() - started, retry_after)
+        raise
+    finally:
+        if not released:
+            # отмена или потребитель бросил генератор — не сигнал перегрузки
+            await limiter.abandon()
+        SCRAPER_TELEMETRY.fetch_finished("list", time.monotonic() - started, status or "error", nbytes)
+
+    if chunks is not None:
+        content = b"".join(chunks)
+        record_page("list", url, content)
+
+    if stream is not None:
+        for row in stream.close():
+            yield row
+        SCRAPER_TELEMETRY.observe_parse("list", parse_seconds)
+        if not stream.found_table:
+            print(f"Таблица с результатами не найдена на странице {page_number}")
+        return
+
+    # 2000 строк — заметная нагрузка на CPU, не держим цикл событий
+    loop = asyncio.get_running_loop()
+    parse_started = time.monotonic()
+    data = await loop.run_in_executor(get_parse_pool(), parse_list_html, content)
+    SCRAPER_TELEMETRY.observe_parse("list", time.monotonic() - parse_started)
+    if data is None:
+        print(f"Таблица с результатами не найдена на странице {page_number}")
+        return
+    for row in data:
+        yield row
+
+async def parse_page(session, page_number):
+    """Все строки страницы-списка списком; [] при ошибке."""
     try:
-        response = requests.get(url, headers=HEADERS, timeout=20)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        return [row async for row in stream_page(session, page_number)]
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         print(f"Ошибка при запросе страницы {page_number}: {e}")
         return []
 
-    soup = BeautifulSoup(response.content, "html.parser")
+
+def parse_list_soup(soup):
     table = soup.find("table", {"id": "search-result"})
     if not table or not table.tbody:
-        print(f"Таблица с результатами не найдена на странице {page_number}")
-        return []
+        return None
 
     data = []
     for row in table.tbody.find_all("tr"):
@@ -90,17 +224,26 @@ def clean_text(x):
         return None
     return re.sub(r"\s+", " ", x).strip()
 
+TOP_FIELDS_MAP = {
+    "Номер объявления": "Детали_Номер объявления",
+    "Наименование объявления": "Детали_Наименование объявления",
+    "Статус объявления": "Детали_Статус объявления",
+    "Дата публикации объявления": "Детали_Дата публикации",
+    "Срок начала приема заявок": "Детали_Срок начала приема",
+    "Срок окончания приема заявок": "Детали_Срок окончания приема",
+}
+
+SKIPPED_PANEL_KEYS = ("Кол-во лотов в объявлении", "Сумма закупки")
+
+def panel_prefix(heading):
+    if "Общие сведения" in heading:
+        return "Общие_"
+    if "Информация об организаторе" in heading:
+        return "Организатор_"
+    return clean_text(heading) + "_"
+
 def parse_top_block(soup):
     out = {}
-    top_fields_map = {
-        "Номер объявления": "Детали_Номер объявления",
-        "Наименование объявления": "Детали_Наименование объявления",
-        "Статус объявления": "Детали_Статус объявления",
-        "Дата публикации объявления": "Детали_Дата публикации",
-        "Срок начала приема заявок": "Детали_Срок начала приема",
-        "Срок окончания приема заявок": "Детали_Срок окончания приема",
-    }
-
     for fg in soup.select("div.form-group"):
         label_tag = fg.select_one("label.control-label")
         input_tag = fg.select_one("input.form-control")
@@ -108,8 +251,8 @@ def parse_top_block(soup):
             continue
         label = clean_text(label_tag.get_text())
         val = input_tag.get("value")
-        if label in top_fields_map and val is not None:
-            out[top_fields_map[label]] = clean_text(val)
+        if label in TOP_FIELDS_MAP and val is not None:
+            out[TOP_FIELDS_MAP[label]] = clean_text(val)
 
     return out
 
@@ -126,12 +269,7 @@ def parse_panel_tables(soup):
         table = panel.select_one("table")
         if not table:
             continue
-        if "Общие сведения" in heading:
-            prefix = "Общие_"
-        elif "Информация об организаторе" in heading:
-            prefix = "Организатор_"
-        else:
-            prefix = clean_text(heading) + "_"
+        prefix = panel_prefix(heading)
 
         for tr in table.select("tr"):
             th = tr.find("th")
@@ -146,7 +284,7 @@ def parse_panel_tables(soup):
             else:
                 val = clean_text(td.get_text(" ", strip=True))
 
-            if key in ["Кол-во лотов в объявлении", "Сумма закупки"]:
+            if key in SKIPPED_PANEL_KEYS:
                 continue
 
             out[f"{prefix}{key}"] = val
@@ -159,78 +297,671 @@ def parse_detail_content(soup):
     detail.update(parse_panel_tables(soup))
     return detail
 
+def parse_tab_rows(soup):
+    """Строки первой таблицы с заголовками (вкладки «Лоты», «Документы»)."""
+    for table in soup.select("table"):
+        header, rows = None, []
+        for tr in table.select("tr"):
+            ths = tr.find_all("th")
+            tds = tr.find_all("td")
+            if header is None:
+                if ths and not tds:
+                    header = [clean_text(th.get_text(" ", strip=True)) for th in ths]
+                continue
+            if len(tds) != len(header):
+                continue
 
-async def fetch_detail_page(session, tender, max_retries=3):
-    detail_url = tender.get("Ссылка")
-    if not detail_url:
-        return tender
-
-    detail_url_general = detail_url + "?tab=general"
+            row = {key: clean_text(td.get_text(" ", strip=True)) for key, td in zip(header, tds) if key}
+            links = [
+                urljoin(BASE_URL, a["href"]) for a in tr.select("a[href]")
+                if not a["href"].startswith(("#", "javascript:"))
+            ]
+            if links:
+                row["Ссылки"] = links
+            rows.append(row)
+        if header is not None:
+            return rows
+    return []
+
+# ------------------------- PARSER BACKENDS -------------------------
+
+_backends = {}
+
+def get_parser_backend(name=None):
+    """Возвращает (parse_list_html, parse_detail_html, parse_tab_html) для выбранного бэкенда."""
+    name = name or PARSER_BACKEND
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Неизвестный PARSER_BACKEND: {name!r}, доступны: {PARSER_BACKENDS}")
+
+    if name not in _backends:
+        if name == "lxml":
+            try:
+                from parsers import lxml_backend
+            except ImportError:
+                print("lxml не установлен, парсинг через BeautifulSoup")
+                _backends[name] = get_parser_backend("bs4")
+                return _backends[name]
+            _backends[name] = (
+                lxml_backend.parse_list_html,
+                lxml_backend.parse_detail_html,
+                lxml_backend.parse_tab_html,
+            )
+        else:
+            _backends[name] = (parse_list_html_bs4, parse_detail_html_bs4, parse_tab_html_bs4)
+    return _backends[name]
+
+def parse_list_html_bs4(content):
+    return parse_list_soup(BeautifulSoup(content, "html.parser"))
+
+def parse_detail_html_bs4(html):
+    return parse_detail_content(BeautifulSoup(html, "html.parser"))
+
+def parse_tab_html_bs4(html):
+    return parse_tab_rows(BeautifulSoup(html, "html.parser"))
+
+def parse_list_html(content, backend=None):
+    return get_parser_backend(backend)[0](content)
+
+def parse_detail_html(html, backend=None):
+    return get_parser_backend(backend)[1](html)
+
+def parse_tab_html(tab, html, backend=None):
+    """Поля документа из вкладки объявления: general — плоские поля, остальные — список строк."""
+    if tab == "general":
+        return parse_detail_html(html, backend)
+    return {TAB_FIELDS[tab]: get_parser_backend(backend)[2](html)}
+
+def detail_tabs(tabs=None):
+    """Проверенный список вкладок; general всегда первая."""
+    tabs = tabs or DETAIL_TABS
+    unknown = [t for t in tabs if t not in DETAIL_TABS_AVAILABLE]
+    if unknown:
+        raise ValueError(f"Неизвестные DETAIL_TABS: {unknown}, доступны: {DETAIL_TABS_AVAILABLE}")
+    return ("general",) + tuple(t for t in dict.fromkeys(tabs) if t != "general")
+
+
+def _cached_detail(cache, meta, tab="general"):
+    detail_data = PageCache.cached_detail(meta)
+    if detail_data is None:
+        # версия парсера сменилась — перепарсиваем сохранённый HTML без загрузки
+        body = cache.body(meta["url"])
+        detail_data = parse_tab_html(tab, body.decode(meta.get("encoding") or "utf-8")) if body else {}
+        cache.update(meta, detail_data)
+    return detail_data
+
+def parse_detail_bytes(body, encoding, tab="general"):
+    # выполняется в процессе пула парсинга
+    return parse_tab_html(tab, body.decode(encoding))
+
+def parse_pages_bytes(pages):
+    """Парсинг всех вкладок тендера одним вызовом пула: [(tab, body, encoding)] -> [detail]."""
+    return [parse_detail_bytes(body, encoding, tab) for tab, body, encoding in pages]
+
+def merge_detail_pages(tender, pages):
+    record = dict(tender)
+    for page in pages:
+        record.update(page["detail"])
+    return record
+
+
+async def download_tab_page(session, url, tab="general", max_retries=3, cache=None, limiter=None):
+    """Загружает одну вкладку объявления. Возвращает dict с body/encoding (нужен парсинг)
+    или с готовым detail из кэша; None — если страницу получить не удалось."""
+    limiter = limiter or DETAIL_LIMITER
+    kind = f"detail:{tab}"
+    cached = cache.get(url) if cache else None
+    headers = {**HEADERS, **PageCache.conditional_headers(cached)}
 
     for attempt in range(1, max_retries + 1):
+        retry_after = None
         try:
-            async with session.get(
-                detail_url_general,
-                headers=HEADERS,
-                timeout=aiohttp.ClientTimeout(total=25)
-            ) as resp:
-                
-                if resp.status in (429, 500, 502, 503, 504):
-                    raise aiohttp.ClientResponseError(
-                        request_info=resp.request_info,
-                        history=resp.history,
-                        status=resp.status,
-                        message=f"Retryable status {resp.status}"
-                    )
-
-                resp.raise_for_status()
-                html = await resp.text()
-                soup = BeautifulSoup(html, "html.parser")
-                detail_data = parse_detail_content(soup)
-                return {**tender, **detail_data}
+            await limiter.acquire()
+            status = None
+            error = None
+            cancelled = False
+            nbytes = 0
+            SCRAPER_TELEMETRY.fetch_started(kind)
+            started = time.monotonic()
+            try:
+                async with session.get(
+                    url,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=25)
+                ) as resp:
+                    status = resp.status
+
+                    if resp.status in RETRYABLE_STATUSES:
+                        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                        raise aiohttp.ClientResponseError(
+                            request_info=resp.request_info,
+                            history=resp.history,
+                            status=resp.status,
+                            message=f"Retryable status {resp.status}"
+                        )
+
+                    if resp.status == 304 and cached:
+                        SCRAPER_TELEMETRY.count_cache_hit(kind)
+                        return {"url": url, "tab": tab, "detail": _cached_detail(cache, cached, tab)}
+
+                    resp.raise_for_status()
+                    page = {
+                        "url": url,
+                        "tab": tab,
+                        "body": await resp.read(),
+                        "encoding": resp.get_encoding(),
+                        "etag": resp.headers.get("ETag"),
+                        "last_modified": resp.headers.get("Last-Modified"),
+                        "detail": None,
+                    }
+                    nbytes = len(page["body"])
+                    record_page("detail" if tab == "general" else f"tabs/{tab}", url, page["body"])
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                latency = time.monotonic() - started
+                if cancelled:
+                    # вкладку сняли по бюджету — это не сигнал перегрузки сайта
+                    SCRAPER_TELEMETRY.fetch_cancelled(kind)
+                    await limiter.abandon()
+                else:
+                    SCRAPER_TELEMETRY.fetch_finished(kind, latency, status or error, nbytes)
+                    # парсинг не входит в задержку — лимитер оценивает только сеть
+                    await limiter.release(status, latency, retry_after)
+
+            if cached and cached.get("sha256") == body_hash(page["body"]):
+                SCRAPER_TELEMETRY.count_cache_hit(kind)
+                page["detail"] = _cached_detail(cache, cached, tab)
+                cache.update(cached, page["detail"], page["etag"], page["last_modified"])
+            return page
 
         except Exception as e:
             if attempt == max_retries:
-                print(f"[FAIL] {detail_url_general}: {e}")
-                return tender
-            sleep_s = (2 ** attempt) + random.uniform(0.2, 0.8)
+                print(f"[FAIL] {url}: {e}")
+                SCRAPER_TELEMETRY.count_failure(kind)
+                return None
+            SCRAPER_TELEMETRY.count_retry(kind, getattr(e, "status", None) or type(e).__name__)
+            sleep_s = retry_after or (2 ** attempt) + random.uniform(0.2, 0.8)
             await asyncio.sleep(sleep_s)
 
 
-async def run_detail_scraper(all_tenders_data):
-    CONNECTIONS_LIMIT = 20
-    sem = asyncio.Semaphore(CONNECTIONS_LIMIT)
+async def download_detail_page(session, tender, max_retries=3, cache=None, limiter=None, tabs=None):
+    """Параллельно загружает вкладки объявления через общий пул соединений.
+    Возвращает список страниц (general первой) или None, если не удалась general;
+    у строки без ссылки загружать нечего — [] (это не ошибка).
+    Дополнительные вкладки, не успевшие за DETAIL_TAB_BUDGET_SECONDS, отбрасываются."""
+    detail_url = tender.get("Ссылка")
+    if not detail_url:
+        return []
 
-    connector = aiohttp.TCPConnector(limit=CONNECTIONS_LIMIT, ttl_dns_cache=300)
+    tabs = detail_tabs(tabs)
+    if len(tabs) == 1:
+        page = await download_tab_page(session, detail_url + "?tab=general", "general", max_retries, cache, limiter)
+        return [page] if page is not None else None
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + DETAIL_TAB_BUDGET_SECONDS
+    tasks = {
+        tab: asyncio.ensure_future(
+            download_tab_page(session, f"{detail_url}?tab={tab}", tab, max_retries, cache, limiter)
+        )
+        for tab in tabs
+    }
+    try:
+        general = await tasks["general"]
+        if general is None:
+            return None
 
-    async def limited_fetch(session, tender):
-        async with sem:
-            await asyncio.sleep(random.uniform(0.05, 0.2))
-            return await fetch_detail_page(session, tender)
+        extra = [task for tab, task in tasks.items() if tab != "general"]
+        await asyncio.wait(extra, timeout=max(0.0, deadline - loop.time()))
 
-    async with aiohttp.ClientSession(connector=connector) as session:
-        tasks = [limited_fetch(session, t) for t in all_tenders_data]
-        return await asyncio.gather(*tasks)
+        pages = [general]
+        for tab, task in tasks.items():
+            if tab == "general":
+                continue
+            if not task.done():
+                print(f"[TAB BUDGET] {detail_url}?tab={tab}: не уложилась в {DETAIL_TAB_BUDGET_SECONDS} сек")
+            elif task.result() is not None:
+                pages.append(task.result())
+        return pages
+    finally:
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+
+
+def _store_parsed(cache, page, detail_data):
+    if cache:
+        cache.put(page["url"], page["body"], page["encoding"], detail_data, page["etag"], page["last_modified"])
+
+
+async def fetch_detail_page(session, tender, max_retries=3, cache=None, limiter=None):
+    """Загрузка и парсинг одной детальной страницы (всех вкладок) в текущем потоке."""
+    pages = await download_detail_page(session, tender, max_retries, cache, limiter)
+    if pages is None:
+        return tender
+    for page in pages:
+        if page["detail"] is None:
+            started = time.monotonic()
+            page["detail"] = parse_detail_bytes(page["body"], page["encoding"], page["tab"])
+            SCRAPER_TELEMETRY.observe_parse("detail", time.monotonic() - started)
+            _store_parsed(cache, page, page["detail"])
+    return merge_detail_pages(tender, pages)
+
+
+_parse_pool = None
+
+def get_parse_pool():
+    global _parse_pool
+    if _parse_pool is None:
+        # spawn: форк процесса с потоками (gRPC Firestore, uvicorn) небезопасен
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _parse_pool
+
+def shutdown_parse_pool(wait=False):
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=wait, cancel_futures=True)
+        _parse_pool = None
+
+
+# aiohttp.TraceConfig для замеров (bench/scraper_bench.py подключает сюда свои хуки)
+SESSION_TRACE_CONFIGS = []
+
+def make_client_session():
+    connector = aiohttp.TCPConnector(limit=DETAIL_LIMITER.max_concurrency, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector, trace_configs=SESSION_TRACE_CONFIGS or None)
+
+@contextlib.asynccontextmanager
+async def _client_session(session=None):
+    if session is not None:
+        yield session
+        return
+    async with make_client_session() as own_session:
+        yield own_session
+
+
+async def run_detail_scraper(all_tenders_data, on_result=None, session=None):
+    """Конвейер fetch -> parse: asyncio только скачивает байты, парсинг идёт
+    в пуле процессов; между стадиями — ограниченная очередь.
+
+    Если задан on_result, каждый готовый тендер сразу передаётся в
+    `await on_result(row, record)` (record=None — detail-запрос не удался)
+    и ничего не накапливается; иначе возвращается список записей в исходном
+    порядке (при неудаче — исходная строка).
+
+    all_tenders_data может быть асинхронным итератором (строки списка по мере
+    загрузки страниц) — тогда detail-запросы начинаются до конца списка;
+    в этом режиме нужен on_result."""
+    cache = PageCache(DETAIL_CACHE_DIR) if DETAIL_CACHE else None
+    pool = get_parse_pool()
+    loop = asyncio.get_running_loop()
+    n_fetchers = DETAIL_LIMITER.max_concurrency
+
+    streaming = hasattr(all_tenders_data, "__aiter__")
+    if streaming and not on_result:
+        raise ValueError("Потоковый источник строк требует on_result")
+    results = [] if on_result else list(all_tenders_data)
+    parse_queue = asyncio.Queue(maxsize=PARSE_QUEUE_SIZE)
+
+    if streaming:
+        # источник читается отдельной задачей, чтобы загрузка списка
+        # не ждала, пока освободятся fetch-воркеры
+        source = asyncio.Queue()
+
+        async def feed_source():
+            try:
+                idx = 0
+                async for tender in all_tenders_data:
+                    source.put_nowait((idx, tender))
+                    idx += 1
+            finally:
+                for _ in range(n_fetchers):
+                    source.put_nowait(None)
+
+        next_tender = source.get
+        feeders = [feed_source()]
+    else:
+        pending = iter(enumerate(all_tenders_data))
+
+        async def next_tender():
+            return next(pending, None)
+
+        feeders = []
+
+    async def emit(idx, tender, record):
+        if on_result:
+            await on_result(tender, record)
+        else:
+            results[idx] = record if record is not None else tender
+
+    async def fetch_worker(session):
+        while True:
+            item = await next_tender()
+            if item is None:
+                return
+            idx, tender = item
+            pages = await download_detail_page(session, tender, cache=cache)
+            if pages is None:
+                await emit(idx, tender, None)
+            elif all(page["detail"] is not None for page in pages):
+                await emit(idx, tender, merge_detail_pages(tender, pages))
+            else:
+                await parse_queue.put((idx, tender, pages))
+                SCRAPER_TELEMETRY.parse_queue_depth = parse_queue.qsize()
+
+    async def parse_worker():
+        while True:
+            idx, tender, pages = await parse_queue.get()
+            SCRAPER_TELEMETRY.parse_queue_depth = parse_queue.qsize()
+            try:
+                try:
+                    to_parse = [page for page in pages if page["detail"] is None]
+                    started = time.monotonic()
+                    details = await loop.run_in_executor(
+                        pool,
+                        parse_pages_bytes,
+                        [(page["tab"], page["body"], page["encoding"]) for page in to_parse],
+                    )
+                    # включая ожидание свободного процесса пула
+                    SCRAPER_TELEMETRY.observe_parse("detail", time.monotonic() - started)
+                    for page, detail_data in zip(to_parse, details):
+                        page["detail"] = detail_data
+                        _store_parsed(cache, page, detail_data)
+                    record = merge_detail_pages(tender, pages)
+                except Exception as e:
+                    print(f"[PARSE FAIL] {pages[0]['url']}: {e}")
+                    record = None
+                await emit(idx, tender, record)
+            finally:
+                parse_queue.task_done()
+
+    parse_tasks = [asyncio.create_task(parse_worker()) for _ in range(PARSE_WORKERS * 2)]
+    try:
+        async with _client_session(session) as session:
+            await asyncio.gather(
+                *feeders, *(fetch_worker(session) for _ in range(n_fetchers))
+            )
+        await parse_queue.join()
+    finally:
+        for task in parse_tasks:
+            task.cancel()
+        SCRAPER_TELEMETRY.parse_queue_depth = 0
+
+    print(f"Лимитер detail-запросов: {DETAIL_LIMITER.snapshot()}")
+    return results
 
 #--------Start____________#
 PAGES_TO_SCRAPE = [1, 2, 3, 4, 5]
 
-def scrape_tenders_sync():
-    all_tenders_data = []
+# Инкрементальный режим: пагинация останавливается на первой полностью известной
+# странице, детали запрашиваются только для новых/изменённых строк списка.
+INCREMENTAL_SCRAPE = os.getenv("INCREMENTAL_SCRAPE", "true").lower() == "true"
+SCRAPE_STATE_PATH = os.path.join(SCRAPER_DATA_DIR, "scrape_state.json")
+SCRAPE_JOURNAL_PATH = os.path.join(SCRAPER_DATA_DIR, "scrape_journal.sqlite3")
+STATE_SAVE_EVERY = 200
+
+# "local" — детали обрабатывает этот процесс; "queue" — задачи уходят в общую
+# очередь (parsers/work_queue.py), их разбирают воркеры parsers/detail_worker.py
+# на любом числе процессов/подов. Локальные воркеры координатора тоже участвуют.
+DETAIL_MODE = os.getenv("DETAIL_MODE", "local")
+DETAIL_QUEUE_PATH = os.getenv("DETAIL_QUEUE_PATH", os.path.join(SCRAPER_DATA_DIR, "detail_queue.sqlite3"))
+DETAIL_QUEUE_LOCAL_WORKERS = int(os.getenv("DETAIL_QUEUE_LOCAL_WORKERS", 1))
+# DETAIL_QUEUE_LOCAL_WORKERS=0 допустим, только если очередь разбирают внешние воркеры
+DETAIL_QUEUE_EXTERNAL_WORKERS = os.getenv("DETAIL_QUEUE_EXTERNAL_WORKERS", "false").lower() == "true"
+# сколько ждать хоть одного результата из очереди, прежде чем считать прогон упавшим
+DETAIL_QUEUE_IDLE_TIMEOUT = float(os.getenv("DETAIL_QUEUE_IDLE_TIMEOUT", 30 * 60))
+
+# Попытки загрузить страницу-список; после них страница считается незагруженной
+LIST_MAX_RETRIES = int(os.getenv("SCRAPER_LIST_RETRIES", 3))
+
+
+class ListPageError(Exception):
+    """Страницу-список не удалось загрузить за LIST_MAX_RETRIES попыток."""
+
+
+async def _page_rows(session, page, journal=None):
+    """Строки страницы: из журнала прогона или потоком из сети, с повторами.
+    Полностью загруженная страница записывается в журнал; если все попытки
+    упали — ListPageError (пустая страница — это конец списка, а не ошибка)."""
+    rows = journal.page_rows(page) if journal else None
+    if rows is not None:
+        print(f"Страница {page} взята из журнала прогона")
+        for row in rows:
+            yield row
+        return
+
+    for attempt in range(1, LIST_MAX_RETRIES + 1):
+        # повтор отдаёт страницу заново; уже отданные строки отсеет iter_list_rows
+        rows = []
+        try:
+            async for row in stream_page(session, page):
+                rows.append(row)
+                yield row
+            break
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Ошибка при запросе страницы {page} (попытка {attempt}/{LIST_MAX_RETRIES}): {e}")
+            if attempt == LIST_MAX_RETRIES:
+                raise ListPageError(f"Страница {page}: {e}") from e
+            SCRAPER_TELEMETRY.count_retry("list", getattr(e, "status", None) or type(e).__name__)
+            retry_after = parse_retry_after((getattr(e, "headers", None) or {}).get("Retry-After"))
+            await asyncio.sleep(retry_after or (2 ** attempt) + random.uniform(0.2, 0.8))
+    if journal and rows:
+        journal.record_page(page, rows)
+
+async def iter_list_rows(session, state=None, journal=None, failed_pages=None):
+    """Новые строки списка по мере загрузки страниц: без повторов между
+    страницами, с остановкой на первой полностью известной странице.
+    Незагруженная страница пропускается, попадает в failed_pages и в журнал;
+    пока такая страница прогона не загружена, ранняя остановка на известной
+    странице перед ней не срабатывает.
+    Строки без ID пропускаются: журнал и очередь ведутся по ID, а ingest
+    такие записи всё равно отбрасывает."""
+    seen_ids = set()
+    # страницы, упавшие в прошлой попытке этого прогона (до рестарта)
+    pending_pages = journal.failed_pages() if journal else set()
+
+    with SCRAPER_TELEMETRY.stage("list_pages"):
+        for page in PAGES_TO_SCRAPE:
+            total = fresh = no_id = 0
+            try:
+                async for row in _page_rows(session, page, journal):
+                    total += 1
+                    if not row.get("ID"):
+                        no_id += 1
+                        continue
+                    # при появлении новых тендеров строки сдвигаются между страницами
+                    if row.get("ID") in seen_ids:
+                        continue
+                    seen_ids.add(row.get("ID"))
+                    if state is None or not state.is_known(row):
+                        fresh += 1
+                        yield row
+            except ListPageError as e:
+                print(f"{e}; страница пропущена, прогон останется незавершённым")
+                if journal:
+                    journal.record_page_failure(page)
+                if failed_pages is not None:
+                    failed_pages.append(page)
+                continue
+            pending_pages.discard(page)
+            if no_id:
+                print(f"Страница {page}: пропущено строк без ID: {no_id}")
+            if not total:
+                break
+
+            if state is not None and not fresh:
+                ahead = sorted(p for p in pending_pages if p > page)
+                if ahead:
+                    print(f"Страница {page} полностью известна, но страницы {ahead} ещё не загружены — продолжаем")
+                    continue
+                print(f"Страница {page} полностью известна, пагинация остановлена")
+                break
+
+def check_detail_queue_workers():
+    """Без локальных и без внешних воркеров очередь никто не разберёт."""
+    if DETAIL_QUEUE_LOCAL_WORKERS <= 0 and not DETAIL_QUEUE_EXTERNAL_WORKERS:
+        raise ValueError(
+            "DETAIL_MODE=queue с DETAIL_QUEUE_LOCAL_WORKERS=0: задачи некому обрабатывать "
+            "(если запущены parsers.detail_worker, задайте DETAIL_QUEUE_EXTERNAL_WORKERS=true)"
+        )
+
+async def run_queued_details(work, on_result):
+    """DETAIL_MODE=queue: ставит строки в очередь и отдаёт результаты воркеров
+    в `await on_result(row, record)` (record=None — detail-запрос не удался).
+    Если за DETAIL_QUEUE_IDLE_TIMEOUT не пришло ни одного результата —
+    TimeoutError (прогон останется незавершённым, задачи — в очереди)."""
+    from parsers.detail_worker import QUEUE_POLL_SECONDS, run_detail_worker
+
+    check_detail_queue_workers()
+
+    queue = WorkQueue(DETAIL_QUEUE_PATH)
+    added = queue.enqueue_many(work)
+    print(f"В очередь поставлено {added} задач, локальных воркеров: {DETAIL_QUEUE_LOCAL_WORKERS}")
+    waiting = {str(row.get("ID")) for row in work}
+    workers = [asyncio.create_task(run_detail_worker(queue)) for _ in range(DETAIL_QUEUE_LOCAL_WORKERS)]
+    last_result = time.monotonic()
+    try:
+        while waiting:
+            results = queue.take_results()
+            for row, record in results:
+                waiting.discard(str(row.get("ID")))
+                await on_result(row, record)
+            if results:
+                last_result = time.monotonic()
+                continue
+            for worker in workers:
+                if worker.done():
+                    worker.result()  # пробрасываем исключение упавшего воркера
+            idle = time.monotonic() - last_result
+            if idle > DETAIL_QUEUE_IDLE_TIMEOUT:
+                print(f"Очередь detail-задач: {idle:.0f} сек без результатов, ждут {len(waiting)} задач")
+                raise TimeoutError(f"Нет результатов из очереди detail-задач {idle:.0f} сек")
+            await asyncio.sleep(QUEUE_POLL_SECONDS)
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        print(f"Очередь detail-задач: {queue.counts()}")
+        queue.close()
+
+async def scrape_tenders(on_record, incremental=None):
+    """Парсит список и детали в текущем цикле событий, отдавая каждую готовую
+    запись в `await on_record(record)` по мере готовности. Возвращает число записей.
+
+    Прогресс пишется в журнал: после рестарта прогон продолжается с места
+    остановки, а упавшие detail-запросы повторяются в следующих прогонах.
+    Если хоть одна страница-список не загрузилась, прогон не завершается
+    (следующий дозагрузит её) и состояние инкрементального парсинга не
+    сохраняется — иначе пагинация остановилась бы до пропущенной страницы.
+    Отмена задачи (CancelledError) корректно закрывает сессию и журнал;
+    состояние сохраняется, только если список был загружен целиком."""
+    if incremental is None:
+        incremental = INCREMENTAL_SCRAPE
+    if DETAIL_MODE == "queue":
+        # до загрузки списка, а не после
+        check_detail_queue_workers()
+    state = ScrapeState.load(SCRAPE_STATE_PATH) if incremental else None
+    journal = ScrapeJournal(SCRAPE_JOURNAL_PATH)
+    journal.start()
+    if journal.resumed:
+        print(f"Продолжаем незавершённый прогон #{journal.run_id}")
+    SCRAPER_TELEMETRY.begin_run()
+    failed_pages = []
+    list_complete = False
 
-    for page in PAGES_TO_SCRAPE:
-        all_tenders_data.extend(parse_page(page))
+    try:
+        async with make_client_session() as session:
+            done_ids = journal.done_ids()
+            queued_ids = set()
+
+            async def work_rows():
+                nonlocal list_complete
+                # строки списка отдаются по мере загрузки, затем — повторы упавших
+                async for row in iter_list_rows(session, state, journal, failed_pages):
+                    if row.get("ID") not in done_ids and row.get("ID") not in queued_ids:
+                        queued_ids.add(row.get("ID"))
+                        yield row
+                list_complete = not failed_pages
+                for row in journal.retryable_failures():
+                    if row.get("ID") not in done_ids and row.get("ID") not in queued_ids:
+                        queued_ids.add(row.get("ID"))
+                        yield row
+
+            emitted = 0
+
+            async def on_result(row, record):
+                nonlocal emitted
+                ok = record is not None
+                if not ok:
+                    record = row
+                attempts = journal.record_detail(row, ok)
+                # упавший тендер ждёт повтора в следующем прогоне; без деталей
+                # отдаём его только когда попытки исчерпаны
+                if not ok and attempts < MAX_DETAIL_ATTEMPTS:
+                    return
+                if state is not None:
+                    # исчерпавший попытки тоже помечаем известным: иначе каждый
+                    # инкрементальный прогон запрашивал бы его заново, а его страница
+                    # никогда не считалась бы полностью известной
+                    state.mark(row, record)
+                    if list_complete and len(state.seen) % STATE_SAVE_EVERY == 0:
+                        state.save()
+                emitted += 1
+                await on_record(record)
+
+            print(f"\nУже готово в прогоне: {len(done_ids)}. Стартуем detail-enrichment параллельно с загрузкой списка...")
+            start_time = time.time()
+            with SCRAPER_TELEMETRY.stage("details"):
+                if DETAIL_MODE == "queue":
+                    # очереди нужен весь список задач сразу
+                    await run_queued_details([row async for row in work_rows()], on_result)
+                else:
+                    await run_detail_scraper(work_rows(), on_result=on_result, session=session)
+            print(f"Detail-enrichment: {len(queued_ids)} тендеров за {time.time() - start_time:.1f} сек")
+        if DETAIL_CACHE:
+            swept = await asyncio.to_thread(
+                PageCache(DETAIL_CACHE_DIR).sweep,
+                int(DETAIL_CACHE_MAX_MB * 1024 * 1024),
+                DETAIL_CACHE_TTL_DAYS * 24 * 3600,
+            )
+            print(f"Кэш страниц: {swept}")
+        if failed_pages:
+            print(f"Страницы-списки не загружены: {failed_pages}, прогон #{journal.run_id} не завершён")
+        else:
+            print(f"Журнал прогона: {journal.finish()}")
+    finally:
+        journal.close()
+        if state is not None and list_complete:
+            state.save()
+            print(f"High-water mark: {state.high_water}")
+
+    return emitted
 
-    print(f"\nСобрано {len(all_tenders_data)} базовых записей. Стартуем detail-enrichment...")
-    nest_asyncio.apply()
-    start_time = time.time()
-    final_data = asyncio.run(run_detail_scraper(all_tenders_data))
-    print(f"Detail-enrichment завершён за {time.time() - start_time:.1f} сек")
+def scrape_tenders_sync(incremental=None):
+    """Синхронная обёртка для запуска из CLI/ноутбука."""
+    records = []
+
+    async def collect(record):
+        records.append(record)
+
+    async def run():
+        try:
+            await scrape_tenders(collect, incremental)
+        finally:
+            shutdown_parse_pool()
 
-    return final_data
+    asyncio.run(run())
+    return records
 
 def main():
-    records = scrape_tenders_sync()
+    records = scrape_tenders_sync(incremental=False)
     df = pd.DataFrame(records)
     df.to_csv("goszakup_tenders_full_async.csv", index=False, encoding="utf-8-sig")
     print("Сохранено: goszakup_tenders_full_async.csv, строк:", len(df))
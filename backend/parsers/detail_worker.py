@@ -0,0 +1,82 @@
+"""Воркер detail-очереди (DETAIL_MODE=queue).
+
+Арендует пачки тендеров из parsers/work_queue.py, прогоняет их через обычный
+конвейер fetch -> parse (run_detail_scraper) и подтверждает результаты.
+Можно запускать сколько угодно экземпляров, каждый со своим пулом соединений
+и лимитером:
+
+    cd backend && python -m parsers.detail_worker            # до остановки
+    cd backend && python -m parsers.detail_worker --idle-exit  # до опустошения очереди
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import uuid
+from typing import Optional
+
+from parsers.ai_procure_parser import (
+    DETAIL_QUEUE_PATH,
+    make_client_session,
+    run_detail_scraper,
+    shutdown_parse_pool,
+)
+from parsers.work_queue import WorkQueue
+
+QUEUE_LEASE_BATCH = int(os.getenv("QUEUE_LEASE_BATCH", 100))
+QUEUE_POLL_SECONDS = float(os.getenv("QUEUE_POLL_SECONDS", 2))
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+async def run_detail_worker(queue: WorkQueue, worker_id: Optional[str] = None, idle_exit: bool = False) -> int:
+    """Обрабатывает задачи, пока не отменят (или пока очередь не опустеет при
+    idle_exit). Возвращает число подтверждённых задач."""
+    worker_id = worker_id or make_worker_id()
+    acked = 0
+
+    async def on_result(row, record):
+        nonlocal acked
+        # record=None — detail-запрос не удался
+        if queue.ack(row.get("ID"), worker_id, record):
+            acked += 1
+
+    try:
+        async with make_client_session() as session:
+            while True:
+                rows = queue.lease(worker_id, QUEUE_LEASE_BATCH)
+                if not rows:
+                    if idle_exit:
+                        return acked
+                    await asyncio.sleep(QUEUE_POLL_SECONDS)
+                    continue
+                await run_detail_scraper(rows, on_result=on_result, session=session)
+    finally:
+        # неподтверждённые задачи сразу возвращаем, не дожидаясь таймаута видимости
+        queue.release(worker_id)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--queue", default=DETAIL_QUEUE_PATH)
+    ap.add_argument("--idle-exit", action="store_true")
+    args = ap.parse_args(argv)
+
+    queue = WorkQueue(args.queue)
+    worker_id = make_worker_id()
+    print(f"Воркер {worker_id}, очередь {args.queue}")
+    try:
+        acked = asyncio.run(run_detail_worker(queue, worker_id, args.idle_exit))
+        print(f"Воркер {worker_id}: обработано задач {acked}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+        shutdown_parse_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""lxml-бэкенд для парсинга страниц goszakup.
+
+Повторяет логику BeautifulSoup-функций из ai_procure_parser
+(parse_page / parse_top_block / parse_panel_tables / parse_tab_rows) один в один,
+но работает на C-парсере libxml2 и XPath вместо html.parser и CSS-селекторов.
+"""
+
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+
+from parsers.ai_procure_parser import (
+    BASE_URL,
+    SKIPPED_PANEL_KEYS,
+    TOP_FIELDS_MAP,
+    clean_text,
+    panel_prefix,
+)
+
+# BeautifulSoup.get_text() не возвращает текст из script/style/template
+_NON_TEXT_TAGS = ("script", "style", "template")
+
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def _has_class(cls: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+_XP_RESULT_TABLE = etree.XPath("//table[@id='search-result']")
+_XP_FORM_GROUPS = etree.XPath(f"//div[{_has_class('form-group')}]")
+_XP_LABEL = etree.XPath(f".//label[{_has_class('control-label')}]")
+_XP_INPUT = etree.XPath(f".//input[{_has_class('form-control')}]")
+_XP_PANELS = etree.XPath(
+    f"//div[{_has_class('panel')} and {_has_class('panel-default')}]"
+)
+_XP_PANEL_HEADING = etree.XPath(f".//div[{_has_class('panel-heading')}]")
+_XP_TBODY = etree.XPath(".//tbody")
+_XP_TABLE = etree.XPath(".//table")
+_XP_TR = etree.XPath(".//tr")
+_XP_TH = etree.XPath(".//th")
+_XP_TD = etree.XPath(".//td")
+_XP_LI = etree.XPath(".//li")
+_XP_A = etree.XPath(".//a")
+_XP_A_HREF = etree.XPath(".//a[@href]")
+_XP_TABLES = etree.XPath("//table")
+_XP_SMALL = etree.XPath(".//small")
+_XP_STRONG = etree.XPath(".//strong")
+
+
+def _to_tree(content):
+    if isinstance(content, bytes):
+        root = lxml.html.document_fromstring(content, parser=_HTML_PARSER)
+    else:
+        root = lxml.html.document_fromstring(content)
+    etree.strip_elements(root, *_NON_TEXT_TAGS, with_tail=False)
+    return root
+
+
+def _first(xpath, el):
+    found = xpath(el)
+    return found[0] if found else None
+
+
+def _text(el, sep: str = "", strip: bool = False) -> str:
+    """Аналог Tag.get_text(sep, strip=...) из BeautifulSoup."""
+    if not strip:
+        return sep.join(el.itertext())
+    return sep.join(s for s in (t.strip() for t in el.itertext()) if s)
+
+
+# ------------------------- LIST PARSER -------------------------
+
+def parse_list_row(row) -> Optional[Dict]:
+    cols = _XP_TD(row)
+    if len(cols) < 7:
+        return None
+
+    id_col = cols[0]
+    strong = _first(_XP_STRONG, id_col)
+    tender_id = _text(strong, strip=True) if strong is not None else None
+    lots_tag = _first(_XP_SMALL, id_col)
+    lots_count = (
+        _text(lots_tag, strip=True).replace("Лотов:", "").strip()
+        if lots_tag is not None else None
+    )
+
+    name_col = cols[1]
+    link_tag = _first(_XP_A, name_col)
+    announcement_name = _text(link_tag, strip=True) if link_tag is not None else None
+    relative_link = link_tag.get("href") if link_tag is not None else None
+    full_link = urljoin(BASE_URL, relative_link) if relative_link else None
+
+    organizer_tag = _first(_XP_SMALL, name_col)
+    organizer = (
+        _text(organizer_tag, strip=True).replace("Организатор:", "").strip()
+        if organizer_tag is not None else None
+    )
+
+    amount_tag = _first(_XP_STRONG, cols[5])
+    amount = (
+        _text(amount_tag, strip=True)
+        if amount_tag is not None else _text(cols[5], " ", strip=True)
+    )
+
+    return {
+        "ID": tender_id,
+        "Наименование объявления": announcement_name,
+        "Ссылка": full_link,
+        "Лотов": lots_count,
+        "Организатор": organizer,
+        "Способ": _text(cols[2], " ", strip=True),
+        "Начало приема заявок": _text(cols[3], " ", strip=True),
+        "Окончание приема заявок": _text(cols[4], " ", strip=True),
+        "Сумма, тг.": amount,
+        "Статус": _text(cols[6], " ", strip=True),
+    }
+
+
+def parse_list_html(content) -> Optional[List[Dict]]:
+    """Строки таблицы #search-result; None, если таблицы нет."""
+    root = _to_tree(content)
+    table = _first(_XP_RESULT_TABLE, root)
+    if table is None:
+        return None
+    tbody = _first(_XP_TBODY, table)
+    if tbody is None:
+        return None
+
+    data = []
+    for row in tbody.iter("tr"):
+        item = parse_list_row(row)
+        if item is not None:
+            data.append(item)
+    return data
+
+
+class ListRowStream:
+    """Инкрементальный парсер страницы-списка: feed(chunk) возвращает строки
+    #search-result, закрытые к этому моменту. Разобранные <tr> сразу удаляются
+    из дерева, поэтому таблица на 2000 строк целиком в памяти не держится."""
+
+    def __init__(self):
+        self._parser = etree.HTMLPullParser(events=("start", "end"), encoding="utf-8")
+        self._table = None
+        self._tbody = None
+        self._table_closed = False
+
+    @property
+    def found_table(self) -> bool:
+        return self._tbody is not None
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[Dict]:
+        rows = []
+        for event, el in self._parser.read_events():
+            if event == "start":
+                if el.tag == "table" and self._table is None and el.get("id") == "search-result":
+                    self._table = el
+                elif el.tag == "tbody" and self._tbody is None and self._inside_table():
+                    self._tbody = el
+                continue
+
+            if el is self._table:
+                self._table_closed = True
+            elif el.tag == "tr" and self._tbody is not None and el.getparent() is self._tbody:
+                etree.strip_elements(el, *_NON_TEXT_TAGS, with_tail=False)
+                item = parse_list_row(el)
+                if item is not None:
+                    rows.append(item)
+                el.clear()
+                while el.getprevious() is not None:
+                    del self._tbody[0]
+        return rows
+
+    def _inside_table(self) -> bool:
+        return self._table is not None and not self._table_closed
+
+
+# ------------------------- DETAIL PARSER -------------------------
+
+def parse_top_block(root) -> Dict:
+    out = {}
+    for fg in _XP_FORM_GROUPS(root):
+        label_tag = _first(_XP_LABEL, fg)
+        input_tag = _first(_XP_INPUT, fg)
+        if label_tag is None or input_tag is None:
+            continue
+        label = clean_text(_text(label_tag))
+        val = input_tag.get("value")
+        if label in TOP_FIELDS_MAP and val is not None:
+            out[TOP_FIELDS_MAP[label]] = clean_text(val)
+    return out
+
+
+def parse_panel_tables(root) -> Dict:
+    out = {}
+    for panel in _XP_PANELS(root):
+        heading_div = _first(_XP_PANEL_HEADING, panel)
+        if heading_div is None:
+            continue
+        heading = clean_text(_text(heading_div, " ", strip=True))
+
+        table = _first(_XP_TABLE, panel)
+        if table is None:
+            continue
+        prefix = panel_prefix(heading)
+
+        for tr in _XP_TR(table):
+            th = _first(_XP_TH, tr)
+            td = _first(_XP_TD, tr)
+            if th is None or td is None:
+                continue
+
+            key = clean_text(_text(th, " ", strip=True))
+            li_tags = _XP_LI(td)
+            if li_tags:
+                val = [
+                    clean_text(_text(li, " ", strip=True))
+                    for li in li_tags if clean_text(_text(li))
+                ]
+            else:
+                val = clean_text(_text(td, " ", strip=True))
+
+            if key in SKIPPED_PANEL_KEYS:
+                continue
+
+            out[f"{prefix}{key}"] = val
+    return out
+
+
+def parse_detail_html(html) -> Dict:
+    root = _to_tree(html)
+    detail = {}
+    detail.update(parse_top_block(root))
+    detail.update(parse_panel_tables(root))
+    return detail
+
+
+# ------------------------- TAB PARSER -------------------------
+
+def parse_tab_rows(root) -> List[Dict]:
+    for table in _XP_TABLES(root):
+        header, rows = None, []
+        for tr in _XP_TR(table):
+            ths = _XP_TH(tr)
+            tds = _XP_TD(tr)
+            if header is None:
+                if ths and not tds:
+                    header = [clean_text(_text(th, " ", strip=True)) for th in ths]
+                continue
+            if len(tds) != len(header):
+                continue
+
+            row = {key: clean_text(_text(td, " ", strip=True)) for key, td in zip(header, tds) if key}
+            links = [
+                urljoin(BASE_URL, a.get("href")) for a in _XP_A_HREF(tr)
+                if not a.get("href").startswith(("#", "javascript:"))
+            ]
+            if links:
+                row["Ссылки"] = links
+            rows.append(row)
+        if header is not None:
+            return rows
+    return []
+
+
+def parse_tab_html(html) -> List[Dict]:
+    return parse_tab_rows(_to_tree(html))
@@ -0,0 +1,149 @@
+"""Локальный кэш детальных страниц goszakup.
+
+Для каждого URL хранится сжатое тело (gzip), ETag/Last-Modified, sha256 тела
+и уже распарсенный результат. fetch_detail_page отправляет условный запрос и
+при 304 или совпадении хэша берёт детали из кэша без повторного парсинга.
+
+Кэш не растёт бесконечно: sweep() (в конце каждого прогона) удаляет записи,
+к которым давно не обращались, и самые давние сверх лимита размера.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+# увеличить при изменении логики парсинга деталей — старые результаты
+# будут перепарсены из сохранённого HTML без повторной загрузки
+PARSER_CACHE_VERSION = 1
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class PageCache:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def _base_path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, url: str) -> Optional[Dict]:
+        meta_path = self._base_path(url) + ".json"
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            # mtime метаданных — время последнего обращения для sweep()
+            os.utime(meta_path)
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def body(self, url: str) -> Optional[bytes]:
+        try:
+            with gzip.open(self._base_path(url) + ".html.gz", "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def conditional_headers(meta: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    @staticmethod
+    def cached_detail(meta: Optional[Dict]) -> Optional[Dict]:
+        if meta and meta.get("parser_version") == PARSER_CACHE_VERSION:
+            return meta.get("detail")
+        return None
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        encoding: str,
+        detail: Dict,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        base = self._base_path(url)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+
+        with gzip.open(base + ".html.gz.tmp", "wb", compresslevel=6) as f:
+            f.write(body)
+        os.replace(base + ".html.gz.tmp", base + ".html.gz")
+
+        self._write_meta(url, {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "sha256": body_hash(body),
+            "encoding": encoding,
+            "parser_version": PARSER_CACHE_VERSION,
+            "detail": detail,
+        })
+
+    def update(
+        self,
+        meta: Dict,
+        detail: Dict,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """Обновление метаданных без перезаписи тела (контент не менялся)."""
+        meta = {**meta, "parser_version": PARSER_CACHE_VERSION, "detail": detail}
+        if etag:
+            meta["etag"] = etag
+        if last_modified:
+            meta["last_modified"] = last_modified
+        self._write_meta(meta["url"], meta)
+
+    def sweep(self, max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None) -> Dict:
+        """Удаляет записи, к которым не обращались дольше max_age_seconds, затем
+        самые давние, пока кэш больше max_bytes. Возвращает итог для лога."""
+        entries: Dict[str, list] = {}
+        for dirpath, _, files in os.walk(self.cache_dir):
+            for name in files:
+                for suffix in (".json", ".html.gz"):
+                    if name.endswith(suffix):
+                        try:
+                            st = os.stat(os.path.join(dirpath, name))
+                        except OSError:
+                            continue
+                        entry = entries.setdefault(os.path.join(dirpath, name[:-len(suffix)]), [0.0, 0])
+                        entry[0] = max(entry[0], st.st_mtime)
+                        entry[1] += st.st_size
+
+        total = sum(size for _, size in entries.values())
+        now = time.time()
+        removed = freed = 0
+        # от самых давних: истёкшие идут первыми, дальше — пока не уложимся в лимит
+        for base, (used_at, size) in sorted(entries.items(), key=lambda kv: kv[1][0]):
+            expired = max_age_seconds is not None and now - used_at > max_age_seconds
+            if not expired and (max_bytes is None or total <= max_bytes):
+                break
+            for suffix in (".json", ".html.gz"):
+                try:
+                    os.remove(base + suffix)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            freed += size
+            removed += 1
+        return {"entries": len(entries) - removed, "bytes": total, "removed": removed, "freed_bytes": freed}
+
+    def _write_meta(self, url: str, meta: Dict):
+        base = self._base_path(url)
+        with open(base + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(base + ".json.tmp", base + ".json")
@@ -0,0 +1,45 @@
+"""Запись загруженных HTML-страниц в каталог фикстур (record mode).
+
+Включается переменной SCRAPE_RECORD_DIR. Структура каталога:
+    list/page<N>.html, detail/<id>.html      — goszakup
+    tabs/<tab>/<id>.html                     — goszakup, вкладки lots / documents
+    nadloc/list/page<N>.html, nadloc/detail/ — reestr.nadloc.kz
+    manifest.jsonl                           — URL -> файл, для bench.replay_server
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Optional
+from urllib.parse import urlsplit
+
+RECORD_DIR = os.getenv("SCRAPE_RECORD_DIR")
+
+
+def is_recording(record_dir: Optional[str] = None) -> bool:
+    return bool(record_dir or RECORD_DIR)
+
+
+def fixture_name(kind: str, url: str) -> str:
+    parts = urlsplit(url)
+    page = re.search(r"(?:^|&)page=(\d+)", parts.query)
+    if kind.endswith("list") and page:
+        return f"{kind}/page{page.group(1)}.html"
+    announce = re.search(r"/announce/index/(\d+)", parts.path)
+    if announce:
+        return f"{kind}/{announce.group(1)}.html"
+    return f"{kind}/{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}.html"
+
+
+def record_page(kind: str, url: str, body: bytes, record_dir: Optional[str] = None):
+    record_dir = record_dir or RECORD_DIR
+    if not record_dir:
+        return
+    name = fixture_name(kind, url)
+    path = os.path.join(record_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(body)
+    with open(os.path.join(record_dir, "manifest.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps({"url": url, "file": name}, ensure_ascii=False) + "\n")
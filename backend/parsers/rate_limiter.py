@@ -0,0 +1,166 @@
+"""Адаптивный ограничитель запросов к goszakup.
+
+AIMD по параллельности: каждое успешное «окно» запросов увеличивает лимит на 1,
+ответы 429/503/504 и таймауты уменьшают его вдвое (не чаще раза за cooldown).
+Рост лимита останавливается, если задержка заметно выросла относительно базовой.
+Поверх этого — token bucket по частоте запросов и общая пауза по Retry-After.
+"""
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+# статусы, по которым сайт явно просит сбавить темп
+THROTTLE_STATUSES = (429, 503, 504)
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After в секундах (число или HTTP-дата)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial_concurrency: int = 20,
+        min_concurrency: int = 2,
+        max_concurrency: int = 50,
+        rate_per_sec: float = 25.0,
+        burst: int = 10,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        cooldown_sec: float = 5.0,
+        max_retry_after_sec: float = 120.0,
+    ):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = float(max(min_concurrency, min(initial_concurrency, max_concurrency)))
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.cooldown_sec = cooldown_sec
+        self.max_retry_after_sec = max_retry_after_sec
+
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.error_rate = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.latency_min: Optional[float] = None
+
+        self._tokens = float(burst)
+        self._tokens_ts = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._loop = None
+        self._cond: Optional[asyncio.Condition] = None
+        self._bucket_lock: Optional[asyncio.Lock] = None
+
+    # ------------------------------------------------------------------
+
+    def _bind_loop(self):
+        # примитивы asyncio привязаны к циклу, а лимитер живёт между запусками парсера
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._cond = asyncio.Condition()
+            self._bucket_lock = asyncio.Lock()
+            self.in_flight = 0
+
+    async def _take_token(self):
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._tokens_ts) * self.rate_per_sec)
+                self._tokens_ts = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_sec)
+
+    async def acquire(self):
+        self._bind_loop()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        try:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await self._take_token()
+        except BaseException:
+            await self._release_slot()
+            raise
+
+    async def _release_slot(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    async def release(
+        self,
+        status: Optional[int],
+        latency: float,
+        retry_after: Optional[float] = None,
+    ):
+        """status=None — сетевая ошибка или таймаут."""
+        self.record(status, latency, retry_after)
+        await self._release_slot()
+
+    async def abandon(self):
+        """Освобождает слот без учёта в статистике: запрос отменил сам вызывающий."""
+        await self._release_slot()
+
+    def record(self, status: Optional[int], latency: float, retry_after: Optional[float] = None):
+        self.requests += 1
+        is_error = status is None or status in RETRYABLE_STATUSES
+        self.errors += int(is_error)
+        self.error_rate = 0.9 * self.error_rate + 0.1 * float(is_error)
+
+        if status is None or status in THROTTLE_STATUSES:
+            self.throttled += int(status is not None)
+            self._decrease()
+            if retry_after:
+                pause = min(retry_after, self.max_retry_after_sec)
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            return
+        if is_error:
+            return
+
+        # базовая задержка медленно «всплывает», чтобы один быстрый ответ не зафиксировал её навсегда
+        self.latency_min = latency if self.latency_min is None else min(latency, self.latency_min * 1.01)
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+        if self.latency_ewma <= self.latency_min * self.latency_tolerance:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown_sec:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+
+    def snapshot(self) -> Dict:
+        return {
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "rate_per_sec": self.rate_per_sec,
+            "requests": self.requests,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "error_rate": round(self.error_rate, 4),
+            "latency_ewma_sec": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "paused_for_sec": round(max(0.0, self._paused_until - time.monotonic()), 1),
+        }
@@ -0,0 +1,185 @@
+"""Журнал прогонов парсера (SQLite) для чекпоинтов и возобновления.
+
+Записывает обработанные страницы-списки (вместе со строками), незагруженные
+страницы-списки и результат detail-запроса по каждому тендеру, включая ошибки. Незавершённый прогон (рестарт пода)
+продолжается с места остановки, а тендеры с ошибкой повторяются в следующих
+прогонах, пока не исчерпают MAX_DETAIL_ATTEMPTS.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Set
+
+MAX_DETAIL_ATTEMPTS = int(os.getenv("SCRAPE_MAX_DETAIL_ATTEMPTS", 5))
+KEEP_RUNS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS list_pages (
+    run_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    rows_json TEXT NOT NULL,
+    PRIMARY KEY (run_id, page)
+);
+CREATE TABLE IF NOT EXISTS failed_list_pages (
+    run_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    PRIMARY KEY (run_id, page)
+);
+CREATE TABLE IF NOT EXISTS details (
+    run_id INTEGER NOT NULL,
+    tender_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    row_json TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, tender_id)
+);
+"""
+
+
+class ScrapeJournal:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.run_id: Optional[int] = None
+        self.resumed = False
+
+    def start(self) -> int:
+        """Продолжает последний незавершённый прогон или начинает новый."""
+        row = self.conn.execute(
+            "SELECT id FROM runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        if row:
+            self.run_id, self.resumed = row[0], True
+        else:
+            cur = self.conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+            self.run_id, self.resumed = cur.lastrowid, False
+            self.conn.commit()
+        return self.run_id
+
+    # ------------------------- LIST PAGES -------------------------
+
+    def page_rows(self, page: int) -> Optional[List[Dict]]:
+        row = self.conn.execute(
+            "SELECT rows_json FROM list_pages WHERE run_id = ? AND page = ?",
+            (self.run_id, page),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record_page(self, page: int, rows: List[Dict]):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO list_pages (run_id, page, rows_json) VALUES (?, ?, ?)",
+            (self.run_id, page, json.dumps(rows, ensure_ascii=False)),
+        )
+        self.conn.execute("DELETE FROM failed_list_pages WHERE run_id = ? AND page = ?", (self.run_id, page))
+        self.conn.commit()
+
+    def record_page_failure(self, page: int):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO failed_list_pages (run_id, page) VALUES (?, ?)", (self.run_id, page)
+        )
+        self.conn.commit()
+
+    def failed_pages(self) -> Set[int]:
+        """Страницы-списки прогона, которые так и не удалось загрузить."""
+        rows = self.conn.execute("SELECT page FROM failed_list_pages WHERE run_id = ?", (self.run_id,))
+        return {r[0] for r in rows}
+
+    # ------------------------- DETAILS -------------------------
+
+    def done_ids(self) -> Set[str]:
+        rows = self.conn.execute(
+            "SELECT tender_id FROM details WHERE run_id = ? AND status = 'done'",
+            (self.run_id,),
+        )
+        return {r[0] for r in rows}
+
+    def retryable_failures(self) -> List[Dict]:
+        """Строки тендеров, чей последний detail-запрос (в любом прогоне) упал."""
+        rows = self.conn.execute(
+            """
+            SELECT d.row_json FROM details d
+            JOIN (SELECT tender_id, MAX(run_id) AS run_id FROM details GROUP BY tender_id) last
+              ON last.tender_id = d.tender_id AND last.run_id = d.run_id
+            WHERE d.status = 'failed' AND d.attempts < ?
+            """,
+            (MAX_DETAIL_ATTEMPTS,),
+        )
+        return [json.loads(r[0]) for r in rows]
+
+    def attempts(self, tender_id: str) -> int:
+        """Число неудачных detail-запросов подряд — по последней записи тендера."""
+        row = self.conn.execute(
+            "SELECT status, attempts FROM details WHERE tender_id = ? ORDER BY run_id DESC LIMIT 1",
+            (tender_id,),
+        ).fetchone()
+        return row[1] if row and row[0] == "failed" else 0
+
+    def record_detail(self, row: Dict, ok: bool) -> int:
+        """Возвращает число неудач подряд с учётом текущей; успех сбрасывает счётчик в 0.
+        Строка без ID не журналируется (иначе все такие строки слились бы в ключ "None")."""
+        if not row.get("ID"):
+            return 0
+        tender_id = str(row.get("ID"))
+        attempts = 0 if ok else self.attempts(tender_id) + 1
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO details
+                (run_id, tender_id, status, attempts, row_json, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                self.run_id,
+                tender_id,
+                "done" if ok else "failed",
+                attempts,
+                json.dumps(row, ensure_ascii=False),
+                time.time(),
+            ),
+        )
+        self.conn.commit()
+        return attempts
+
+    # ------------------------------------------------------------------
+
+    def finish(self) -> Dict:
+        failed = self.conn.execute(
+            "SELECT COUNT(*) FROM details WHERE run_id = ? AND status = 'failed'",
+            (self.run_id,),
+        ).fetchone()[0]
+        self.conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), self.run_id))
+        self._prune()
+        self.conn.commit()
+        return {"run_id": self.run_id, "resumed": self.resumed, "failed_details": failed}
+
+    def _prune(self):
+        old = "SELECT id FROM runs WHERE id <= ?"
+        cutoff = self.run_id - KEEP_RUNS
+        self.conn.execute(f"DELETE FROM list_pages WHERE run_id IN ({old})", (cutoff,))
+        self.conn.execute(f"DELETE FROM failed_list_pages WHERE run_id IN ({old})", (cutoff,))
+        # последние ошибки по тендерам нужны retryable_failures — их оставляем
+        self.conn.execute(
+            f"""
+            DELETE FROM details
+            WHERE run_id IN ({old})
+              AND NOT (
+                status = 'failed' AND attempts < ?
+                AND run_id = (SELECT MAX(d2.run_id) FROM details d2 WHERE d2.tender_id = details.tender_id)
+              )
+            """,
+            (cutoff, MAX_DETAIL_ATTEMPTS),
+        )
+        self.conn.execute(f"DELETE FROM runs WHERE id IN ({old})", (cutoff,))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,74 @@
+"""Состояние инкрементального парсинга goszakup (high-water mark).
+
+Хранит отпечатки строк списка для уже обработанных тендеров и самый новый
+увиденный тендер. По нему scrape_tenders_sync останавливает пагинацию, как только
+страница целиком известна, и запрашивает детали только для новых/изменённых строк.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+MAX_TRACKED_IDS = 100_000
+
+
+def row_fingerprint(row: Dict) -> str:
+    payload = json.dumps(row, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _id_number(tender_id: str) -> int:
+    head = str(tender_id).split("-", 1)[0]
+    return int(head) if head.isdigit() else -1
+
+
+class ScrapeState:
+    def __init__(self, path: str):
+        self.path = path
+        self.seen: Dict[str, str] = {}
+        self.high_water: Dict[str, Optional[str]] = {"id": None, "published": None}
+
+    @classmethod
+    def load(cls, path: str) -> "ScrapeState":
+        state = cls(path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            state.seen = data.get("seen", {})
+            state.high_water.update(data.get("high_water", {}))
+        return state
+
+    def is_known(self, row: Dict) -> bool:
+        tender_id = row.get("ID")
+        return bool(tender_id) and self.seen.get(tender_id) == row_fingerprint(row)
+
+    def mark(self, row: Dict, record: Dict):
+        """row — строка списка (для отпечатка), record — обогащённая запись."""
+        tender_id = row.get("ID")
+        if not tender_id:
+            return
+        # переносим в конец, чтобы при обрезке выкидывались самые старые
+        self.seen.pop(tender_id, None)
+        self.seen[tender_id] = row_fingerprint(row)
+
+        current = self.high_water.get("id")
+        if current is None or _id_number(tender_id) > _id_number(current):
+            self.high_water = {
+                "id": tender_id,
+                "published": record.get("Детали_Дата публикации"),
+            }
+
+    def save(self):
+        if len(self.seen) > MAX_TRACKED_IDS:
+            self.seen = dict(list(self.seen.items())[-MAX_TRACKED_IDS:])
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"seen": self.seen, "high_water": self.high_water},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.path)
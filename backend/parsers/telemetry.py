@@ -0,0 +1,163 @@
+"""Метрики парсера: гистограммы задержек загрузки/парсинга, байты, ретраи, in-flight.
+
+Все обновления идут из цикла событий, поэтому блокировки не нужны.
+SCRAPER_TELEMETRY хранит накопленные с запуска процесса значения и
+отдельно — значения последнего прогона (scrape_tenders вызывает begin_run).
+Отдаются через GET /api/metrics и в результате refresh_tenders_once.
+"""
+
+import bisect
+import contextlib
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+# верхние границы бакетов, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 60)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последний — +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля линейной интерполяцией внутри бакета."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / c)
+            seen += c
+        return self.max
+
+    def snapshot(self) -> Dict:
+        def r(x):
+            return round(x, 4) if x is not None else None
+
+        return {
+            "count": self.count,
+            "sum_sec": r(self.sum),
+            "avg_sec": r(self.sum / self.count) if self.count else None,
+            "p50_sec": r(self.quantile(0.5)),
+            "p90_sec": r(self.quantile(0.9)),
+            "p99_sec": r(self.quantile(0.99)),
+            "max_sec": r(self.max),
+            "buckets": {
+                **{str(le): c for le, c in zip(self.buckets, self.counts)},
+                "+Inf": self.counts[-1],
+            },
+        }
+
+
+class MetricSet:
+    """Метрики с разбивкой по виду страницы: list, detail:<tab>."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.fetch_seconds = defaultdict(Histogram)
+        self.parse_seconds = defaultdict(Histogram)
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+        self.bytes_downloaded: Dict[str, int] = defaultdict(int)
+        self.responses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.retries: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.cache_hits: Dict[str, int] = defaultdict(int)
+
+    def snapshot(self) -> Dict:
+        return {
+            "started_at": self.started_at,
+            "fetch_seconds": {k: h.snapshot() for k, h in self.fetch_seconds.items()},
+            "parse_seconds": {k: h.snapshot() for k, h in self.parse_seconds.items()},
+            "stage_seconds": {k: round(v, 3) for k, v in self.stage_seconds.items()},
+            "bytes_downloaded": dict(self.bytes_downloaded),
+            "responses_by_status": {k: dict(v) for k, v in self.responses.items()},
+            "retries_by_status": {k: dict(v) for k, v in self.retries.items()},
+            "failures": dict(self.failures),
+            "cache_hits": dict(self.cache_hits),
+        }
+
+
+class ScraperTelemetry:
+    def __init__(self):
+        self.total = MetricSet()
+        self.last_run = MetricSet()
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.parse_queue_depth = 0
+
+    def _sets(self):
+        return (self.total, self.last_run)
+
+    def begin_run(self):
+        self.last_run = MetricSet()
+
+    def fetch_started(self, kind: str):
+        self.in_flight[kind] += 1
+
+    def fetch_cancelled(self, kind: str):
+        self.in_flight[kind] -= 1
+
+    def fetch_finished(self, kind: str, seconds: float, status, nbytes: int = 0):
+        """status — HTTP-код или имя класса исключения для сетевых ошибок."""
+        self.in_flight[kind] -= 1
+        for m in self._sets():
+            m.fetch_seconds[kind].observe(seconds)
+            m.bytes_downloaded[kind] += nbytes
+            m.responses[kind][str(status)] += 1
+
+    def observe_parse(self, kind: str, seconds: float):
+        for m in self._sets():
+            m.parse_seconds[kind].observe(seconds)
+
+    def count_retry(self, kind: str, status):
+        for m in self._sets():
+            m.retries[kind][str(status)] += 1
+
+    def count_failure(self, kind: str):
+        for m in self._sets():
+            m.failures[kind] += 1
+
+    def count_cache_hit(self, kind: str):
+        for m in self._sets():
+            m.cache_hits[kind] += 1
+
+    def add_stage_time(self, stage: str, seconds: float):
+        for m in self._sets():
+            m.stage_seconds[stage] += seconds
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.monotonic() - started)
+
+    def gauges(self) -> Dict:
+        return {
+            "in_flight": {k: v for k, v in self.in_flight.items() if v},
+            "parse_queue_depth": self.parse_queue_depth,
+        }
+
+    def snapshot(self) -> Dict:
+        return {
+            "gauges": self.gauges(),
+            "last_run": self.last_run.snapshot(),
+            "total": self.total.snapshot(),
+        }
+
+
+SCRAPER_TELEMETRY = ScraperTelemetry()
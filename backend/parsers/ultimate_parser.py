@@ -0,0 +1,916 @@
+"""
+ФИНАЛЬНЫЙ ПАРСЕР ТЕНДЕРОВ REESTR.NADLOC.KZ
+Создает ТРИ файла (CSV или Parquet, NADLOC_OUTPUT_FORMAT), строки дописываются по мере готовности:
+1. tenders_list.csv - список тендеров из таблицы реестра
+2. completed_tenders.csv - детали ЗАВЕРШЕННЫХ тендеров (протоколы)
+3. published_tenders.csv - детали ОПУБЛИКОВАННЫХ тендеров (объявления)
+
+Второй источник ingest (services/tender_sources.py): без файлов, каждый
+тендер отдаётся в on_tender по мере готовности.
+
+    cd backend && python -m parsers.ultimate_parser [--end-page N]
+"""
+
+import aiohttp
+import argparse
+import asyncio
+import csv
+import os
+from bs4 import BeautifulSoup
+from datetime import datetime
+import ssl
+import time
+from typing import List, Dict, Optional, Sequence
+import logging
+import re
+from collections import defaultdict
+from urllib.parse import urljoin
+
+from parsers.rate_limiter import RETRYABLE_STATUSES, AdaptiveLimiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+NADLOC_BASE_URL = os.getenv("NADLOC_BASE_URL", "https://www.reestr.nadloc.kz")
+# соединения с reestr.nadloc.kz и параллельные detail-запросы — свои, не из лимитов goszakup
+NADLOC_CONNECTIONS_PER_HOST = int(os.getenv("NADLOC_CONNECTIONS_PER_HOST", 5))
+NADLOC_DETAIL_CONCURRENCY = int(os.getenv("NADLOC_DETAIL_CONCURRENCY", 3))
+NADLOC_LIST_CONCURRENCY = int(os.getenv("NADLOC_LIST_CONCURRENCY", 2))
+
+# Бюджет вежливости на хост: все запросы (список и детали) проходят через один
+# лимитер — частота, параллельность (AIMD) и пауза по Retry-After.
+NADLOC_LIMITER = AdaptiveLimiter(
+    initial_concurrency=NADLOC_CONNECTIONS_PER_HOST,
+    min_concurrency=1,
+    max_concurrency=NADLOC_CONNECTIONS_PER_HOST,
+    rate_per_sec=float(os.getenv("NADLOC_RATE_PER_SEC", 10)),
+    burst=5,
+)
+
+_RE_PAGE_PARAM = re.compile(r'[?&;]page=(\d+)')
+
+
+# =========================================================================
+# ИНДЕКСЫ СТРАНИЦЫ: РАЗДЕЛЫ ТЕКСТА И ТАБЛИЦЫ
+# =========================================================================
+
+class LabelScanner:
+    """Одна регулярка-альтернатива по всем меткам (заголовкам разделов) страницы.
+
+    Метки не пересекаются и не являются префиксами друг друга, поэтому в одной
+    позиции совпадает не больше одной. Именованные группы не используются:
+    с ними re теряет быстрый поиск и проход становится в разы медленнее."""
+
+    def __init__(self, labels: Dict[str, str]):
+        self.labels = [(name, re.compile(label)) for name, label in labels.items()]
+        self.pattern = re.compile('|'.join(labels.values()))
+
+    def label_of(self, matched: str) -> Optional[str]:
+        for name, label in self.labels:
+            if label.fullmatch(matched):
+                return name
+        return None
+
+
+class LabelIndex:
+    """Позиции всех меток в тексте за один проход.
+
+    Каждый шаблон поля начинается со своей метки, поэтому search(label, pattern)
+    проверяет pattern.match только в позициях метки — результат тот же,
+    что у pattern.search(text), без повторного сканирования всего текста."""
+
+    def __init__(self, scanner: LabelScanner, text: str):
+        self.text = text
+        self.positions = defaultdict(list)
+        for m in scanner.pattern.finditer(text):
+            self.positions[scanner.label_of(m.group())].append(m.start())
+
+    def search(self, label: str, pattern: re.Pattern) -> Optional[re.Match]:
+        for pos in self.positions.get(label, ()):
+            match = pattern.match(self.text, pos)
+            if match:
+                return match
+        return None
+
+
+class TableIndex:
+    """Таблицы страницы с их текстом. Дерево обходится лениво (в том же порядке,
+    что find_all('table')) и только до первой подходящей таблицы;
+    get_text() считается один раз на таблицу."""
+
+    def __init__(self, soup):
+        self._pending = (el for el in soup.descendants if el.name == 'table')
+        self._seen = []
+
+    def _tables(self):
+        yield from self._seen
+        for table in self._pending:
+            self._seen.append((table, table.get_text()))
+            yield self._seen[-1]
+
+    def first(self, predicate):
+        for table, text in self._tables():
+            if predicate(text):
+                return table
+        return None
+
+
+_COMPLETED_SCANNER = LabelScanner({
+    'customer': r'1\.\s*Наименование заказчика',
+    'location': r'2\.\s*Местонахождение заказчика',
+    'basis': r'3\.\s*Основание для закупа',
+    'lots': r'4\.\s*Предмет приобретения',
+    'licenses': r'5\.\s*Номера лицензии',
+    'suppliers': r'6\.\s*Наименование поставщика',
+    'prices': r'7\.\s*Цена, предложенная',
+    'code': r'8\.\s*Код закупки',
+    'signer': r'Имя подписавшего:',
+    'signed': r'Дата подписи:',
+})
+_RE_C_CUSTOMER = re.compile(r'1\.\s*Наименование заказчика[:\s]*(.*?)(?=\n2\.|\n\n)', re.DOTALL)
+_RE_C_LOCATION = re.compile(r'2\.\s*Местонахождение заказчика[:\s]*(.*?)(?=\n3\.|\n\n)', re.DOTALL)
+_RE_C_BASIS = re.compile(r'3\.\s*Основание для закупа.*?:(.*?)(?=\n4\.|\n\n)', re.DOTALL)
+_RE_C_LOTS = re.compile(r'4\.\s*Предмет приобретения.*?(?=5\.|$)', re.DOTALL)
+_RE_C_LOT = re.compile(r'Номер и наименование лота:\s*(\d+),\s*(.*?)\s*Сумма.*?(\d[\d\s,.]+)\s*тенге', re.DOTALL)
+_RE_C_LICENSES = re.compile(r'5\.\s*Номера лицензии.*?:(.*?)(?=6\.|$)', re.DOTALL)
+_RE_C_LICENSE = re.compile(r'Лицензия\(контракт\)\s*№\s*(\d+)\s*от\s*([\d.]+)')
+_RE_C_SUPPLIERS = re.compile(r'6\.\s*Наименование поставщика.*?(?=7\.|$)', re.DOTALL)
+_RE_C_PRICES = re.compile(r'7\.\s*Цена, предложенная.*?(?=8\.|$)', re.DOTALL)
+_RE_C_CODE = re.compile(r'8\.\s*Код закупки[:\s]*([A-Z]+[\w\.\-]+)')
+_RE_C_SIGNER = re.compile(r'Имя подписавшего:\s*([^\n]+)')
+_RE_SIGNED_DATE = re.compile(r'Дата подписи:\s*(\d{2}\.\d{2}\.\d{4}\s+\d{2}:\d{2}:\d{2})')
+
+_PUBLISHED_SCANNER = LabelScanner({
+    'customer': r'1\.\s*Наименование заказчика',
+    'web': r'Адрес интернет ресурса',
+    'location': r'Местонахождение заказчика',
+    'start': r'Дата и время начала',
+    'end': r'Дата и время окончания',
+    'opening': r'Дата и время вскрытия',
+    'email': r'Адрес электронной почты',
+    'phone': r'Номер контактного телефона',
+    'local': r'Требования по местному содержанию',
+    'deadline': r'Требуемый срок заключения договора',
+    'signer': r'Имя подписавшего:',
+    'signed': r'Дата подписи:',
+})
+_RE_P_CUSTOMER = re.compile(r'1\.\s*Наименование заказчика.*?\n(.*?)(?=\t|$)', re.MULTILINE)
+_RE_P_WEB = re.compile(r'Адрес интернет ресурса\s*(https?://[\w\.\-/]+)')
+_RE_P_LOCATION = re.compile(r'Местонахождение заказчика.*?\n(.*?)(?=\n2\.|\n\n)', re.DOTALL)
+_RE_P_START = re.compile(r'Дата и время начала.*?\n([\d\.\s:]+)')
+_RE_P_END = re.compile(r'Дата и время окончания.*?\n([\d\.\s:]+)')
+_RE_P_OPENING = re.compile(r'Дата и время вскрытия.*?\n([\d\.\s:]+)')
+_RE_P_EMAIL = re.compile(r'Адрес электронной почты.*?\n([\w\.\-@]+)')
+_RE_P_PHONE = re.compile(r'Номер контактного телефона.*?\n([\d\s\+\(\)]+)')
+_RE_P_LOCAL = re.compile(r'Требования по местному содержанию.*?\n([\d\s%]+)')
+_RE_P_DEADLINE = re.compile(r'Требуемый срок заключения договора.*?\n(.*?)(?=\t|\n)')
+_RE_P_SIGNER = re.compile(r'Имя подписавшего:\s*([^\t\n]+)')
+
+
+# =========================================================================
+# ПОТОКОВАЯ ЗАПИСЬ РЕЗУЛЬТАТОВ
+# =========================================================================
+
+OUTPUT_FORMAT = os.getenv("NADLOC_OUTPUT_FORMAT", "csv")  # csv | parquet
+OUTPUT_FORMATS = ("csv", "parquet")
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("NADLOC_PARQUET_ROW_GROUP_SIZE", 1000))
+# сколько detail-задач может ждать своей очереди, прежде чем список притормозит
+DETAIL_BACKLOG = int(os.getenv("NADLOC_DETAIL_BACKLOG", 100))
+
+# Схемы объявлены заранее: строки пишутся по мере готовности, без объединения
+# ключей по всем записям в конце.
+LIST_FIELDS = ['code', 'description', 'customer', 'lots', 'planned_amount',
+               'purchase_amount', 'method', 'status', 'dates', 'detail_link']
+
+COMPLETED_FIELDS = ['tender_code', 'customer_name', 'customer_location', 'purchase_basis',
+                    'lots_description', 'total_lots', 'skp_items', 'licenses',
+                    'winner_supplier', 'winner_address', 'winner_price', 'local_content',
+                    'suppliers', 'all_prices', 'purchase_code', 'signed_by', 'signed_date',
+                    'detail_link']
+
+PUBLISHED_FIELDS = ['tender_code', 'customer_name', 'customer_location', 'web_resource',
+                    'purchase_items', 'total_items', 'submission_start', 'submission_end',
+                    'opening_date', 'contact_email', 'contact_phone',
+                    'local_content_requirement', 'contract_deadline',
+                    'signed_by', 'signed_date', 'detail_link']
+
+INT_FIELDS = {'total_lots', 'total_items'}
+
+
+class TenderRowWriter:
+    """Дозаписывает строки в CSV (flush после каждой строки) или Parquet
+    (row group на каждые row_group_size строк). Ключи вне схемы отбрасываются."""
+
+    def __init__(self, path: str, fieldnames: Sequence[str], fmt: str = OUTPUT_FORMAT,
+                 row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Неизвестный формат: {fmt!r}, доступны: {OUTPUT_FORMATS}")
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._buffer = []
+
+        if fmt == "parquet":
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise RuntimeError("Для NADLOC_OUTPUT_FORMAT=parquet нужен pyarrow (pip install pyarrow)")
+            self._pa = pa
+            self._schema = pa.schema([
+                (name, pa.int64() if name in INT_FIELDS else pa.string())
+                for name in self.fieldnames
+            ])
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._file = open(path, 'w', newline='', encoding='utf-8-sig')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+            self._writer.writeheader()
+            self._file.flush()
+
+    def write(self, row: Dict):
+        self.count += 1
+        if self.fmt == "csv":
+            self._writer.writerow(row)
+            self._file.flush()
+            return
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush_row_group()
+
+    def _flush_row_group(self):
+        if not self._buffer:
+            return
+        columns = {}
+        for name in self.fieldnames:
+            values = [row.get(name) for row in self._buffer]
+            if name not in INT_FIELDS:
+                values = [None if v is None else str(v) for v in values]
+            columns[name] = values
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        self._buffer = []
+
+    def close(self):
+        if self.fmt == "parquet":
+            self._flush_row_group()
+            self._writer.close()
+        else:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class AdvancedTenderParser:
+    """Продвинутый парсер с автоопределением типа тендера"""
+
+    def __init__(self, base_url: str = NADLOC_BASE_URL,
+                 output_dir: Optional[str] = ".", output_format: str = OUTPUT_FORMAT,
+                 keep_in_memory: bool = True, on_tender=None, parse_executor=None):
+        """output_dir=None — ничего не писать на диск; keep_in_memory=False —
+        не копить результаты в списках (постоянная память на любом диапазоне страниц).
+        on_tender — `await on_tender(tender, result)` для каждой строки списка
+        после загрузки деталей; parse_executor — пул для разбора детальных страниц
+        (None — разбор в цикле событий)."""
+        self.base_url = base_url
+        self.session = None
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.keep_in_memory = keep_in_memory
+        self.on_tender = on_tender
+        self.parse_executor = parse_executor
+        self.tenders_list = []
+        self.completed_tenders = []  # Завершенные
+        self.published_tenders = []  # Опубликованные
+        self.counts = {'list': 0, 'completed': 0, 'published': 0}
+        self.failed_pages: List[int] = []  # страницы списка, не загруженные после повторов
+        self.last_page = 0  # из пагинации загруженных страниц списка
+        self.writers: Dict[str, TenderRowWriter] = {}
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
+        }
+
+    async def __aenter__(self):
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+
+        connector = aiohttp.TCPConnector(ssl=ssl_context, limit_per_host=NADLOC_CONNECTIONS_PER_HOST)
+        timeout = aiohttp.ClientTimeout(total=60)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=timeout
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.session:
+            await self.session.close()
+            await asyncio.sleep(0.25)
+
+    async def fetch_page(self, url: str, retry: int = 3) -> Optional[str]:
+        """Получение HTML страницы (в пределах бюджета NADLOC_LIMITER)"""
+        for attempt in range(retry):
+            await NADLOC_LIMITER.acquire()
+            status = None
+            retry_after = None
+            html = None
+            started = time.monotonic()
+            try:
+                async with self.session.get(url) as response:
+                    if response.status == 200:
+                        html = await response.text()
+                    else:
+                        logger.warning(f"Статус {response.status} для {url}")
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    # статус — только когда тело прочитано; обрыв тела — сетевая ошибка (None)
+                    status = response.status
+            except asyncio.CancelledError:
+                await NADLOC_LIMITER.abandon()
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка при загрузке {url}: {e}")
+            await NADLOC_LIMITER.release(status, time.monotonic() - started, retry_after)
+
+            if html is not None:
+                return html
+            if attempt < retry - 1 and (status is None or status in RETRYABLE_STATUSES):
+                await asyncio.sleep(retry_after or 2 ** attempt)
+        return None
+
+    # =========================================================================
+    # ПАРСИНГ СПИСКА ТЕНДЕРОВ
+    # =========================================================================
+
+    def parse_tender_list_table(self, html: str) -> List[Dict]:
+        """Парсинг основной таблицы"""
+        soup = BeautifulSoup(html, 'html.parser')
+        tenders = []
+
+        table = soup.find('table')
+        if not table:
+            return []
+
+        rows = table.find_all('tr')[1:]
+        logger.info(f"Найдено {len(rows)} строк")
+
+        for idx, row in enumerate(rows, 1):
+            try:
+                tender = self.parse_tender_row(row)
+                if tender:
+                    tenders.append(tender)
+                    logger.info(f"  ✓ [{idx}] {tender.get('code', 'N/A')[:50]}")
+            except Exception as e:
+                logger.error(f"  ✗ Ошибка строки {idx}: {e}")
+
+        return tenders
+
+    def parse_tender_row(self, row) -> Optional[Dict]:
+        """Парсинг строки таблицы"""
+        cells = row.find_all('td')
+        if len(cells) < 7:
+            return None
+
+        tender = {}
+
+        try:
+            code_cell = cells[0]
+            link = code_cell.find('a', href=True)
+            if link:
+                tender['code'] = link.get_text(strip=True)
+                tender['detail_link'] = urljoin(self.base_url, link['href'])
+                tender['description'] = code_cell.get_text(strip=True).replace(tender['code'], '').strip()
+            else:
+                tender['code'] = code_cell.get_text(strip=True)
+                tender['detail_link'] = None
+
+            tender['customer'] = cells[1].get_text(strip=True)
+            tender['lots'] = cells[2].get_text(strip=True)
+            tender['planned_amount'] = cells[3].get_text(strip=True) or '-'
+            tender['purchase_amount'] = cells[4].get_text(strip=True)
+            tender['method'] = cells[5].get_text(strip=True)
+
+            status_cell = cells[6]
+            tender['status'] = status_cell.get_text(strip=True)
+
+            if len(cells) >= 8:
+                tender['dates'] = cells[7].get_text(strip=True)
+
+            return tender
+        except Exception as e:
+            logger.error(f"Ошибка парсинга строки: {e}")
+            return None
+
+    async def parse_page_list(self, page_num: int) -> Optional[List[Dict]]:
+        """Парсинг страницы списка; None — страницу не удалось загрузить, [] — строк нет"""
+        url = f"{self.base_url}/ru/tender/list?page={page_num}"
+        logger.info(f"\n{'=' * 70}")
+        logger.info(f"СТРАНИЦА {page_num}: {url}")
+        logger.info(f"{'=' * 70}")
+
+        html = await self.fetch_page(url)
+        if html is None:
+            return None
+
+        self.last_page = max(self.last_page, self.find_last_page(html))
+        tenders = self.parse_tender_list_table(html)
+        logger.info(f"✓ Получено {len(tenders)} тендеров")
+
+        return tenders
+
+    @staticmethod
+    def find_last_page(html: str) -> int:
+        """Наибольший номер страницы в ссылках пагинации (0 — пагинации нет)"""
+        return max((int(n) for n in _RE_PAGE_PARAM.findall(html)), default=0)
+
+    # =========================================================================
+    # ОПРЕДЕЛЕНИЕ ТИПА ТЕНДЕРА И ПАРСИНГ
+    # =========================================================================
+
+    async def parse_tender_detail(self, tender: Dict) -> Dict:
+        """Парсинг детальной информации с определением типа"""
+        detail_link = tender.get('detail_link')
+        if not detail_link:
+            return {}
+
+        tender_code = tender.get('code', 'N/A')
+        logger.info(f"  → {tender_code[:50]}")
+
+        html = await self.fetch_page(detail_link)
+        if not html:
+            return {}
+
+        if self.parse_executor is None:
+            return self.parse_detail_html(html, tender_code, detail_link)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, parse_detail_html, html, tender_code, detail_link)
+
+    def parse_detail_html(self, html: str, tender_code: str, detail_link: str) -> Dict:
+        """Определение типа и разбор загруженной детальной страницы"""
+        soup = BeautifulSoup(html, 'html.parser')
+        text = soup.get_text()
+
+        # Определяем тип тендера
+        is_completed = any(x in text for x in [
+            'Протокол подведения итогов',
+            'способом из одного источника',
+            'Предмет приобретения ТРУ способом'
+        ])
+
+        is_published = any(x in text for x in [
+            'Время начала и окончания представления',
+            'Дата и время вскрытия',
+            'Предмет закупа способом через систему'
+        ])
+
+        if is_completed:
+            logger.info(f"    ℹ️ Тип: ЗАВЕРШЕННЫЙ")
+            detail = self.parse_completed_tender(soup, text, tender_code, detail_link)
+            return {'type': 'completed', 'data': detail}
+        elif is_published:
+            logger.info(f"    ℹ️ Тип: ОПУБЛИКОВАННЫЙ")
+            detail = self.parse_published_tender(soup, text, tender_code, detail_link)
+            return {'type': 'published', 'data': detail}
+        else:
+            logger.warning(f"    ⚠️ Неизвестный тип")
+            return {'type': 'unknown', 'data': {}}
+
+    # =========================================================================
+    # ПАРСИНГ ЗАВЕРШЕННЫХ ТЕНДЕРОВ
+    # =========================================================================
+
+    def parse_completed_tender(self, soup, text: str, tender_code: str, link: str) -> Dict:
+        """Детальный парсинг ЗАВЕРШЕННОГО тендера"""
+        detail = {
+            'tender_code': tender_code,
+            'detail_link': link
+        }
+
+        try:
+            sections = LabelIndex(_COMPLETED_SCANNER, text)
+            tables = TableIndex(soup)
+
+            # 1. Наименование заказчика
+            match = sections.search('customer', _RE_C_CUSTOMER)
+            if match:
+                detail['customer_name'] = match.group(1).strip()
+
+            # 2. Местонахождение
+            match = sections.search('location', _RE_C_LOCATION)
+            if match:
+                detail['customer_location'] = match.group(1).strip()[:500]
+
+            # 3. Основание для закупа
+            match = sections.search('basis', _RE_C_BASIS)
+            if match:
+                detail['purchase_basis'] = match.group(1).strip()[:1000]
+
+            # 4. Предмет приобретения - может быть несколько лотов
+            lots_section = sections.search('lots', _RE_C_LOTS)
+            if lots_section:
+                lots_text = lots_section.group(0)
+
+                # Извлекаем все лоты
+                lot_patterns = _RE_C_LOT.findall(lots_text)
+
+                if lot_patterns:
+                    lots_info = []
+                    for lot_num, lot_name, lot_sum in lot_patterns:
+                        lots_info.append(f"Лот {lot_num}: {lot_name.strip()} - {lot_sum.strip()} тг")
+                    detail['lots_description'] = ' | '.join(lots_info)
+                    detail['total_lots'] = len(lot_patterns)
+
+                # Извлекаем позиции СКП
+                skp_items = []
+                table = tables.first(lambda t: 'Код СКП' in t)
+                if table is not None:
+                    rows = table.find_all('tr')[1:]
+                    for row in rows[:10]:  # Первые 10 позиций
+                        cells = row.find_all('td')
+                        if len(cells) >= 4:
+                            code = cells[0].get_text(strip=True)
+                            descr = cells[1].get_text(strip=True)[:100]
+                            unit = cells[2].get_text(strip=True)
+                            qty = cells[3].get_text(strip=True)
+                            skp_items.append(f"{code}|{descr}|{unit}|{qty}")
+
+                if skp_items:
+                    detail['skp_items'] = ' || '.join(skp_items)
+
+            # 5. Лицензии
+            licenses_section = sections.search('licenses', _RE_C_LICENSES)
+            if licenses_section:
+                licenses = _RE_C_LICENSE.findall(licenses_section.group(1))
+                if licenses:
+                    lic_list = [f"№{lic[0]} от {lic[1]}" for lic in licenses]
+                    detail['licenses'] = ' | '.join(lic_list)
+
+            # 6. Поставщики - извлекаем из таблиц
+            if sections.search('suppliers', _RE_C_SUPPLIERS):
+                suppliers = []
+                table = tables.first(lambda t: 'Наименование' in t and 'поставщика' in t)
+                if table is not None:
+                    rows = table.find_all('tr')[1:]
+                    for row in rows[:5]:
+                        cells = row.find_all('td')
+                        if len(cells) >= 2:
+                            supplier_name = cells[1].get_text(strip=True)[:200]
+                            supplier_addr = cells[2].get_text(strip=True)[:200] if len(cells) > 2 else ''
+                            delivery_period = cells[3].get_text(strip=True) if len(cells) > 3 else ''
+                            delivery_place = cells[4].get_text(strip=True)[:100] if len(cells) > 4 else ''
+
+                            suppliers.append(f"{supplier_name}|{supplier_addr}|{delivery_period}|{delivery_place}")
+
+                if suppliers:
+                    detail['suppliers'] = ' || '.join(suppliers)
+                    # Первый обычно победитель
+                    parts = suppliers[0].split('|')
+                    detail['winner_supplier'] = parts[0]
+                    if len(parts) > 1:
+                        detail['winner_address'] = parts[1]
+
+            # 7. Цены
+            if sections.search('prices', _RE_C_PRICES):
+                prices = []
+                table = tables.first(lambda t: 'Предложенная цена' in t or 'предложенная цена' in t)
+                if table is not None:
+                    rows = table.find_all('tr')[1:]
+                    for row in rows[:5]:
+                        cells = row.find_all('td')
+                        if len(cells) >= 3:
+                            supplier = cells[1].get_text(strip=True)[:100]
+                            price = cells[2].get_text(strip=True)
+                            local_content = cells[3].get_text(strip=True) if len(cells) > 3 else ''
+
+                            prices.append(f"{supplier}|{price}|{local_content}")
+
+                if prices:
+                    detail['all_prices'] = ' || '.join(prices)
+                    # Первая цена - победитель
+                    parts = prices[0].split('|')
+                    detail['winner_price'] = parts[1] if len(parts) > 1 else parts[0]
+                    if len(parts) > 2:
+                        detail['local_content'] = parts[2]
+
+            # 8. Код закупки
+            match = sections.search('code', _RE_C_CODE)
+            if match:
+                detail['purchase_code'] = match.group(1)
+
+            # Подпись
+            match = sections.search('signer', _RE_C_SIGNER)
+            if match:
+                detail['signed_by'] = match.group(1).strip()
+
+            match = sections.search('signed', _RE_SIGNED_DATE)
+            if match:
+                detail['signed_date'] = match.group(1).strip()
+
+            logger.info(f"    ✓ Извлечено {len(detail)} полей")
+
+        except Exception as e:
+            logger.error(f"    ✗ Ошибка: {e}")
+
+        return detail
+
+    # =========================================================================
+    # ПАРСИНГ ОПУБЛИКОВАННЫХ ТЕНДЕРОВ
+    # =========================================================================
+
+    def parse_published_tender(self, soup, text: str, tender_code: str, link: str) -> Dict:
+        """Детальный парсинг ОПУБЛИКОВАННОГО тендера"""
+        detail = {
+            'tender_code': tender_code,
+            'detail_link': link
+        }
+
+        try:
+            sections = LabelIndex(_PUBLISHED_SCANNER, text)
+            tables = TableIndex(soup)
+
+            # 1. Наименование заказчика
+            match = sections.search('customer', _RE_P_CUSTOMER)
+            if match:
+                detail['customer_name'] = match.group(1).strip()
+
+            # Адрес интернет ресурса
+            match = sections.search('web', _RE_P_WEB)
+            if match:
+                detail['web_resource'] = match.group(1)
+
+            # Местонахождение
+            match = sections.search('location', _RE_P_LOCATION)
+            if match:
+                detail['customer_location'] = match.group(1).strip()[:300]
+
+            # 2. Предмет закупа - извлекаем все позиции из таблицы
+            positions = []
+            table = tables.first(lambda t: 'Код СКП' in t and 'Краткое описание' in t)
+            if table is not None:
+                rows = table.find_all('tr')[1:]
+
+                for row in rows[:50]:  # Первые 50 позиций
+                    cells = row.find_all('td')
+                    if len(cells) >= 5:
+                        # ЛОТ №, Код СКП, Описание, Единица, Количество, Сумма, Срок, Место
+                        skp_code = cells[1].get_text(strip=True)
+                        description = cells[2].get_text(strip=True)[:100]
+                        unit = cells[3].get_text(strip=True)
+                        quantity = cells[4].get_text(strip=True)
+                        amount = cells[5].get_text(strip=True) if len(cells) > 5 else ''
+                        delivery_days = cells[6].get_text(strip=True) if len(cells) > 6 else ''
+                        delivery_place = cells[7].get_text(strip=True)[:150] if len(cells) > 7 else ''
+
+                        positions.append(
+                            f"{skp_code}|{description}|{unit}|{quantity}|{amount}|{delivery_days}|{delivery_place}")
+
+            if positions:
+                detail['purchase_items'] = ' || '.join(positions)
+                detail['total_items'] = len(positions)
+
+            # 3. Время начала и окончания
+            match = sections.search('start', _RE_P_START)
+            if match:
+                detail['submission_start'] = match.group(1).strip()
+
+            match = sections.search('end', _RE_P_END)
+            if match:
+                detail['submission_end'] = match.group(1).strip()
+
+            match = sections.search('opening', _RE_P_OPENING)
+            if match:
+                detail['opening_date'] = match.group(1).strip()
+
+            # 4. Контакты
+            match = sections.search('email', _RE_P_EMAIL)
+            if match:
+                detail['contact_email'] = match.group(1).strip()
+
+            match = sections.search('phone', _RE_P_PHONE)
+            if match:
+                detail['contact_phone'] = match.group(1).strip()
+
+            # 6. Требования по местному содержанию
+            match = sections.search('local', _RE_P_LOCAL)
+            if match:
+                detail['local_content_requirement'] = match.group(1).strip()
+
+            # Срок заключения договора
+            match = sections.search('deadline', _RE_P_DEADLINE)
+            if match:
+                detail['contract_deadline'] = match.group(1).strip()
+
+            # Подпись
+            match = sections.search('signer', _RE_P_SIGNER)
+            if match:
+                detail['signed_by'] = match.group(1).strip()
+
+            match = sections.search('signed', _RE_SIGNED_DATE)
+            if match:
+                detail['signed_date'] = match.group(1).strip()
+
+            logger.info(f"    ✓ Извлечено {len(detail)} полей")
+
+        except Exception as e:
+            logger.error(f"    ✗ Ошибка: {e}")
+
+        return detail
+
+    # =========================================================================
+    # ОСНОВНАЯ ЛОГИКА
+    # =========================================================================
+
+    async def parse_all(self, start_page: int = 1, end_page: Optional[int] = None):
+        """Полный парсинг: NADLOC_LIST_CONCURRENCY загрузчиков списка передают
+        строки через ограниченную очередь NADLOC_DETAIL_CONCURRENCY загрузчикам
+        деталей; строки пишутся в файлы по мере готовности.
+        end_page=None — до последней страницы из пагинации."""
+        print("\n" + "=" * 70)
+        print("ПАРСИНГ СПИСКА И ДЕТАЛЕЙ")
+        print("=" * 70)
+
+        self.open_writers()
+        # список не должен убегать от деталей дальше DETAIL_BACKLOG строк
+        rows: asyncio.Queue = asyncio.Queue(maxsize=DETAIL_BACKLOG)
+        next_page = start_page
+        stop_page = None  # без end_page: первая пустая страница, дальше списка нет
+
+        def last_page():
+            return end_page if end_page is not None else max(self.last_page, start_page)
+
+        async def crawl_page(page):
+            nonlocal stop_page
+            tenders = await self.parse_page_list(page)
+            if tenders is None:
+                # ошибка загрузки — не конец списка: страницу пропускаем, обход продолжается
+                self.failed_pages.append(page)
+                return
+            if not tenders and end_page is None:
+                stop_page = min(page, stop_page or page)
+            for tender in tenders:
+                self.add_result('list', tender)
+                await rows.put(tender)
+
+        async def list_worker():
+            nonlocal next_page
+            while next_page <= last_page() and (stop_page is None or next_page < stop_page):
+                page = next_page
+                next_page += 1
+                await crawl_page(page)
+
+        async def detail_worker():
+            while True:
+                tender = await rows.get()
+                try:
+                    result = await self.parse_tender_detail(tender)
+                    if result.get('type') in ('completed', 'published'):
+                        self.add_result(result['type'], result['data'])
+                    if self.on_tender is not None:
+                        await self.on_tender(tender, result)
+                finally:
+                    rows.task_done()
+
+        async def crawl():
+            nonlocal next_page
+            if start_page > last_page():
+                return
+            # первая страница — одна: из её пагинации становится известно число страниц
+            next_page += 1
+            await crawl_page(start_page)
+            await asyncio.gather(*(list_worker() for _ in range(NADLOC_LIST_CONCURRENCY)))
+            logger.info(f"\n✓ Получено {self.counts['list']} тендеров")
+            await rows.join()
+
+        detail_tasks = [asyncio.ensure_future(detail_worker()) for _ in range(NADLOC_DETAIL_CONCURRENCY)]
+        crawl_task = asyncio.ensure_future(crawl())
+        try:
+            done, _ = await asyncio.wait([crawl_task, *detail_tasks], return_when=asyncio.FIRST_COMPLETED)
+            # загрузчики деталей завершаются только с ошибкой
+            for task in done:
+                task.result()
+        finally:
+            for task in [crawl_task, *detail_tasks]:
+                task.cancel()
+            await asyncio.gather(crawl_task, *detail_tasks, return_exceptions=True)
+            self.close_writers()
+
+        if self.failed_pages:
+            logger.warning(f"Страницы списка не загружены: {sorted(self.failed_pages)}")
+        logger.info(f"\n{'=' * 70}")
+        logger.info(f"✓ Завершенные: {self.counts['completed']}")
+        logger.info(f"✓ Опубликованные: {self.counts['published']}")
+        logger.info(f"{'=' * 70}\n")
+
+    def add_result(self, kind: str, row: Dict):
+        """kind: list | completed | published"""
+        self.counts[kind] += 1
+        if self.keep_in_memory:
+            self._results(kind).append(row)
+        writer = self.writers.get(kind)
+        if writer:
+            writer.write(row)
+
+    def _results(self, kind: str) -> List[Dict]:
+        return {
+            'list': self.tenders_list,
+            'completed': self.completed_tenders,
+            'published': self.published_tenders,
+        }[kind]
+
+    def open_writers(self):
+        if self.output_dir is None:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        for kind, prefix, fieldnames in self._outputs():
+            path = os.path.join(self.output_dir, f'{prefix}_{timestamp}.{self.output_format}')
+            self.writers[kind] = TenderRowWriter(path, fieldnames, self.output_format)
+
+    def close_writers(self):
+        labels = {'list': 'СПИСОК', 'completed': 'ЗАВЕРШЕННЫЕ', 'published': 'ОПУБЛИКОВАННЫЕ'}
+        for kind, writer in self.writers.items():
+            writer.close()
+            logger.info(f"✅ {labels[kind]}: {writer.path} ({writer.count} записей)")
+        self.writers = {}
+
+    @staticmethod
+    def _outputs():
+        return (
+            ('list', 'tenders_list', LIST_FIELDS),
+            ('completed', 'completed_tenders', COMPLETED_FIELDS),
+            ('published', 'published_tenders', PUBLISHED_FIELDS),
+        )
+
+    def _save(self, kind: str) -> Optional[str]:
+        """Разовая выгрузка накопленных в памяти результатов"""
+        rows = self._results(kind)
+        if not rows:
+            return None
+
+        _, prefix, fieldnames = next(o for o in self._outputs() if o[0] == kind)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = os.path.join(self.output_dir or '.', f'{prefix}_{timestamp}.{self.output_format}')
+
+        with TenderRowWriter(filename, fieldnames, self.output_format) as writer:
+            for row in rows:
+                writer.write(row)
+
+        logger.info(f"✅ {filename} ({len(rows)} записей)")
+        return filename
+
+    def save_tenders_list(self):
+        """Сохранение списка"""
+        return self._save('list')
+
+    def save_completed_tenders(self):
+        """Сохранение завершенных"""
+        return self._save('completed')
+
+    def save_published_tenders(self):
+        """Сохранение опубликованных"""
+        return self._save('published')
+
+
+def parse_detail_html(html: str, tender_code: str, detail_link: str) -> Dict:
+    """То же, что AdvancedTenderParser.parse_detail_html, для пула процессов"""
+    return AdvancedTenderParser(output_dir=None).parse_detail_html(html, tender_code, detail_link)
+
+
+async def main(argv=None):
+    ap = argparse.ArgumentParser(description="Парсер reestr.nadloc.kz")
+    ap.add_argument("--start-page", type=int, default=1)
+    ap.add_argument("--end-page", type=int, default=None, help="по умолчанию — последняя страница из пагинации")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    print("\n" + "=" * 70)
+    print("ПАРСЕР ТЕНДЕРОВ REESTR.NADLOC.KZ")
+    print(f"Создает ТРИ файла ({OUTPUT_FORMAT}):")
+    print("  1. tenders_list_* - список тендеров")
+    print("  2. completed_tenders_* - завершенные (протоколы)")
+    print("  3. published_tenders_* - опубликованные (объявления)")
+    print("=" * 70)
+
+    async with AdvancedTenderParser(keep_in_memory=False) as parser:
+        await parser.parse_all(start_page=args.start_page, end_page=args.end_page)
+
+        print("\n" + "=" * 70)
+        print("✅ ЗАВЕРШЕНО!")
+        print(f"📊 Список: {parser.counts['list']}")
+        print(f"✅ Завершенные: {parser.counts['completed']}")
+        print(f"📢 Опубликованные: {parser.counts['published']}")
+        print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
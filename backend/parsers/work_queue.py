@@ -0,0 +1,173 @@
+"""Очередь detail-задач с арендой (lease/ack) и таймаутом видимости.
+
+Координатор (под, выполнивший фазу списка) кладёт строки тендеров в очередь,
+воркеры (parsers/detail_worker.py — процессы или поды) арендуют пачки задач,
+загружают и парсят детали и подтверждают результат. Задача, аренда которой
+истекла (воркер упал), снова становится доступной; после QUEUE_MAX_LEASES
+аренд она считается упавшей. Координатор забирает готовые результаты через
+take_results() и передаёт их дальше в ingest.
+
+Хранилище — SQLite (WAL) на общем для воркеров диске; интерфейс
+enqueue/lease/ack/release/take_results намеренно минимален, чтобы его можно
+было повторить поверх Redis.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+QUEUE_VISIBILITY_TIMEOUT = float(os.getenv("QUEUE_VISIBILITY_TIMEOUT", 300))
+QUEUE_MAX_LEASES = int(os.getenv("QUEUE_MAX_LEASES", 3))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    leases INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    result TEXT,
+    enqueued_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_until);
+"""
+
+
+class WorkQueue:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # isolation_level=None — транзакции открываем явно (BEGIN IMMEDIATE)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def enqueue_many(self, rows: Iterable[Dict]) -> int:
+        """Ставит строки тендеров в очередь (ключ — ID). Задачи, которые уже
+        ждут или в работе, не дублируются; строки без ID не ставятся."""
+        now = time.time()
+        params = [
+            (str(row.get("ID")), json.dumps(row, ensure_ascii=False), now, now)
+            for row in rows
+            if row.get("ID")
+        ]
+        self._transaction()
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                """
+                INSERT INTO tasks (id, payload, status, enqueued_at, updated_at)
+                VALUES (?, ?, 'ready', ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    payload = excluded.payload, status = 'ready', leases = 0,
+                    lease_owner = NULL, lease_until = NULL, result = NULL,
+                    enqueued_at = excluded.enqueued_at, updated_at = excluded.updated_at
+                WHERE tasks.status IN ('done', 'failed')
+                """,
+                params,
+            )
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def lease(self, owner: str, limit: int, visibility_timeout: Optional[float] = None) -> List[Dict]:
+        """Арендует до limit задач: свободные и с истёкшей арендой."""
+        now = time.time()
+        lease_until = now + (visibility_timeout or QUEUE_VISIBILITY_TIMEOUT)
+        self._transaction()
+        try:
+            # аренда истекала слишком часто — воркеры на задаче падают
+            self.conn.execute(
+                """
+                UPDATE tasks SET status = 'failed', lease_owner = NULL, updated_at = ?
+                WHERE status = 'leased' AND lease_until < ? AND leases >= ?
+                """,
+                (now, now, QUEUE_MAX_LEASES),
+            )
+            rows = self.conn.execute(
+                """
+                SELECT id, payload FROM tasks
+                WHERE status = 'ready' OR (status = 'leased' AND lease_until < ?)
+                ORDER BY enqueued_at
+                LIMIT ?
+                """,
+                (now, limit),
+            ).fetchall()
+            self.conn.executemany(
+                """
+                UPDATE tasks SET status = 'leased', leases = leases + 1,
+                    lease_owner = ?, lease_until = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                [(owner, lease_until, now, task_id) for task_id, _ in rows],
+            )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [json.loads(payload) for _, payload in rows]
+
+    def ack(self, task_id: str, owner: str, record: Optional[Dict]) -> bool:
+        """Фиксирует результат; record=None — detail-запрос не удался.
+        False, если аренда уже перешла к другому воркеру."""
+        cur = self.conn.execute(
+            """
+            UPDATE tasks SET status = ?, result = ?, lease_owner = NULL, updated_at = ?
+            WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            """,
+            (
+                "done" if record is not None else "failed",
+                json.dumps(record, ensure_ascii=False) if record is not None else None,
+                time.time(),
+                str(task_id),
+                owner,
+            ),
+        )
+        return cur.rowcount == 1
+
+    def release(self, owner: str) -> int:
+        """Возвращает в очередь все задачи воркера (корректная остановка)."""
+        cur = self.conn.execute(
+            """
+            UPDATE tasks SET status = 'ready', lease_owner = NULL, lease_until = NULL,
+                leases = MAX(leases - 1, 0), updated_at = ?
+            WHERE status = 'leased' AND lease_owner = ?
+            """,
+            (time.time(), owner),
+        )
+        return cur.rowcount
+
+    def take_results(self, limit: int = 500) -> List[Tuple[Dict, Optional[Dict]]]:
+        """Забирает готовые задачи: [(строка списка, запись или None при неудаче)]."""
+        self._transaction()
+        try:
+            rows = self.conn.execute(
+                "SELECT id, payload, result FROM tasks WHERE status IN ('done', 'failed') LIMIT ?",
+                (limit,),
+            ).fetchall()
+            self.conn.executemany("DELETE FROM tasks WHERE id = ?", [(r[0],) for r in rows])
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [
+            (json.loads(payload), json.loads(result) if result is not None else None)
+            for _, payload, result in rows
+        ]
+
+    def counts(self) -> Dict[str, int]:
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")
+        return dict(rows.fetchall())
+
+    def close(self):
+        self.conn.close()
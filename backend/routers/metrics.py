@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+
+from parsers.ai_procure_parser import DETAIL_LIMITER
+from parsers.telemetry import SCRAPER_TELEMETRY
+from services.risk_batcher import RISK_BATCHER
+from services.supplier_graph import SUPPLIER_GRAPH
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+@router.get("")
+def scraper_metrics():
+    return {
+        "scraper": SCRAPER_TELEMETRY.snapshot(),
+        "detail_limiter": DETAIL_LIMITER.snapshot(),
+        "risk_batcher": RISK_BATCHER.snapshot(),
+        "supplier_graph": SUPPLIER_GRAPH.snapshot(),
+    }
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
 from models.risk import TenderRiskRequest
+from services.risk_batcher import RISK_BATCHER, BatcherUnavailable
+from services.risk_model import score_tenders
+from services.supplier_graph import SUPPLIER_GRAPH
 from services.tender_risk_service import (
     call_local_risk_model,
     generate_pdf_report_from_tenders,
@@ -9,6 +14,30 @@ from services.tender_risk_service import (
 
 router = APIRouter()
 
+@router.post("/tender-risk/score")
+async def tender_risk_score(body: TenderRiskRequest):
+    """Быстрый локальный скоринг моделью TenderRiskModel (без LLM);
+    параллельные запросы оцениваются общей пачкой."""
+    try:
+        return await RISK_BATCHER.score(body.tenders)
+    except BatcherUnavailable:
+        # батчер остановлен или его воркер упал — этот запрос считаем сам по себе
+        return await asyncio.to_thread(score_tenders, body.tenders)
+
+
+@router.get("/tender-risk/organizer-suppliers")
+async def organizer_suppliers(
+    organizer: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Главные приглашённые поставщики организатора по графу поставщиков:
+    число закупок (из них из одного источника), сумма и доля пары."""
+    result = await asyncio.to_thread(SUPPLIER_GRAPH.top_suppliers, organizer, limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Organizer not found in supplier graph")
+    return result
+
+
 @router.post("/tender-risk")
 async def tender_risk(body: TenderRiskRequest):
     print("...debug...")
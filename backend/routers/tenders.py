@@ -16,6 +16,7 @@ class SearchRequest(BaseModel):
     page: int = 1
     pageSize: int = 15
     sortAmount: Optional[str] = None
+    sortRisk: Optional[str] = None
 
 @router.post("/search")
 def search(req: SearchRequest):
@@ -25,6 +26,7 @@ def search(req: SearchRequest):
         page=req.page,
         page_size=req.pageSize,
         sort_amount=req.sortAmount,
+        sort_risk=req.sortRisk,
     )
 
 @router.get("/debug/first")
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from db.firestore_repo import DEDUP_FIELD, SOURCE_FIELD, FirestoreTenderRepo
+from services.risk_model import record_supplier_pairs, score_documents
+from services.tender_sources import get_sources, to_document
+
+logger = logging.getLogger(__name__)
+
+# scrape (все источники параллельно) -> normalize -> upsert: ограниченные
+# очереди между стадиями, запись в Firestore микро-батчами по размеру или по таймауту
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 500))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 200))  # лимит Firestore batch — 500
+INGEST_FLUSH_SECONDS = float(os.getenv("INGEST_FLUSH_SECONDS", 5))
+INGEST_DRY_RUN = os.getenv("INGEST_DRY_RUN", "true").lower() == "true"
+# сколько ждать дозаписи уже полученных тендеров при отмене обновления
+INGEST_DRAIN_TIMEOUT = float(os.getenv("INGEST_DRAIN_TIMEOUT", 30))
+# risk_score / risk_level / флаги модели риска в каждом документе (для фильтра и сортировки в поиске)
+INGEST_RISK_SCORING = os.getenv("INGEST_RISK_SCORING", "true").lower() == "true"
+
+_DONE = object()
+
+
+def normalize_tender(record: Dict, source: str = "goszakup") -> Optional[Dict]:
+    tender_id, item = to_document(source, record)
+    if not tender_id:
+        return None
+    return item
+
+
+def score_batch(items: List[Dict]) -> List[Dict]:
+    """Дописывает в документы поля риска — одним predict на весь батч. Пары
+    организатор — поставщик батча учитываются в признаках, но в граф поставщиков
+    попадают только после записи (record_written_pairs)."""
+    for item, risk in zip(items, score_documents(items, own_pairs=True)):
+        item.update(risk)
+    return items
+
+
+def record_written_pairs(items: List[Dict], written_ids: List[str]) -> int:
+    """Вносит в граф поставщиков только тендеры, которые upsert_many записал в Firestore:
+    дубли из другого источника и незаписанный батч не должны считаться в парах."""
+    written = set(written_ids)
+    return record_supplier_pairs([item for item in items if item.get("ID") in written])
+
+
+async def _scrape_source(name: str, scrape, raw_queue: asyncio.Queue, stats: Dict) -> int:
+    async def on_record(record):
+        # полная очередь притормаживает парсер (backpressure)
+        await raw_queue.put((name, record))
+
+    try:
+        return await scrape(on_record)
+    except Exception as e:
+        # упавший источник не останавливает остальные
+        logger.exception("[ingest] Источник %s завершился с ошибкой", name)
+        stats["source_errors"][name] = repr(e)
+        return 0
+
+
+async def _scrape_stage(raw_queue: asyncio.Queue, stats: Dict) -> Dict[str, int]:
+    try:
+        sources = get_sources()
+        counts = await asyncio.gather(
+            *(_scrape_source(name, scrape, raw_queue, stats) for name, scrape in sources.items())
+        )
+        return dict(zip(sources, counts))
+    finally:
+        await raw_queue.put(_DONE)
+
+
+async def _normalize_stage(raw_queue: asyncio.Queue, batch_queue: asyncio.Queue, stats: Dict):
+    # ключ дедупликации -> источник, первым приславший тендер в этом прогоне;
+    # между прогонами дубли отсекает upsert_many
+    seen_keys: Dict[str, str] = {}
+    while True:
+        entry = await raw_queue.get()
+        if entry is _DONE:
+            await batch_queue.put(_DONE)
+            return
+        source, record = entry
+        item = normalize_tender(record, source)
+        if item is None:
+            continue
+        key = item.get(DEDUP_FIELD)
+        if key:
+            first_source = seen_keys.setdefault(key, source)
+            if first_source != source:
+                stats["duplicates"] += 1
+                continue
+        await batch_queue.put(item)
+
+
+async def _write_stage(repo: FirestoreTenderRepo, batch_queue: asyncio.Queue, stats: Dict):
+    batch: List[Dict] = []
+    deadline = None
+
+    async def flush():
+        nonlocal batch, deadline
+        if not batch:
+            return
+        items, batch, deadline = batch, [], None
+        if INGEST_RISK_SCORING:
+            try:
+                await asyncio.to_thread(score_batch, items)
+                stats["risk_scored"] += len(items)
+            except Exception:
+                # без скоринга тендеры всё равно пишем, риск досчитает backfill
+                # (у уже сохранённых тендеров остаются прежние поля риска)
+                logger.exception("[ingest] Ошибка скоринга риска для батча из %d тендеров", len(items))
+                stats["risk_errors"] += 1
+        try:
+            new_ids, updated_ids = await asyncio.to_thread(repo.upsert_many, items, INGEST_DRY_RUN)
+        except Exception:
+            logger.exception("[ingest] Ошибка записи батча из %d тендеров", len(items))
+            stats["failed_batches"] += 1
+            return
+        stats["batches"] += 1
+        stats["inserted_new"] += len(new_ids)
+        stats["updated"] += len(updated_ids)
+        # DRY_RUN ничего не сохраняет, значит и в графе этих тендеров быть не должно
+        if INGEST_RISK_SCORING and not INGEST_DRY_RUN:
+            try:
+                await asyncio.to_thread(record_written_pairs, items, new_ids + updated_ids)
+            except Exception:
+                # граф досчитает backfill (record_supplier_pairs по сохранённым тендерам)
+                logger.exception("[ingest] Ошибка записи пар организатор — поставщик для батча")
+                stats["risk_errors"] += 1
+
+    while True:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            item = await asyncio.wait_for(batch_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            await flush()
+            continue
+
+        if item is _DONE:
+            await flush()
+            return
+
+        stats["normalized"] += 1
+        stats["normalized_by_source"][item[SOURCE_FIELD]] += 1
+        batch.append(item)
+        if deadline is None:
+            deadline = time.monotonic() + INGEST_FLUSH_SECONDS
+        if len(batch) >= INGEST_BATCH_SIZE:
+            await flush()
+
+
+async def run_ingest_pipeline(repo: FirestoreTenderRepo) -> Dict:
+    raw_queue: asyncio.Queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+    batch_queue: asyncio.Queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+    stats = {
+        "normalized": 0,
+        "normalized_by_source": defaultdict(int),
+        "duplicates": 0,
+        "batches": 0,
+        "failed_batches": 0,
+        "inserted_new": 0,
+        "updated": 0,
+        "risk_scored": 0,
+        "risk_errors": 0,
+        "source_errors": {},
+    }
+
+    scrape_task = asyncio.create_task(_scrape_stage(raw_queue, stats))
+    drain_tasks = [
+        asyncio.create_task(_normalize_stage(raw_queue, batch_queue, stats)),
+        asyncio.create_task(_write_stage(repo, batch_queue, stats)),
+    ]
+    try:
+        # asyncio.wait, а не gather: при отмене gather сразу отменил бы все стадии
+        await asyncio.wait([scrape_task, *drain_tasks])
+    except asyncio.CancelledError:
+        # останавливаем только парсер, уже полученные тендеры дописываем
+        scrape_task.cancel()
+        _, pending = await asyncio.wait(drain_tasks, timeout=INGEST_DRAIN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        raise
+
+    parsed_by_source = scrape_task.result()
+    stats["normalized_by_source"] = dict(stats["normalized_by_source"])
+    return {
+        "parsed_total": sum(parsed_by_source.values()),
+        "parsed_by_source": parsed_by_source,
+        "dry_run": INGEST_DRY_RUN,
+        **stats,
+    }
@@ -0,0 +1,284 @@
+"""Переносимый артефакт модели риска: numpy-массивы + JSON вместо pickle.
+
+    models/tender_risk_model/
+        model.json   — версия формата, параметры TF-IDF, имена колонок, порог
+        arrays.npz   — vocabulary, idf, центроиды KMeans, IQR по кластерам
+
+arrays.npz пишется без сжатия и при загрузке отображается в память (mmap),
+поэтому артефакт грузится за миллисекунды и не требует sklearn той версии,
+которой обучена модель. Предсказание повторяет sklearn операция в операцию
+(TfidfVectorizer.transform + KMeans.predict), результат совпадает бит в бит —
+см. bench/risk_artifact.py.
+
+    python -m services.risk_artifact export [--pkl models/tender_risk_model.pkl] [--out models/tender_risk_model]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import warnings
+import zipfile
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from services.risk_model import RISK_MODEL_ARTIFACT, RISK_MODEL_PATH, TenderRiskModel, load_pickle_model
+
+ARTIFACT_FORMAT_VERSION = 1
+META_FILE = "model.json"
+ARRAYS_FILE = "arrays.npz"
+
+# параметры TfidfVectorizer, которые воспроизводит ArtifactRiskModel
+SUPPORTED_TFIDF_PARAMS = {
+    "analyzer": "word",
+    "binary": False,
+    "decode_error": "strict",
+    "input": "content",
+    "lowercase": True,
+    "norm": "l2",
+    "preprocessor": None,
+    "stop_words": None,
+    "strip_accents": None,
+    "sublinear_tf": False,
+    "tokenizer": None,
+    "use_idf": True,
+}
+MODEL_COLUMNS = ("price_col", "text_col", "invited_col", "method_col", "start_date_col", "end_date_col")
+
+# локальный заголовок zip: сигнатура ... длина имени, длина extra (offset 26)
+_ZIP_LOCAL_HEADER = struct.Struct("<4s22sHH")
+
+
+# ------------------------- EXPORT -------------------------
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def export_artifact(model: TenderRiskModel, out_dir: str, source_path: str = None) -> str:
+    import sklearn
+    from sklearn.utils.extmath import row_norms
+
+    params = model.tfidf.get_params()
+    unsupported = {k: params.get(k) for k, v in SUPPORTED_TFIDF_PARAMS.items() if params.get(k) != v}
+    if unsupported:
+        raise ValueError(f"Параметры TF-IDF не поддерживаются артефактом: {unsupported}")
+
+    vocabulary = model.tfidf.vocabulary_
+    terms = np.empty(len(vocabulary), dtype=object)
+    for term, idx in vocabulary.items():
+        terms[idx] = term
+    centers = model.kmeans.cluster_centers_
+    stats = model.cluster_price_stats_
+
+    arrays = dict(
+        terms=terms.astype(str),
+        idf=np.ascontiguousarray(model.tfidf.idf_, dtype=np.float64),
+        centers=np.ascontiguousarray(centers, dtype=np.float64),
+        # те же нормы, что KMeans.predict считает у себя
+        centers_sq_norms=row_norms(centers, squared=True),
+        stats=np.ascontiguousarray(stats.to_numpy(dtype=np.float64)),
+        stats_clusters=stats.index.to_numpy(),
+    )
+    meta = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "exported_with_sklearn": sklearn.__version__,
+        "source": {
+            "file": os.path.basename(source_path),
+            "sha256": _file_sha256(source_path),
+        } if source_path else None,
+        "tfidf": {
+            "token_pattern": params["token_pattern"],
+            "ngram_range": list(params["ngram_range"]),
+            "lowercase": params["lowercase"],
+            "norm": params["norm"],
+        },
+        "columns": {name: getattr(model, name) for name in MODEL_COLUMNS},
+        "n_clusters": int(centers.shape[0]),
+        "risk_threshold": int(model.risk_threshold),
+        "stats_columns": list(stats.columns),
+        "stats_index": stats.index.name,
+    }
+    return write_artifact(out_dir, meta, arrays)
+
+
+def write_artifact(out_dir: str, meta: Dict, arrays: Dict[str, np.ndarray]) -> str:
+    """Файлы пишутся во временные и подменяются через os.replace: процессы,
+    у которых старый arrays.npz отображён в память, продолжают читать его."""
+    os.makedirs(out_dir, exist_ok=True)
+    arrays_tmp = os.path.join(out_dir, ARRAYS_FILE + ".tmp")
+    with open(arrays_tmp, "wb") as f:
+        np.savez(f, **arrays)
+    meta_tmp = os.path.join(out_dir, META_FILE + ".tmp")
+    with open(meta_tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(arrays_tmp, os.path.join(out_dir, ARRAYS_FILE))
+    os.replace(meta_tmp, os.path.join(out_dir, META_FILE))
+    return out_dir
+
+
+def update_artifact_stats(path: str, stats: pd.DataFrame) -> str:
+    """Заменяет только таблицу IQR по кластерам (границы цены), без переобучения."""
+    meta = read_meta(path)
+    arrays = {name: np.array(a) for name, a in mmap_npz(os.path.join(path, ARRAYS_FILE)).items()}
+    arrays["stats"] = np.ascontiguousarray(stats.to_numpy(dtype=np.float64))
+    arrays["stats_clusters"] = stats.index.to_numpy()
+    meta["stats_columns"] = list(stats.columns)
+    meta["stats_index"] = stats.index.name
+    return write_artifact(path, meta, arrays)
+
+
+# ------------------------- LOAD -------------------------
+
+def mmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """Члены несжатого .npz как np.memmap (np.load(mmap_mode=...) для npz не работает)."""
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} сжат, mmap невозможен")
+            f.seek(info.header_offset)
+            _, _, name_len, extra_len = _ZIP_LOCAL_HEADER.unpack(f.read(_ZIP_LOCAL_HEADER.size))
+            f.seek(info.header_offset + _ZIP_LOCAL_HEADER.size + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if not shape or 0 in shape:
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(
+                path, dtype=dtype, mode="r", offset=f.tell(), shape=shape, order="F" if fortran else "C"
+            )
+    return arrays
+
+
+class ArtifactRiskModel(TenderRiskModel):
+    """TenderRiskModel без sklearn: кластер считается по массивам артефакта."""
+
+    def __init__(self, meta: Dict, arrays: Dict[str, np.ndarray]):
+        super().__init__(**meta["columns"], n_clusters=meta["n_clusters"], risk_threshold=meta["risk_threshold"])
+        self.meta = meta
+        self._token_re = re.compile(meta["tfidf"]["token_pattern"])
+        self._ngram_range = tuple(meta["tfidf"]["ngram_range"])
+        self.vocabulary = {term: i for i, term in enumerate(arrays["terms"].tolist())}
+        self.idf = arrays["idf"]
+        self.centers = arrays["centers"]
+        self.centers_sq_norms = arrays["centers_sq_norms"]
+        self.cluster_price_stats_ = pd.DataFrame(
+            np.asarray(arrays["stats"]),
+            index=pd.Index(np.asarray(arrays["stats_clusters"]), name=meta["stats_index"]),
+            columns=meta["stats_columns"],
+        )
+
+    def _ngrams(self, doc: str):
+        tokens = self._token_re.findall(doc.lower())
+        lo, hi = self._ngram_range
+        if hi == 1:
+            return tokens
+        grams = list(tokens) if lo == 1 else []
+        for n in range(max(lo, 2), min(hi, len(tokens)) + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def _count_rows(self, docs):
+        """Счётчики n-грамм построчно: (indptr, indices, counts), индексы в строке по возрастанию."""
+        vocabulary = self.vocabulary
+        indptr, indices, counts = [0], [], []
+        for doc in docs:
+            row: Dict[int, int] = {}
+            for gram in self._ngrams(doc):
+                idx = vocabulary.get(gram)
+                if idx is not None:
+                    row[idx] = row.get(idx, 0) + 1
+            for idx in sorted(row):
+                indices.append(idx)
+                counts.append(row[idx])
+            indptr.append(len(indices))
+        return np.array(indptr, dtype=np.intp), np.array(indices, dtype=np.intp), np.array(counts, dtype=np.float64)
+
+    def predict_clusters(self, text: pd.Series):
+        """TfidfVectorizer.transform + KMeans.predict в том же порядке операций.
+
+        sklearn накапливает суммы (норма строки, скалярное произведение с
+        центроидом) по ненулям строки в порядке хранения. Здесь строки
+        выровнены по позиции ненуля, и на шаге p прибавляется p-й ненуль
+        каждой строки, где он есть — каждая сумма получает те же слагаемые
+        в том же порядке, так что результат совпадает бит в бит.
+        """
+        # одинаковые наименования (частые в реестре) считаются один раз
+        codes, uniques = pd.factorize(text)
+        return self._predict_unique(uniques.tolist())[codes]
+
+    def _predict_unique(self, docs) -> np.ndarray:
+        indptr, indices, counts = self._count_rows(docs)
+        n_rows = len(indptr) - 1
+        values = counts * self.idf[indices]
+
+        nnz = np.diff(indptr)
+        row_of = np.repeat(np.arange(n_rows), nnz)
+        position = np.arange(len(indices)) - indptr[row_of]
+        steps = [np.flatnonzero(position == p) for p in range(int(nnz.max(initial=0)))]
+
+        # l2-нормировка
+        sq_sum = np.zeros(n_rows)
+        for k in steps:
+            sq_sum[row_of[k]] += values[k] * values[k]
+        norms = np.sqrt(sq_sum)
+        nonzero = norms[row_of] != 0.0
+        values[nonzero] /= norms[row_of][nonzero]
+
+        # расстояния до центроидов: |c|^2 - 2 <x, c>
+        centers_t = self.centers.T
+        dots = np.zeros((n_rows, self.centers.shape[0]))
+        for k in steps:
+            dots[row_of[k]] += centers_t[indices[k]] * values[k][:, None]
+        return np.argmin(self.centers_sq_norms - 2 * dots, axis=1).astype(np.int32)
+
+
+def read_meta(path: str) -> Dict:
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"{path}: формат артефакта {meta.get('format_version')}, поддерживается {ARTIFACT_FORMAT_VERSION}"
+        )
+    return meta
+
+
+def load_artifact(path: str = RISK_MODEL_ARTIFACT) -> ArtifactRiskModel:
+    return ArtifactRiskModel(read_meta(path), mmap_npz(os.path.join(path, ARRAYS_FILE)))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="pickle -> артефакт")
+    export.add_argument("--pkl", default=RISK_MODEL_PATH)
+    export.add_argument("--out", default=RISK_MODEL_ARTIFACT)
+    args = ap.parse_args(argv)
+
+    from sklearn.exceptions import InconsistentVersionWarning
+
+    with warnings.catch_warnings():
+        # exported_with_sklearn должен совпадать с версией, которой обучен pickle (пин в requirements.txt)
+        warnings.simplefilter("error", InconsistentVersionWarning)
+        model = load_pickle_model(args.pkl)
+    export_artifact(model, args.out, source_path=args.pkl)
+    print(f"Артефакт записан: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Досчёт полей риска для тендеров, сохранённых до скоринга при ingest
+(или после смены модели):
+
+    python -m services.risk_backfill [--chunk 500] [--dry-run] [--supplier-graph]
+
+Документы читаются потоком только с нужными полями, оцениваются пачками
+по --chunk и обновляются лишь там, где поля риска отсутствуют или изменились.
+С --supplier-graph сначала отдельным проходом все тендеры вносятся в граф
+поставщиков (services/supplier_graph.py), чтобы частоты пар считались по
+всей истории, а не по уже прочитанной её части.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from db.firestore_repo import FirestoreTenderRepo
+from services.risk_model import (
+    ORGANIZER_COL,
+    RISK_DOCUMENT_FIELDS,
+    get_risk_model,
+    record_supplier_pairs,
+    score_documents,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _changed_fields(stored: Dict, risk: Dict) -> Dict:
+    return {k: v for k, v in risk.items() if stored.get(k) != v}
+
+
+def _chunks(repo: FirestoreTenderRepo, fields: List[str], chunk_size: int) -> Iterator[List[Tuple[str, Dict]]]:
+    chunk: List[Tuple[str, Dict]] = []
+    for doc_id, data in repo.stream_fields(fields):
+        chunk.append((doc_id, data))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_supplier_graph(repo: FirestoreTenderRepo, chunk_size: int = 500) -> Dict:
+    """Вносит все сохранённые тендеры в граф поставщиков (без predict)."""
+    model = get_risk_model()
+    fields = ["ID", ORGANIZER_COL, model.price_col, model.invited_col, model.method_col]
+    stats = {"scanned": 0, "recorded": 0}
+    for chunk in _chunks(repo, fields, chunk_size):
+        stats["scanned"] += len(chunk)
+        stats["recorded"] += record_supplier_pairs([data for _, data in chunk])
+    return stats
+
+
+def backfill_risk_scores(repo: FirestoreTenderRepo, chunk_size: int = 500, dry_run: bool = False) -> Dict:
+    model = get_risk_model()
+    fields = [
+        "ID", ORGANIZER_COL, model.text_col, model.price_col, model.invited_col,
+        model.method_col, model.start_date_col, model.end_date_col,
+        *RISK_DOCUMENT_FIELDS,
+    ]
+    stats = {"scanned": 0, "updated": 0}
+
+    def flush(chunk: List[Tuple[str, Dict]]):
+        updates = {}
+        for (doc_id, data), risk in zip(chunk, score_documents([data for _, data in chunk])):
+            changed = _changed_fields(data, risk)
+            if changed:
+                updates[doc_id] = changed
+        if updates and not dry_run:
+            repo.update_many(updates)
+        stats["updated"] += len(updates)
+
+    for chunk in _chunks(repo, fields, chunk_size):
+        stats["scanned"] += len(chunk)
+        flush(chunk)
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--chunk", type=int, default=500)
+    ap.add_argument("--dry-run", action="store_true", help="только посчитать, сколько документов изменится")
+    ap.add_argument("--supplier-graph", action="store_true", help="сначала заполнить граф поставщиков по всем тендерам")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    repo = FirestoreTenderRepo()
+    if args.supplier_graph:
+        started = time.perf_counter()
+        stats = build_supplier_graph(repo, args.chunk)
+        logger.info(
+            "Граф поставщиков: проверено %d, внесено %d тендеров за %.1f сек",
+            stats["scanned"], stats["recorded"], time.perf_counter() - started,
+        )
+
+    started = time.perf_counter()
+    stats = backfill_risk_scores(repo, args.chunk, args.dry_run)
+    logger.info(
+        "Проверено %d, %s %d документов за %.1f сек",
+        stats["scanned"], "изменилось бы" if args.dry_run else "обновлено", stats["updated"],
+        time.perf_counter() - started,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
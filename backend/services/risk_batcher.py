@@ -0,0 +1,190 @@
+"""Микро-батчинг запросов к локальному скорингу риска.
+
+Каждый запрос к /tender-risk/score платил за свой predict: TF-IDF, KMeans,
+разбор дат и сборку кадра. Под нагрузкой много маленьких запросов делают
+одно и то же много раз. RISK_BATCHER копит запросы до RISK_BATCH_MAX_ITEMS
+тендеров или RISK_BATCH_MAX_WAIT_MS, оценивает их одним score_tenders в
+потоке и раздаёт результаты ожидающим по срезам. Пока пачка считается,
+новые запросы копятся в очереди и уходят следующей пачкой, поэтому
+RISK_BATCH_MAX_WAIT_MS=0 тоже батчит — без задержки одиночных запросов.
+
+Если пачка упала, её запросы пересчитываются по одному: ошибку получает
+только запрос с битым тендером, попутчики — свои результаты.
+
+Если воркер остановлен (close при завершении приложения) или упал, ожидающие
+запросы получают BatcherUnavailable, и /tender-risk/score оценивает их напрямую.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from models.risk import TenderRiskItem
+from parsers.telemetry import Histogram
+from services.risk_model import score_tenders
+
+RISK_BATCH_MAX_ITEMS = int(os.getenv("RISK_BATCH_MAX_ITEMS", 2000))
+# окно ожидания попутчиков; по умолчанию 0 — пачку набирают запросы, пришедшие,
+# пока считается предыдущая (bench/risk_batching.py: окно 5 мс только добавляет простой)
+RISK_BATCH_MAX_WAIT_MS = float(os.getenv("RISK_BATCH_MAX_WAIT_MS", 0))
+
+
+class BatcherUnavailable(RuntimeError):
+    """Запрос не будет оценён пачкой: воркер батчера остановлен или упал."""
+
+
+class RiskScoreBatcher:
+    def __init__(self, max_items: int = RISK_BATCH_MAX_ITEMS, max_wait_ms: float = RISK_BATCH_MAX_WAIT_MS):
+        self.max_items = max_items
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # пачка, которая сейчас считается (её запросы уже не в очереди)
+        self._batch: List = []
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        # запросы, получившие ошибку скоринга (после пересчёта упавшей пачки по одному)
+        self.failed_requests = 0
+        self.abandoned = 0
+        self.items = 0
+        self.max_batch_items = 0
+        self.max_batch_requests = 0
+        # сколько запрос ждал в очереди до начала скоринга
+        self.wait_seconds = Histogram()
+
+    def _ensure_worker(self):
+        # воркер живёт в цикле событий приложения; в новом цикле создаётся заново
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def score(self, tenders: List[TenderRiskItem]) -> Dict[str, Any]:
+        """Тот же ответ, что у score_tenders, но в общей пачке с другими запросами."""
+        if not tenders:
+            return {"tenders": []}
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        await self._queue.put((tenders, future, time.monotonic()))
+        return {"tenders": await future}
+
+    async def _run(self):
+        try:
+            await self._loop()
+        except asyncio.CancelledError:
+            self._fail_pending(BatcherUnavailable("батчер риска остановлен"))
+            raise
+        except BaseException as e:
+            self._fail_pending(BatcherUnavailable(f"воркер батчера риска упал: {e!r}"))
+            raise
+
+    def _fail_pending(self, error: BatcherUnavailable):
+        """Ожидающие запросы — из очереди и из недосчитанной пачки — получают ошибку, а не висят."""
+        pending, self._batch = self._batch, []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(error)
+                self.abandoned += 1
+
+    async def _loop(self):
+        while True:
+            self._batch = batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_items:
+                # уже ждущие запросы забираются сразу, новые — до дедлайна
+                if not self._queue.empty():
+                    entry = self._queue.get_nowait()
+                else:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        entry = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                batch.append(entry)
+                size += len(entry[0])
+            await self._flush(batch)
+            self._batch = []
+
+    async def _flush(self, batch):
+        # отменённые (клиент ушёл) не считаем
+        batch = [entry for entry in batch if not entry[1].cancelled()]
+        if not batch:
+            return
+        now = time.monotonic()
+        for _, _, queued_at in batch:
+            self.wait_seconds.observe(now - queued_at)
+        tenders = [t for entry in batch for t in entry[0]]
+        self.batches += 1
+        self.items += len(tenders)
+        self.max_batch_items = max(self.max_batch_items, len(tenders))
+        self.max_batch_requests = max(self.max_batch_requests, len(batch))
+
+        try:
+            results = (await asyncio.to_thread(score_tenders, tenders))["tenders"]
+        except Exception as e:
+            self.errors += 1
+            if len(batch) > 1:
+                await self._score_each(batch)
+            elif not batch[0][1].done():
+                self.failed_requests += 1
+                batch[0][1].set_exception(e)
+            return
+
+        offset = 0
+        for request, future, _ in batch:
+            if not future.done():
+                future.set_result(results[offset:offset + len(request)])
+            offset += len(request)
+
+    async def _score_each(self, batch):
+        """Пачка упала: каждый запрос оценивается отдельно, ошибку получает только тот, в ком она."""
+        for request, future, _ in batch:
+            if future.done():
+                continue
+            try:
+                result = (await asyncio.to_thread(score_tenders, request))["tenders"]
+            except Exception as e:
+                if not future.done():
+                    self.failed_requests += 1
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def snapshot(self) -> Dict:
+        return {
+            "max_items": self.max_items,
+            "max_wait_ms": self.max_wait * 1000,
+            "requests": self.requests,
+            "batches": self.batches,
+            "errors": self.errors,
+            "failed_requests": self.failed_requests,
+            "abandoned": self.abandoned,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "items": self.items,
+            "avg_batch_items": round(self.items / self.batches, 1) if self.batches else None,
+            "avg_batch_requests": round(self.requests / self.batches, 1) if self.batches else None,
+            "max_batch_items": self.max_batch_items,
+            "max_batch_requests": self.max_batch_requests,
+            "wait": self.wait_seconds.snapshot(),
+        }
+
+
+RISK_BATCHER = RiskScoreBatcher()
@@ -0,0 +1,134 @@
+"""Вариант модели риска без словаря: HashingVectorizer + IDF по корзинам.
+
+Словарь TfidfVectorizer(ngram_range=(1, 2)) растёт вместе с корпусом и
+занимает большую часть tender_risk_model.pkl, а обучить его потоком нельзя.
+Здесь n-граммы хешируются в фиксированные RISK_HASH_FEATURES корзин:
+
+* частоты документов по корзинам — просто счётчики, считаются по чанкам и
+  складываются; после фильтра min_df / max_df ноутбука остаются только
+  активные корзины, центроиды хранятся лишь по ним;
+* центроиды — MiniBatchKMeans.partial_fit по тем же чанкам (второй проход);
+* q1 / median / q3 — те же t-digest по кластерам, что и в risk_training.
+
+Токенизация та же (lowercase, (?u)\\b\\w\\w+\\b, униграммы + биграммы), правила
+и веса не меняются. Номера кластеров с исходной моделью не совпадают.
+
+    python -m services.risk_hashing fit tenders.csv [--out models/tender_risk_model_hashing.pkl]
+
+Обслуживать вариант: RISK_MODEL_ARTIFACT= RISK_MODEL_PATH=<out>.
+Сравнение с текущей моделью — bench/risk_hashing.py.
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from services.risk_model import MODELS_DIR, TenderRiskModel
+from services.risk_training import REFIT_CHUNK_SIZE, ClusterPriceSketches, clean_chunk, read_chunks
+
+# верхняя граница числа признаков: центроиды не больше n_clusters x RISK_HASH_FEATURES
+RISK_HASH_FEATURES = int(os.getenv("RISK_HASH_FEATURES", 2 ** 14))
+RISK_HASHING_MODEL_PATH = os.getenv(
+    "RISK_HASHING_MODEL_PATH", os.path.join(MODELS_DIR, "tender_risk_model_hashing.pkl")
+)
+# как TfidfVectorizer(max_df=0.8, min_df=5) в ноутбуке
+HASH_MIN_DF = 5
+HASH_MAX_DF = 0.8
+
+
+def make_hasher(n_features: int = RISK_HASH_FEATURES):
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # без знака и нормировки: в корзинах — счётчики n-грамм, как у CountVectorizer
+    return HashingVectorizer(n_features=n_features, ngram_range=(1, 2), alternate_sign=False, norm=None)
+
+
+@dataclass
+class HashingRiskModel(TenderRiskModel):
+    hasher: Any = field(default=None, init=False)
+    # номера активных корзин и их IDF; признаки модели — только эти колонки
+    active_: np.ndarray = field(default=None, init=False)
+    idf_: np.ndarray = field(default=None, init=False)
+
+    def transform(self, text: pd.Series):
+        from sklearn.preprocessing import normalize
+
+        X = self.hasher.transform(text)[:, self.active_]
+        X.data *= self.idf_[X.indices]
+        return normalize(X, norm="l2", copy=False)
+
+    def predict_clusters(self, text: pd.Series):
+        return self.kmeans.predict(self.transform(text))
+
+
+def fit_hashing_model(
+    chunks: Callable[[], Iterable[pd.DataFrame]],
+    n_features: int = RISK_HASH_FEATURES,
+    n_clusters: int = 30,
+    random_state: int = 42,
+) -> HashingRiskModel:
+    """Два прохода по chunks(): частоты документов -> IDF, затем центроиды и скетчи цены."""
+    from sklearn.cluster import MiniBatchKMeans
+
+    model = HashingRiskModel(n_clusters=n_clusters)
+    model.hasher = make_hasher(n_features)
+
+    doc_freq = np.zeros(n_features, dtype=np.int64)
+    n_docs = 0
+    for df in chunks():
+        df = clean_chunk(df, model)
+        X = model.hasher.transform(df[model.text_col].fillna(""))
+        doc_freq += np.bincount(X.indices, minlength=n_features)
+        n_docs += X.shape[0]
+    # smooth_idf как в TfidfTransformer
+    model.active_ = np.flatnonzero((doc_freq >= HASH_MIN_DF) & (doc_freq <= HASH_MAX_DF * n_docs))
+    model.idf_ = np.log((1 + n_docs) / (1 + doc_freq[model.active_])) + 1
+
+    model.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=1, batch_size=1024)
+    sketches = ClusterPriceSketches()
+    # первый partial_fit ставит центроиды и требует хотя бы n_clusters строк: до него
+    # мелкие чанки копятся, после — идут как есть (хвост выгрузки тоже), цены не теряются
+    pending, rows, fitted = [], 0, False
+    for df in chunks():
+        pending.append(clean_chunk(df, model))
+        rows += len(pending[-1])
+        if not rows or (not fitted and rows < n_clusters):
+            continue
+        df = pd.concat(pending) if len(pending) > 1 else pending[0]
+        pending, rows = [], 0
+        X = model.transform(df[model.text_col].fillna(""))
+        model.kmeans.partial_fit(X)
+        sketches.update(model.kmeans.predict(X), df[model.price_col].to_numpy())
+        fitted = True
+    if not fitted:
+        raise ValueError(f"Для {n_clusters} кластеров нужно хотя бы {n_clusters} тендеров с ценой, есть {rows}")
+    model.cluster_price_stats_ = sketches.stats_frame()
+    return model
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+    fit = sub.add_parser("fit", help="обучить вариант по выгрузке тендеров (CSV в схеме goszakup)")
+    fit.add_argument("csv")
+    fit.add_argument("--out", default=RISK_HASHING_MODEL_PATH)
+    fit.add_argument("--features", type=int, default=RISK_HASH_FEATURES)
+    fit.add_argument("--chunk", type=int, default=REFIT_CHUNK_SIZE)
+    args = ap.parse_args(argv)
+
+    started = time.perf_counter()
+    model = fit_hashing_model(lambda: read_chunks(args.csv, args.chunk), n_features=args.features)
+    joblib.dump(model, args.out)
+    print(f"Модель записана за {time.perf_counter() - started:.1f} сек: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""Локальный скоринг тендеров моделью models/tender_risk_model.pkl.
+
+Модель обучена в ноутбуке (parser_data/service in jupyter.py) и сохранена
+через joblib как `__main__.TenderRiskModel`, поэтому перед загрузкой класс
+регистрируется в модуле __main__. Если рядом лежит переносимый артефакт
+(services/risk_artifact.py), грузится он — без pickle и sklearn.
+Пачка тендеров оценивается за один проход:
+TF-IDF -> KMeans -> IQR по кластеру -> флаги правил -> risk_score.
+Ответ — в формате score_tenders_like_api из того же ноутбука.
+"""
+
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from models.risk import TenderRiskItem
+from services.supplier_graph import SUPPLIER_GRAPH, SUPPLIER_PAIR_FIELDS
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+RISK_MODEL_PATH = os.getenv("RISK_MODEL_PATH", os.path.join(MODELS_DIR, "tender_risk_model.pkl"))
+# переносимый артефакт (services/risk_artifact.py); если его нет — грузится pickle
+RISK_MODEL_ARTIFACT = os.getenv("RISK_MODEL_ARTIFACT", os.path.join(MODELS_DIR, "tender_risk_model"))
+
+# веса правил и пороги уровней — как в ноутбуке
+RISK_WEIGHTS = {
+    "price_outlier_high": 3,
+    "has_invited_supplier": 2,
+    "suspicious_method": 2,
+    "short_duration": 1,
+}
+RISK_LEVELS = ((6, "high"), (4, "medium"), (1, "low"))
+INVITED_BAD_VALUES = {"", "0", "-", "нет", "нету", "отсутствует"}
+SUSPICIOUS_METHOD_PATTERN = "одного источника"
+SHORT_DURATION_DAYS = 3
+
+# поля риска в документе тендера (считаются при ingest, см. score_documents)
+RISK_DOCUMENT_FLAGS = ("price_outlier_high", "has_invited_supplier", "suspicious_method", "short_duration")
+RISK_DOCUMENT_FIELDS = (
+    "risk_score", "risk_level", "risk_flag", "cluster", *RISK_DOCUMENT_FLAGS, *SUPPLIER_PAIR_FIELDS,
+)
+# организатор — не признак модели, но ключ графа поставщиков (services/supplier_graph.py)
+ORGANIZER_COL = "Организатор"
+# features в ответе /tender-risk/score (порядок как в score_tenders_like_api)
+RESPONSE_STATS = ("q1", "median", "q3", "upper_bound")
+RESPONSE_FEATURES = ("price", "cluster", *RISK_DOCUMENT_FLAGS, *RESPONSE_STATS, *SUPPLIER_PAIR_FIELDS)
+
+
+def clean_price(x) -> float:
+    """'1 234 567,89 тг.' -> 1234567.89, как в ноутбуке при обучении."""
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return np.nan
+    if isinstance(x, (int, float)):
+        return float(x)
+    s = "".join(ch for ch in str(x) if ch.isdigit() or ch in ".,").replace(",", ".")
+    try:
+        return float(s)
+    except ValueError:
+        return np.nan
+
+
+def clean_invited(values: pd.Series) -> pd.Series:
+    return values.fillna("").astype(str).str.strip()
+
+
+def has_invited(invited: pd.Series) -> pd.Series:
+    """invited — уже после clean_invited."""
+    return ~invited.str.lower().isin(INVITED_BAD_VALUES)
+
+
+def is_single_source(methods: pd.Series) -> pd.Series:
+    return methods.fillna("").astype(str).str.lower().str.contains(SUSPICIOUS_METHOD_PATTERN)
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Даты API (ISO, 2024-02-10) и goszakup (10.02.2024 12:00). pandas 3 с
+    dayfirst=True переставляет день и месяц и в ISO-датах, поэтому форматы
+    разбираются раздельно."""
+    values = values.astype("string")
+    iso = values.str.match(r"\d{4}-\d{2}-\d{2}").fillna(False).astype(bool)
+    parsed = pd.to_datetime(values.where(iso), errors="coerce", format="ISO8601")
+    dayfirst = pd.to_datetime(values.where(~iso), errors="coerce", dayfirst=True, format="mixed")
+    return parsed.where(iso, dayfirst)
+
+
+@dataclass
+class TenderRiskModel:
+    price_col: str = "Сумма, тг."
+    text_col: str = "Наименование объявления"
+    invited_col: str = "Общие_Приглашенный поставщик"
+    method_col: str = "Общие_Способ проведения закупки"
+    start_date_col: str = "Начало приема заявок"
+    end_date_col: str = "Окончание приема заявок"
+    n_clusters: int = 30
+    risk_threshold: int = 4
+
+    tfidf: Any = field(default=None, init=False)
+    kmeans: Any = field(default=None, init=False)
+    cluster_price_stats_: pd.DataFrame = field(default=None, init=False)
+    suspicious_methods: list = field(default_factory=lambda: [SUSPICIOUS_METHOD_PATTERN], init=False)
+
+    def predict_clusters(self, text: pd.Series):
+        return self.kmeans.predict(self.tfidf.transform(text))
+
+    def _add_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+
+        # текст -> кластеры
+        text = df[self.text_col].fillna("")
+        df["cluster"] = self.predict_clusters(text)
+
+        # join IQR
+        df = df.join(self.cluster_price_stats_, on="cluster")
+
+        df["price_outlier_high"] = df[self.price_col] > df["upper_bound"]
+        df["price_outlier_low"] = df[self.price_col] < df["lower_bound"]
+
+        df[self.invited_col] = clean_invited(df[self.invited_col])
+        df["has_invited_supplier"] = has_invited(df[self.invited_col])
+
+        df[self.method_col] = df[self.method_col].fillna("").astype(str)
+        df["suspicious_method"] = is_single_source(df[self.method_col])
+
+        start = parse_dates(df[self.start_date_col])
+        end = parse_dates(df[self.end_date_col])
+        df["tender_duration_days"] = (end - start).dt.total_seconds() / (24 * 3600)
+        df["short_duration"] = df["tender_duration_days"] < SHORT_DURATION_DAYS
+        df.loc[df["tender_duration_days"].isna(), "short_duration"] = False
+        df.loc[df["tender_duration_days"] < 0, "short_duration"] = True
+        return df
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = self._add_features(df)
+        df["risk_score"] = sum(df[flag].astype(int) * w for flag, w in RISK_WEIGHTS.items())
+        df["risk_flag"] = df["risk_score"] >= self.risk_threshold
+        return df
+
+
+_model: Optional[TenderRiskModel] = None
+_model_lock = threading.Lock()
+
+
+def load_pickle_model(path: str = RISK_MODEL_PATH) -> TenderRiskModel:
+    # pickle ссылается на класс из __main__ ноутбука
+    sys.modules["__main__"].TenderRiskModel = TenderRiskModel
+    return joblib.load(path)
+
+
+def get_risk_model() -> TenderRiskModel:
+    """Загружает модель один раз на процесс: артефакт, если он есть, иначе pickle."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                started = time.perf_counter()
+                if os.path.isdir(RISK_MODEL_ARTIFACT):
+                    from services.risk_artifact import load_artifact
+                    path, _model = RISK_MODEL_ARTIFACT, load_artifact(RISK_MODEL_ARTIFACT)
+                else:
+                    path, _model = RISK_MODEL_PATH, load_pickle_model()
+                print(f"Модель риска загружена за {(time.perf_counter() - started) * 1000:.1f} мс: {path}")
+    return _model
+
+
+def risk_levels(scores: np.ndarray) -> np.ndarray:
+    return np.select(
+        [scores >= threshold for threshold, _ in RISK_LEVELS],
+        [level for _, level in RISK_LEVELS],
+        default="none",
+    )
+
+
+def tenders_to_frame(tenders: List[TenderRiskItem], model: TenderRiskModel) -> pd.DataFrame:
+    return pd.DataFrame({
+        "ID": [t.id for t in tenders],
+        ORGANIZER_COL: [t.organizer for t in tenders],
+        model.text_col: [t.name for t in tenders],
+        model.price_col: [t.price for t in tenders],
+        model.invited_col: [t.invited_supplier for t in tenders],
+        model.method_col: [t.method for t in tenders],
+        model.start_date_col: [t.start_date for t in tenders],
+        model.end_date_col: [t.end_date for t in tenders],
+    })
+
+
+def _column(df: pd.DataFrame, name: str, dtype) -> list:
+    """Колонка как список python-значений (int/float/bool/str) для JSON и Firestore."""
+    return df[name].to_numpy(dtype=dtype).tolist()
+
+
+def _optional_floats(df: pd.DataFrame, name: str) -> list:
+    """float-колонка, где NaN -> None."""
+    values = df[name].to_numpy(dtype=np.float64)
+    out = values.astype(object)
+    out[np.isnan(values)] = None
+    return out.tolist()
+
+
+def _risk_columns(df: pd.DataFrame) -> Dict[str, list]:
+    """Общие колонки ответа: счёт, уровень, флаг, кластер и флаги правил."""
+    scores = df["risk_score"].to_numpy(dtype=np.int64)
+    return {
+        "risk_score": scores.tolist(),
+        "risk_level": risk_levels(scores).tolist(),
+        "risk_flag": _column(df, "risk_flag", bool),
+        "cluster": _column(df, "cluster", np.int64),
+        **{flag: _column(df, flag, bool) for flag in RISK_DOCUMENT_FLAGS},
+    }
+
+
+def _pair_keys(df: pd.DataFrame, model: TenderRiskModel) -> Tuple[list, list]:
+    """(организаторы, приглашённые поставщики или None) — ключи графа поставщиков."""
+    suppliers = [
+        supplier if present else None
+        for supplier, present in zip(df[model.invited_col].tolist(), df["has_invited_supplier"].tolist())
+    ]
+    return df[ORGANIZER_COL].tolist(), suppliers
+
+
+def _pair_rows(df: pd.DataFrame, model: TenderRiskModel) -> list:
+    """Строки для SupplierGraph.record: (ID, организатор, поставщик, сумма, из одного источника)."""
+    organizers, suppliers = _pair_keys(df, model)
+    return list(zip(
+        df["ID"].tolist(), organizers, suppliers,
+        _column(df, model.price_col, np.float64), _column(df, "suspicious_method", bool),
+    ))
+
+
+def _record_pairs(df: pd.DataFrame, model: TenderRiskModel) -> int:
+    return SUPPLIER_GRAPH.record(_pair_rows(df, model))
+
+
+def _pair_columns(df: pd.DataFrame, model: TenderRiskModel, own_pairs: bool = False) -> Dict[str, list]:
+    """Колонки SUPPLIER_PAIR_FIELDS: частота пары и её доля — поиском в графе за O(1).
+
+    own_pairs=True учитывает и пары самой пачки, не внося их в граф.
+    """
+    pending = _pair_rows(df, model) if own_pairs else None
+    return SUPPLIER_GRAPH.pair_columns(*_pair_keys(df, model), pending=pending)
+
+
+def documents_to_frame(items: List[Dict], model: TenderRiskModel) -> pd.DataFrame:
+    """Документы Firestore уже в схеме модели (имена полей goszakup)."""
+    return pd.DataFrame({
+        "ID": [item.get("ID") for item in items],
+        ORGANIZER_COL: [item.get(ORGANIZER_COL) for item in items],
+        model.text_col: [item.get(model.text_col) for item in items],
+        model.price_col: [clean_price(item.get(model.price_col)) for item in items],
+        model.invited_col: [item.get(model.invited_col) for item in items],
+        model.method_col: [item.get(model.method_col) for item in items],
+        model.start_date_col: [item.get(model.start_date_col) for item in items],
+        model.end_date_col: [item.get(model.end_date_col) for item in items],
+    })
+
+
+def score_documents(items: List[Dict], own_pairs: bool = False) -> List[Dict]:
+    """Поля риска (RISK_DOCUMENT_FIELDS) для каждого документа, одним predict на пачку.
+
+    own_pairs=True (ingest) считает пары организатор — поставщик так, будто пачка уже
+    в графе; сам граф не меняется — вносить записанные тендеры через record_supplier_pairs.
+    """
+    if not items:
+        return []
+    model = get_risk_model()
+    df = model.predict(documents_to_frame(items, model))
+    columns = {**_risk_columns(df), **_pair_columns(df, model, own_pairs)}
+    fields = [columns[name] for name in RISK_DOCUMENT_FIELDS]
+    return [dict(zip(RISK_DOCUMENT_FIELDS, values)) for values in zip(*fields)]
+
+
+def record_supplier_pairs(items: List[Dict]) -> int:
+    """Вносит документы в граф поставщиков без predict (заполнение графа по истории)."""
+    if not items:
+        return 0
+    model = get_risk_model()
+    df = documents_to_frame(items, model)
+    df[model.invited_col] = clean_invited(df[model.invited_col])
+    df["has_invited_supplier"] = has_invited(df[model.invited_col])
+    df["suspicious_method"] = is_single_source(df[model.method_col])
+    return _record_pairs(df, model)
+
+
+def score_tenders(tenders: List[TenderRiskItem]) -> Dict[str, Any]:
+    """Синхронный скоринг пачки; из async-кода вызывать через asyncio.to_thread."""
+    if not tenders:
+        return {"tenders": []}
+    model = get_risk_model()
+    df = model.predict(tenders_to_frame(tenders, model))
+
+    # ответ собирается по колонкам, python-цикл только склеивает готовые значения
+    columns = _risk_columns(df)
+    pairs = _pair_columns(df, model)
+    features = zip(
+        _column(df, model.price_col, np.float64),
+        columns["cluster"],
+        *(columns[flag] for flag in RISK_DOCUMENT_FLAGS),
+        *(_optional_floats(df, name) for name in RESPONSE_STATS),
+        *(pairs[name] for name in SUPPLIER_PAIR_FIELDS),
+    )
+    results = [
+        {
+            "id": tender_id,
+            "risk_score": score,
+            "risk_flag": flag,
+            "risk_level": level,
+            "features": dict(zip(RESPONSE_FEATURES, values)),
+        }
+        for tender_id, score, flag, level, values in zip(
+            df["ID"].tolist(), columns["risk_score"], columns["risk_flag"], columns["risk_level"], features
+        )
+    ]
+    return {"tenders": results}
@@ -0,0 +1,382 @@
+"""Инкрементальное дообучение модели риска без полного переобучения.
+
+Ноутбук обучает TenderRiskModel целиком: TF-IDF + KMeans(n_init=10) по всему
+датасету и квартили цены через groupby().quantile() — весь корпус в памяти.
+Здесь данные идут потоком по чанкам:
+
+* центроиды — MiniBatchKMeans.partial_fit, стартующий с текущих центроидов
+  (номера кластеров остаются за теми же центроидами, словарь TF-IDF не меняется).
+  Текущие — из артефакта, то есть каждый refit продолжает предыдущий; pickle
+  ноутбука — только стартовая точка, пока артефакта нет;
+* q1 / median / q3 по кластеру — слияемые t-digest (ClusterPriceSketches),
+  которые сохраняются рядом с моделью. После очередного обновления тендеров
+  новые цены вливаются в них, и границы IQR пересчитываются за секунды.
+
+    # центроиды + скетчи по выгрузке тендеров (CSV в схеме goszakup)
+    python -m services.risk_training refit tenders.csv [--chunk 5000]
+
+    # только границы цены: новые тендеры вливаются в сохранённые скетчи
+    python -m services.risk_training update-bounds new_tenders.csv
+
+    # скетчи заново по полной выгрузке (точный старт вместо засева)
+    python -m services.risk_training update-bounds tenders.csv --rebuild
+
+Результат пишется в артефакт (services/risk_artifact.py); работающие процессы
+подхватывают его при перезапуске.
+
+В чистом репозитории нет ни артефакта, ни скетчей: update-bounds экспортирует
+артефакт из pickle, а скетчи засевает из его таблицы IQR — квартили каждого
+кластера с весом RISK_SKETCH_SEED_WEIGHT тендеров (сколько цен стояло за
+таблицей, pickle не хранит). Засеянные границы сдвигаются новыми ценами
+приблизительно; точные скетчи даёт --rebuild по полной выгрузке или refit.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.risk_model import MODELS_DIR, RISK_MODEL_ARTIFACT, RISK_MODEL_PATH, TenderRiskModel, clean_price
+
+RISK_SKETCH_PATH = os.getenv("RISK_SKETCH_PATH", os.path.join(MODELS_DIR, "tender_risk_sketches.npz"))
+# δ t-digest: ~δ/2 центроидов на кластер, погрешность квантилей около 1/δ по рангу
+TDIGEST_COMPRESSION = int(os.getenv("TDIGEST_COMPRESSION", 200))
+TDIGEST_BUFFER = 4096
+REFIT_CHUNK_SIZE = int(os.getenv("RISK_REFIT_CHUNK_SIZE", 5000))
+# сколько тендеров на кластер «весит» таблица IQR, из которой засеваются скетчи
+RISK_SKETCH_SEED_WEIGHT = float(os.getenv("RISK_SKETCH_SEED_WEIGHT", 1000))
+STATS_COLUMNS = ["q1", "median", "q3", "iqr", "upper_bound", "lower_bound"]
+
+
+# ------------------------- T-DIGEST -------------------------
+
+class TDigest:
+    """Слияемый t-digest (Dunning) со шкалой k1: центроиды мельче к хвостам."""
+
+    def __init__(self, compression: int = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer = []
+
+    @property
+    def count(self) -> float:
+        self._flush()
+        return float(self.weights.sum())
+
+    def update(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self._buffer.append(values)
+            if sum(len(b) for b in self._buffer) >= TDIGEST_BUFFER:
+                self._flush()
+
+    def merge(self, other: "TDigest"):
+        other._flush()
+        self._compress(other.means, other.weights)
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+
+    def _flush(self):
+        if self._buffer:
+            values = np.concatenate(self._buffer)
+            self._buffer = []
+            self.min, self.max = min(self.min, values.min()), max(self.max, values.max())
+            self._compress(values, np.ones_like(values))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        if not means.size:
+            return
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order].tolist(), weights[order].tolist()
+        total = sum(weights)
+        # жадное слияние: центроид растёт, пока покрывает не больше 1 по шкале k
+        out_means, out_weights = [means[0]], [weights[0]]
+        left = 0.0
+        k_left = self._k(0.0)
+        for m, w in zip(means[1:], weights[1:]):
+            if self._k((left + out_weights[-1] + w) / total) - k_left <= 1:
+                merged = out_weights[-1] + w
+                out_means[-1] += (m - out_means[-1]) * w / merged
+                out_weights[-1] = merged
+            else:
+                left += out_weights[-1]
+                k_left = self._k(left / total)
+                out_means.append(m)
+                out_weights.append(w)
+        self.means = np.array(out_means)
+        self.weights = np.array(out_weights)
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def quantile(self, q) -> np.ndarray:
+        self._flush()
+        if not self.weights.size:
+            return np.full(np.shape(q), np.nan)
+        if self.weights.max() == 1:
+            # маленький кластер хранится точно — квантили как у pandas (линейная интерполяция)
+            return np.quantile(self.means, q)
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return np.interp(
+            np.asarray(q) * total,
+            np.r_[0.0, centers, total],
+            np.r_[self.min, self.means, self.max],
+        )
+
+
+class ClusterPriceSketches:
+    """t-digest цены на каждый кластер; сохраняются в один .npz."""
+
+    def __init__(self, compression: int = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.digests: Dict[int, TDigest] = {}
+
+    def update(self, clusters: np.ndarray, prices: np.ndarray):
+        clusters = np.asarray(clusters)
+        prices = np.asarray(prices, dtype=np.float64)
+        for cluster in np.unique(clusters).tolist():
+            digest = self.digests.setdefault(cluster, TDigest(self.compression))
+            digest.update(prices[clusters == cluster])
+
+    def merge(self, other: "ClusterPriceSketches"):
+        for cluster, digest in other.digests.items():
+            self.digests.setdefault(cluster, TDigest(self.compression)).merge(digest)
+
+    def stats_frame(self, previous: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Та же таблица, что cluster_price_stats_ в ноутбуке.
+
+        Кластер без цен (пустой скетч) получает строку из previous — прежней
+        таблицы модели; без неё его в таблице нет, как и в ноутбуке.
+        """
+        clusters = sorted(c for c, digest in self.digests.items() if digest.count)
+        quartiles = np.array([self.digests[c].quantile([0.25, 0.5, 0.75]) for c in clusters]).reshape(-1, 3)
+        stats = pd.DataFrame(
+            quartiles, columns=["q1", "median", "q3"], index=pd.Index(np.array(clusters, dtype=np.int32), name="cluster")
+        )
+        stats["iqr"] = stats["q3"] - stats["q1"]
+        stats["upper_bound"] = stats["q3"] + 1.5 * stats["iqr"]
+        stats["lower_bound"] = stats["q1"] - 1.5 * stats["iqr"]
+        if previous is not None:
+            stats = stats.combine_first(previous[STATS_COLUMNS])
+            stats.index = stats.index.astype(np.int32)
+        return stats[STATS_COLUMNS]
+
+    @classmethod
+    def from_stats(cls, stats: pd.DataFrame, weight: float = RISK_SKETCH_SEED_WEIGHT) -> "ClusterPriceSketches":
+        """Скетчи, квартили которых равны q1 / median / q3 таблицы (cluster_price_stats_).
+
+        Центроиды q1, q1, median, q3, q3 с весами 1:2:2:2:1 — их центры масс ровно
+        на 1/4, 1/2 и 3/4 веса; хвосты за квартилями неизвестны, min/max — q1/q3.
+        """
+        sketches = cls()
+        shares = np.array([1, 2, 2, 2, 1]) / 8
+        for cluster, row in stats.dropna(subset=["q1", "median", "q3"]).iterrows():
+            digest = TDigest(sketches.compression)
+            digest.means = np.array([row["q1"], row["q1"], row["median"], row["q3"], row["q3"]], dtype=np.float64)
+            digest.weights = shares * weight
+            digest.min, digest.max = float(row["q1"]), float(row["q3"])
+            sketches.digests[int(cluster)] = digest
+        return sketches
+
+    def save(self, path: str = RISK_SKETCH_PATH):
+        clusters = sorted(self.digests)
+        for c in clusters:
+            self.digests[c]._flush()
+        sizes = [self.digests[c].means.size for c in clusters]
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                compression=np.array(self.compression),
+                clusters=np.array(clusters, dtype=np.int32),
+                offsets=np.r_[0, np.cumsum(sizes)].astype(np.int64),
+                means=np.concatenate([self.digests[c].means for c in clusters] or [np.empty(0)]),
+                weights=np.concatenate([self.digests[c].weights for c in clusters] or [np.empty(0)]),
+                bounds=np.array([[self.digests[c].min, self.digests[c].max] for c in clusters]).reshape(-1, 2),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = RISK_SKETCH_PATH) -> "ClusterPriceSketches":
+        with np.load(path) as data:
+            sketches = cls(int(data["compression"]))
+            offsets = data["offsets"]
+            for i, cluster in enumerate(data["clusters"].tolist()):
+                digest = TDigest(sketches.compression)
+                digest.means = data["means"][offsets[i]:offsets[i + 1]].copy()
+                digest.weights = data["weights"][offsets[i]:offsets[i + 1]].copy()
+                digest.min, digest.max = data["bounds"][i].tolist()
+                sketches.digests[cluster] = digest
+        return sketches
+
+
+# ------------------------- REFIT -------------------------
+
+def clean_chunk(df: pd.DataFrame, model: TenderRiskModel) -> pd.DataFrame:
+    """Как при обучении в ноутбуке: цена к числу, строки без цены или с ценой <= 0 отбрасываются."""
+    df = df.copy()
+    df[model.price_col] = df[model.price_col].map(clean_price)
+    return df[df[model.price_col] > 0]
+
+
+def model_from_artifact(path: str) -> Tuple[TenderRiskModel, np.ndarray]:
+    """Артефакт как стартовая точка refit: (модель с TF-IDF того же словаря и idf, центроиды).
+
+    KMeans в модели нет — его заменит MiniBatchKMeans тренера.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from services.risk_artifact import load_artifact
+
+    artifact = load_artifact(path)
+    meta = artifact.meta
+    model = TenderRiskModel(**meta["columns"], n_clusters=meta["n_clusters"], risk_threshold=meta["risk_threshold"])
+    model.tfidf = TfidfVectorizer(
+        token_pattern=meta["tfidf"]["token_pattern"],
+        ngram_range=tuple(meta["tfidf"]["ngram_range"]),
+        lowercase=meta["tfidf"]["lowercase"],
+        norm=meta["tfidf"]["norm"],
+        vocabulary=artifact.vocabulary,
+    )
+    model.tfidf.idf_ = np.array(artifact.idf)
+    model.cluster_price_stats_ = artifact.cluster_price_stats_.copy()
+    return model, np.array(artifact.centers)
+
+
+class IncrementalRiskTrainer:
+    """partial_fit центроидов по чанкам + цены в скетчи по кластерам.
+
+    centers — стартовые центроиды, по умолчанию из model.kmeans.
+    previous — сохранённые скетчи: кластер, в который в этот раз не попало ни
+    одного тендера, берёт скетч оттуда, а без него — строку прежней таблицы IQR.
+    """
+
+    def __init__(
+        self,
+        model: TenderRiskModel,
+        batch_size: int = 1024,
+        random_state: int = 42,
+        previous: Optional[ClusterPriceSketches] = None,
+        centers: Optional[np.ndarray] = None,
+    ):
+        from sklearn.cluster import MiniBatchKMeans
+
+        if centers is None:
+            centers = model.kmeans.cluster_centers_
+        self.model = model
+        self.previous = previous
+        self.kmeans = MiniBatchKMeans(
+            n_clusters=len(centers),
+            init=np.asarray(centers),
+            n_init=1,
+            # без случайного переназначения редких центроидов — иначе номера кластеров «переезжают»
+            reassignment_ratio=0.0,
+            batch_size=batch_size,
+            random_state=random_state,
+        )
+        self.sketches = ClusterPriceSketches()
+        self.rows = 0
+
+    def partial_fit(self, df: pd.DataFrame):
+        df = clean_chunk(df, self.model)
+        if df.empty:
+            return self
+        X = self.model.tfidf.transform(df[self.model.text_col].fillna(""))
+        self.kmeans.partial_fit(X)
+        # цены идут в кластер по уже обновлённым центроидам
+        self.sketches.update(self.kmeans.predict(X), df[self.model.price_col].to_numpy())
+        self.rows += len(df)
+        return self
+
+    def finalize(self) -> TenderRiskModel:
+        if self.previous is not None:
+            for cluster, digest in self.previous.digests.items():
+                current = self.sketches.digests.get(cluster)
+                if (current is None or not current.count) and digest.count:
+                    self.sketches.digests[cluster] = digest
+        self.model.kmeans = self.kmeans
+        self.model.cluster_price_stats_ = self.sketches.stats_frame(previous=self.model.cluster_price_stats_)
+        return self.model
+
+
+def read_chunks(path: str, chunk_size: int = REFIT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def update_bounds(model: TenderRiskModel, sketches: ClusterPriceSketches, chunks: Iterable[pd.DataFrame]) -> int:
+    """Вливает цены новых тендеров в скетчи (кластер — текущей моделью)."""
+    rows = 0
+    for df in chunks:
+        df = clean_chunk(df, model)
+        if df.empty:
+            continue
+        clusters = model.predict_clusters(df[model.text_col].fillna(""))
+        sketches.update(clusters, df[model.price_col].to_numpy())
+        rows += len(df)
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+    refit = sub.add_parser("refit", help="центроиды (partial_fit) и скетчи цены заново по выгрузке")
+    refit.add_argument("csv")
+    bounds = sub.add_parser("update-bounds", help="влить новые цены в скетчи и обновить границы IQR")
+    bounds.add_argument("csv")
+    bounds.add_argument("--rebuild", action="store_true", help="скетчи заново по csv (полная выгрузка)")
+    for p in (refit, bounds):
+        p.add_argument("--pkl", default=RISK_MODEL_PATH, help="стартовая модель, пока артефакта ещё нет")
+        p.add_argument("--artifact", default=RISK_MODEL_ARTIFACT)
+        p.add_argument("--sketches", default=RISK_SKETCH_PATH)
+        p.add_argument("--chunk", type=int, default=REFIT_CHUNK_SIZE)
+    args = ap.parse_args(argv)
+
+    from services.risk_artifact import export_artifact, load_artifact, update_artifact_stats
+    from services.risk_model import load_pickle_model
+
+    started = time.perf_counter()
+    if args.command == "refit":
+        previous = ClusterPriceSketches.load(args.sketches) if os.path.exists(args.sketches) else None
+        if os.path.isdir(args.artifact):
+            # продолжаем с результата прошлого refit / update-bounds
+            model, centers = model_from_artifact(args.artifact)
+        else:
+            model, centers = load_pickle_model(args.pkl), None
+        trainer = IncrementalRiskTrainer(model, previous=previous, centers=centers)
+        for chunk in read_chunks(args.csv, args.chunk):
+            trainer.partial_fit(chunk)
+        export_artifact(trainer.finalize(), args.artifact)
+        trainer.sketches.save(args.sketches)
+        rows = trainer.rows
+    else:
+        if not os.path.isdir(args.artifact):
+            export_artifact(load_pickle_model(args.pkl), args.artifact, source_path=args.pkl)
+            print(f"Артефакта не было — экспортирован из {args.pkl}")
+        model = load_artifact(args.artifact)
+        if args.rebuild:
+            sketches = ClusterPriceSketches()
+        elif os.path.exists(args.sketches):
+            sketches = ClusterPriceSketches.load(args.sketches)
+        else:
+            sketches = ClusterPriceSketches.from_stats(model.cluster_price_stats_, RISK_SKETCH_SEED_WEIGHT)
+            print(f"Скетчей не было — засеяны из таблицы IQR артефакта (вес {RISK_SKETCH_SEED_WEIGHT:g} на кластер)")
+        rows = update_bounds(model, sketches, read_chunks(args.csv, args.chunk))
+        update_artifact_stats(args.artifact, sketches.stats_frame(previous=model.cluster_price_stats_))
+        sketches.save(args.sketches)
+    print(f"{args.command}: {rows} тендеров за {time.perf_counter() - started:.1f} сек -> {args.artifact}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,42 @@
 import asyncio
+import os
+from typing import Optional
+from parsers.ai_procure_parser import shutdown_parse_pool
 from services.tenders_refresh_service import refresh_tenders_once
 import logging
-REFRESH_INTERVAL_SECONDS = 3 * 60 * 60  # 3 часа
+# с инкрементальным парсингом интервал можно сократить до минут
+REFRESH_INTERVAL_SECONDS = int(os.getenv("TENDERS_REFRESH_INTERVAL_SECONDS", 3 * 60 * 60))
 
 logger = logging.getLogger(__name__)
 
+_scheduler_task: Optional[asyncio.Task] = None
+
 async def start_tenders_scheduler():
     while True:
         try:
             logger.info("=== Scheduled tender refresh START ===")
             result = await refresh_tenders_once()
             logger.info("=== Scheduled tender refresh DONE: %s ===", result)
+        except asyncio.CancelledError:
+            logger.info("=== Scheduled tender refresh CANCELLED ===")
+            raise
         except Exception:
             logger.exception("Ошибка во время обновления тендеров")
         await asyncio.sleep(REFRESH_INTERVAL_SECONDS)
+
+def run_tenders_scheduler() -> asyncio.Task:
+    global _scheduler_task
+    _scheduler_task = asyncio.create_task(start_tenders_scheduler())
+    return _scheduler_task
+
+async def stop_tenders_scheduler():
+    """Хук остановки: отменяет текущее обновление и освобождает пул парсинга."""
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        _scheduler_task = None
+    shutdown_parse_pool()
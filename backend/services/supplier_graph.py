@@ -0,0 +1,280 @@
+"""Граф «организатор — приглашённый поставщик» для сигналов сговора.
+
+Флаг has_invited_supplier модели риска не видит главного: один и тот же
+поставщик у одного и того же организатора во многих закупках из одного
+источника. SUPPLIER_GRAPH — двудольный граф с рёбрами (организатор, поставщик):
+число тендеров, из них из одного источника, и сумма. Граф обновляется при
+ingest — только тендерами, которые действительно записаны в Firestore
+(record_supplier_pairs после записи), а скоринг берёт частоту пары и её долю
+в закупках организатора из одного источника из словарей за O(1), без
+просмотра истории. Пары ещё не записанной пачки учитываются в её признаках
+без изменения графа (pair_columns(..., pending=...)).
+
+Вклад каждого тендера хранится в SQLite (SUPPLIER_GRAPH_PATH), поэтому
+повторный ingest того же тендера не удваивает рёбра, а изменённый тендер
+переносит вклад на новую пару. Рёбра собираются в памяти при первом обращении.
+Заполнить граф по уже сохранённым тендерам — services/risk_backfill.py --supplier-graph.
+"""
+
+import heapq
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SUPPLIER_GRAPH_PATH = os.getenv(
+    "SUPPLIER_GRAPH_PATH", os.path.join(os.getenv("SCRAPER_DATA_DIR", "data"), "supplier_graph.sqlite3")
+)
+# repeated_supplier_pair: у пары не меньше стольких закупок из одного источника
+# и не меньше такой доли всех закупок организатора из одного источника
+SUPPLIER_PAIR_MIN_TENDERS = int(os.getenv("SUPPLIER_PAIR_MIN_TENDERS", 3))
+SUPPLIER_PAIR_MIN_SHARE = float(os.getenv("SUPPLIER_PAIR_MIN_SHARE", 0.5))
+SUPPLIER_PAIR_FIELDS = (
+    "supplier_pair_tenders",
+    "supplier_pair_single_source",
+    "supplier_pair_share",
+    "repeated_supplier_pair",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenders (
+    tender_id TEXT PRIMARY KEY,
+    organizer TEXT NOT NULL,
+    organizer_name TEXT NOT NULL,
+    supplier TEXT,
+    supplier_name TEXT,
+    amount REAL NOT NULL,
+    single_source INTEGER NOT NULL
+);
+"""
+
+# вклад тендера: (организатор, поставщик или None, сумма, из одного источника)
+Contribution = Tuple[str, Optional[str], float, bool]
+
+
+def name_key(value) -> str:
+    """Ключ имени, как в tender_sources.dedup_key: слова в нижнем регистре."""
+    if not isinstance(value, str):
+        # None и NaN из колонок pandas
+        value = "" if value is None or value != value else str(value)
+    return " ".join(re.findall(r"\w+", value.lower()))
+
+
+class SupplierGraph:
+    def __init__(self, path: Optional[str] = SUPPLIER_GRAPH_PATH):
+        # path=None — граф только в памяти (бенчмарки)
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._tenders: Dict[str, Contribution] = {}
+        # организатор -> [тендеров, из одного источника, сумма] (все его тендеры)
+        self.organizers: Dict[str, List] = {}
+        # организатор -> поставщик -> [тендеров, из одного источника, сумма]
+        self.edges: Dict[str, Dict[str, List]] = {}
+        self.names: Dict[str, str] = {}
+        self.recorded = 0
+
+    def load(self):
+        with self._lock:
+            self._ensure_loaded()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None:
+            return
+        started = time.perf_counter()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # запись идёт из потоков ingest, чтение — из потоков скоринга; доступ под self._lock
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        rows = self.conn.execute(
+            "SELECT tender_id, organizer, organizer_name, supplier, supplier_name, amount, single_source FROM tenders"
+        )
+        for tender_id, organizer, organizer_name, supplier, supplier_name, amount, single in rows:
+            entry = (organizer, supplier, amount, bool(single))
+            self._tenders[tender_id] = entry
+            self._apply(entry, 1)
+            self.names.setdefault(organizer, organizer_name)
+            if supplier:
+                self.names.setdefault(supplier, supplier_name)
+        print(
+            f"Граф поставщиков загружен за {(time.perf_counter() - started) * 1000:.1f} мс: "
+            f"{len(self._tenders)} тендеров, {sum(len(e) for e in self.edges.values())} пар"
+        )
+
+    def _apply(self, entry: Contribution, sign: int):
+        organizer, supplier, amount, single = entry
+        stats = self.organizers.setdefault(organizer, [0, 0, 0.0])
+        stats[0] += sign
+        stats[1] += sign * single
+        stats[2] += sign * amount
+        if stats[0] == 0:
+            del self.organizers[organizer]
+        if not supplier:
+            return
+        suppliers = self.edges.setdefault(organizer, {})
+        edge = suppliers.setdefault(supplier, [0, 0, 0.0])
+        edge[0] += sign
+        edge[1] += sign * single
+        edge[2] += sign * amount
+        if edge[0] == 0:
+            del suppliers[supplier]
+            if not suppliers:
+                del self.edges[organizer]
+
+    @staticmethod
+    def _entries(rows: Iterable[Tuple]):
+        """(ID, имя организатора, имя поставщика, вклад) для строк, которые можно внести в граф."""
+        for tender_id, organizer_name, supplier_name, amount, single in rows:
+            # ID как у документа в Firestore (upsert_many), иначе тендер посчитается дважды
+            tender_id = str(tender_id or "").strip()
+            organizer = name_key(organizer_name)
+            if not tender_id or not organizer:
+                continue
+            supplier = name_key(supplier_name) or None
+            # NaN в сумме (не разобралась) считаем нулём, иначе вклад не сравнить
+            amount = float(amount) if amount is not None and amount == amount else 0.0
+            yield tender_id, organizer_name, supplier_name, (organizer, supplier, amount, bool(single))
+
+    def record(self, rows: Iterable[Tuple]) -> int:
+        """rows — (ID, организатор, поставщик или None, сумма, из одного источника).
+
+        Возвращает число тендеров, чей вклад в граф изменился.
+        """
+        changed = []
+        with self._lock:
+            self._ensure_loaded()
+            for tender_id, organizer_name, supplier_name, entry in self._entries(rows):
+                organizer, supplier = entry[0], entry[1]
+                old = self._tenders.get(tender_id)
+                if old == entry:
+                    continue
+                if old is not None:
+                    self._apply(old, -1)
+                self._apply(entry, 1)
+                self._tenders[tender_id] = entry
+                self.names.setdefault(organizer, str(organizer_name).strip())
+                if supplier:
+                    self.names.setdefault(supplier, str(supplier_name).strip())
+                changed.append((
+                    tender_id, organizer, self.names[organizer], supplier,
+                    self.names.get(supplier), entry[2], int(entry[3]),
+                ))
+            if changed and self.conn is not None:
+                self.conn.executemany("INSERT OR REPLACE INTO tenders VALUES (?, ?, ?, ?, ?, ?, ?)", changed)
+                self.conn.commit()
+            self.recorded += len(changed)
+        return len(changed)
+
+    def pair_columns(
+        self, organizers: Iterable, suppliers: Iterable, pending: Optional[Iterable[Tuple]] = None
+    ) -> Dict[str, list]:
+        """Колонки SUPPLIER_PAIR_FIELDS для пар (организатор, поставщик); поставщик None — пары нет.
+
+        pending — строки как у record(): учитываются так, будто уже внесены,
+        но граф после подсчёта остаётся прежним (пачка ещё не записана).
+        """
+        with self._lock:
+            self._ensure_loaded()
+            # прежние значения затронутых счётчиков: откат точный, без погрешности float
+            saved_organizers: Dict[str, Optional[list]] = {}
+            saved_edges: Dict[Tuple[str, str], Optional[list]] = {}
+            overlay: Dict[str, Contribution] = {}
+            for tender_id, _, _, entry in self._entries(pending or ()):
+                old = overlay.get(tender_id, self._tenders.get(tender_id))
+                if old == entry:
+                    continue
+                for organizer, supplier, _, _ in filter(None, (old, entry)):
+                    if organizer not in saved_organizers:
+                        stats = self.organizers.get(organizer)
+                        saved_organizers[organizer] = stats and list(stats)
+                    if supplier and (organizer, supplier) not in saved_edges:
+                        edge = self.edges.get(organizer, {}).get(supplier)
+                        saved_edges[organizer, supplier] = edge and list(edge)
+                if old is not None:
+                    self._apply(old, -1)
+                self._apply(entry, 1)
+                overlay[tender_id] = entry
+            try:
+                return self._pair_columns(organizers, suppliers)
+            finally:
+                for organizer, stats in saved_organizers.items():
+                    if stats is None:
+                        self.organizers.pop(organizer, None)
+                    else:
+                        self.organizers[organizer] = stats
+                for (organizer, supplier), edge in saved_edges.items():
+                    suppliers = self.edges.setdefault(organizer, {})
+                    if edge is None:
+                        suppliers.pop(supplier, None)
+                    else:
+                        suppliers[supplier] = edge
+                    if not suppliers:
+                        del self.edges[organizer]
+
+    def _pair_columns(self, organizers: Iterable, suppliers: Iterable) -> Dict[str, list]:
+        columns = {name: [] for name in SUPPLIER_PAIR_FIELDS}
+        for organizer_name, supplier_name in zip(organizers, suppliers):
+            organizer = name_key(organizer_name)
+            edge = self.edges.get(organizer, {}).get(name_key(supplier_name))
+            if edge is None:
+                tenders, single, share = 0, 0, 0.0
+            else:
+                tenders, single = edge[0], edge[1]
+                organizer_single = self.organizers[organizer][1]
+                share = round(single / organizer_single, 4) if organizer_single else 0.0
+            columns["supplier_pair_tenders"].append(tenders)
+            columns["supplier_pair_single_source"].append(single)
+            columns["supplier_pair_share"].append(share)
+            columns["repeated_supplier_pair"].append(
+                single >= SUPPLIER_PAIR_MIN_TENDERS and share >= SUPPLIER_PAIR_MIN_SHARE
+            )
+        return columns
+
+    def top_suppliers(self, organizer_name: str, limit: int = 10) -> Optional[Dict]:
+        """Поставщики организатора по числу закупок из одного источника, затем по сумме."""
+        organizer = name_key(organizer_name)
+        with self._lock:
+            self._ensure_loaded()
+            stats = self.organizers.get(organizer)
+            if stats is None:
+                return None
+            suppliers = self.edges.get(organizer, {})
+            top = heapq.nlargest(limit, suppliers.items(), key=lambda kv: (kv[1][1], kv[1][2]))
+            return {
+                "organizer": self.names.get(organizer, organizer_name),
+                "tenders": stats[0],
+                "single_source": stats[1],
+                "amount": stats[2],
+                "suppliers_total": len(suppliers),
+                "suppliers": [
+                    {
+                        "supplier": self.names.get(supplier, supplier),
+                        "tenders": edge[0],
+                        "single_source": edge[1],
+                        "amount": edge[2],
+                        "share": round(edge[1] / stats[1], 4) if stats[1] else 0.0,
+                    }
+                    for supplier, edge in top
+                ],
+            }
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "tenders": len(self._tenders),
+                "organizers": len(self.organizers),
+                "pairs": sum(len(e) for e in self.edges.values()),
+                "recorded": self.recorded,
+            }
+
+
+SUPPLIER_GRAPH = SupplierGraph()
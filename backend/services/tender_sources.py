@@ -0,0 +1,171 @@
+"""Источники тендеров для ingest: goszakup.gov.kz и reestr.nadloc.kz.
+
+Источник — `async def scrape(on_record) -> int`; записи nadloc приводятся к
+схеме документа Firestore (имена полей goszakup), каждая запись помечается
+полем SOURCE_FIELD и получает DEDUP_FIELD — ключ для дедупликации одного и
+того же тендера, опубликованного в обоих реестрах.
+"""
+
+import hashlib
+import os
+import re
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from db.firestore_repo import DEDUP_FIELD, SOURCE_FIELD
+from parsers.ai_procure_parser import get_parse_pool, scrape_tenders
+from parsers.ultimate_parser import AdvancedTenderParser
+
+INGEST_SOURCES = tuple(s.strip() for s in os.getenv("INGEST_SOURCES", "goszakup,nadloc").split(",") if s.strip())
+# 0 — все страницы реестра (последняя определяется по пагинации)
+NADLOC_PAGES = int(os.getenv("NADLOC_PAGES", 3))
+NADLOC_ID_PREFIX = "nadloc-"
+
+# строка списка nadloc -> поля goszakup
+NADLOC_LIST_FIELDS = {
+    "description": "Наименование объявления",
+    "detail_link": "Ссылка",
+    "lots": "Лотов",
+    "customer": "Организатор",
+    "method": "Способ",
+    "purchase_amount": "Сумма, тг.",
+    "planned_amount": "Плановая сумма, тг.",
+    "status": "Статус",
+    "dates": "Даты",
+}
+
+# детали nadloc (протокол / объявление) -> поля документа
+NADLOC_DETAIL_FIELDS = {
+    "customer_name": "Общие_Организатор",
+    "customer_location": "Организатор_Местонахождение",
+    "purchase_basis": "Детали_Основание закупа",
+    "lots_description": "Детали_Лоты",
+    "total_lots": "Детали_Количество лотов",
+    "skp_items": "Детали_Позиции СКП",
+    "licenses": "Детали_Лицензии",
+    "winner_supplier": "Детали_Победитель",
+    "winner_address": "Детали_Адрес победителя",
+    "winner_price": "Детали_Цена победителя, тг.",
+    "local_content": "Детали_Местное содержание",
+    "suppliers": "Детали_Поставщики",
+    "all_prices": "Детали_Предложенные цены",
+    "purchase_code": "Детали_Код закупки",
+    "web_resource": "Детали_Веб-ресурс",
+    "purchase_items": "Детали_Предмет закупа",
+    "total_items": "Детали_Количество позиций",
+    "submission_start": "Детали_Срок начала приема",
+    "submission_end": "Детали_Срок окончания приема",
+    "opening_date": "Детали_Дата вскрытия",
+    "contact_email": "Детали_Email",
+    "contact_phone": "Детали_Телефон",
+    "local_content_requirement": "Детали_Требование по местному содержанию",
+    "contract_deadline": "Детали_Срок заключения договора",
+    "signed_by": "Детали_Подписал",
+    "signed_date": "Детали_Дата подписи",
+}
+
+NADLOC_TYPES = {"completed": "Завершенный", "published": "Опубликованный"}
+
+
+# ------------------------- SCRAPERS -------------------------
+
+async def scrape_goszakup(on_record: Callable[[Dict], Awaitable]) -> int:
+    return await scrape_tenders(on_record)
+
+
+async def scrape_nadloc(on_record: Callable[[Dict], Awaitable]) -> int:
+    """Строка списка вместе с деталями: {**строка, "type": ..., "detail": {...}}.
+    Детальные страницы разбираются в общем пуле процессов, чтобы не тормозить
+    цикл событий, в котором параллельно идёт goszakup."""
+    emitted = 0
+
+    async def on_tender(tender, result):
+        nonlocal emitted
+        emitted += 1
+        await on_record({**tender, "type": result.get("type"), "detail": result.get("data") or {}})
+
+    async with AdvancedTenderParser(
+        output_dir=None,
+        keep_in_memory=False,
+        on_tender=on_tender,
+        parse_executor=get_parse_pool(),
+    ) as parser:
+        await parser.parse_all(start_page=1, end_page=NADLOC_PAGES or None)
+    return emitted
+
+
+SOURCES = {
+    "goszakup": scrape_goszakup,
+    "nadloc": scrape_nadloc,
+}
+
+
+def get_sources(names=None) -> Dict[str, Callable]:
+    names = names or INGEST_SOURCES
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        raise ValueError(f"Неизвестные INGEST_SOURCES: {unknown}, доступны: {tuple(SOURCES)}")
+    return {n: SOURCES[n] for n in names}
+
+
+# ------------------------- MAPPING -------------------------
+
+def map_nadloc_record(record: Dict) -> Dict:
+    code = str(record.get("code") or "").strip()
+    out = {"ID": NADLOC_ID_PREFIX + code.replace("/", "_") if code else None}
+    for key, field in NADLOC_LIST_FIELDS.items():
+        if record.get(key) not in (None, ""):
+            out[field] = record[key]
+    if out.get("Способ"):
+        out["Общие_Способ проведения закупки"] = out["Способ"]
+
+    for key, field in NADLOC_DETAIL_FIELDS.items():
+        value = (record.get("detail") or {}).get(key)
+        if value not in (None, ""):
+            out[field] = value
+    # сроки приема — в полях goszakup, по ним модель риска считает short_duration
+    if out.get("Детали_Срок начала приема"):
+        out["Начало приема заявок"] = out["Детали_Срок начала приема"]
+    if out.get("Детали_Срок окончания приема"):
+        out["Окончание приема заявок"] = out["Детали_Срок окончания приема"]
+    if record.get("type") in NADLOC_TYPES:
+        out["Детали_Тип"] = NADLOC_TYPES[record["type"]]
+    return out
+
+
+def _normalize_words(value) -> str:
+    return " ".join(re.findall(r"\w+", str(value or "").lower()))
+
+
+def parse_amount(value) -> Optional[int]:
+    """'1 234 567,89' / '1234567.89' -> 1234567 (целые тенге)"""
+    digits = re.sub(r"[^\d,.]", "", str(value or "")).replace(",", ".")
+    if digits.count(".") > 1:
+        head, _, tail = digits.rpartition(".")
+        digits = head.replace(".", "") + "." + tail
+    try:
+        return int(float(digits))
+    except ValueError:
+        return None
+
+
+def dedup_key(item: Dict) -> Optional[str]:
+    """Организатор + наименование + сумма; None, если чего-то не хватает."""
+    organizer = _normalize_words(item.get("Организатор"))
+    name = _normalize_words(item.get("Наименование объявления"))
+    amount = parse_amount(item.get("Сумма, тг."))
+    if not organizer or not name or amount is None:
+        return None
+    raw = f"{organizer}|{name}|{amount}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def to_document(source: str, record: Dict) -> Tuple[Optional[str], Dict]:
+    """(ID, документ) в схеме Firestore с тегом источника и ключом дедупликации."""
+    if source == "nadloc":
+        record = map_nadloc_record(record)
+    tender_id = str(record.get("ID") or "").strip()
+    item = {**record, "ID": tender_id, SOURCE_FIELD: source}
+    key = dedup_key(item)
+    if key:
+        item[DEDUP_FIELD] = key
+    return tender_id or None, item
@@ -1,22 +1,29 @@
 import asyncio
 from db.firestore_repo import FirestoreTenderRepo
-from parsers.ai_procure_parser import scrape_tenders_sync
+from parsers.ai_procure_parser import DETAIL_LIMITER
+from parsers.telemetry import SCRAPER_TELEMETRY
+from services.ingest_pipeline import run_ingest_pipeline
 import logging
 
 repo = FirestoreTenderRepo()
 logger = logging.getLogger(__name__)
+# планировщик и ручной /refresh не должны парсить одновременно (общие журнал и состояние)
+_refresh_lock = asyncio.Lock()
+
 async def refresh_tenders_once() -> dict:
     logger.info("[scheduler] Запускаем обновление тендеров...")
-    records = await asyncio.to_thread(scrape_tenders_sync)
-    logger.info("Парсер вернул %d записей", len(records))
-    logger.info("[scheduler] Парсинг завершён. Сейчас начнётся проверка ID и Firestore READ/WRITE")
-    new_count = repo.upsert_many_if_new(records, dry_run=True)
-    logger.info("[scheduler] Обновление завершено. Новых тендеров (по расчёту): %d. Режим DRY_RUN=%s",
-        new_count,
-        True,
+    async with _refresh_lock:
+        # тендеры пишутся в Firestore микро-батчами по мере парсинга
+        stats = await run_ingest_pipeline(repo)
+    logger.info("Парсер вернул %d записей", stats["parsed_total"])
+    logger.info("[scheduler] Обновление завершено. Новых тендеров (по расчёту): %d, обновлено: %d. Режим DRY_RUN=%s",
+        stats["inserted_new"],
+        stats["updated"],
+        stats["dry_run"],
     )
     
     return {
-        "parsed_total": len(records),
-        "inserted_new": new_count,
+        **stats,
+        "detail_limiter": DETAIL_LIMITER.snapshot(),
+        "scraper_metrics": SCRAPER_TELEMETRY.last_run.snapshot(),
     }
@@ -13,12 +13,14 @@ def _make_cache_key(
     query: Optional[str],
     normalized_filters: Dict[str, Any],
     sort_amount: Optional[str],
+    sort_risk: Optional[str] = None,
 ) -> str:
     return json.dumps(
         {
             "q": query or "",
             "f": normalized_filters,
             "sort": sort_amount or "",
+            "sortRisk": sort_risk or "",
         },
         ensure_ascii=False,
         sort_keys=True,
@@ -51,6 +53,7 @@ def search_tenders_prod(
     page: int,
     page_size: int,
     sort_amount: Optional[str],
+    sort_risk: Optional[str] = None,
 ):
     if page < 1:
         page = 1
@@ -59,7 +62,8 @@ def search_tenders_prod(
 
     filters = filters or {}
     effective_sort = filters.get("amountSort") or sort_amount or None
-    cache_key = _make_cache_key(query, filters, effective_sort)
+    effective_sort_risk = filters.get("riskSort") or sort_risk or None
+    cache_key = _make_cache_key(query, filters, effective_sort, effective_sort_risk)
 
     if cache_key in _SEARCH_CACHE:
         all_items = _SEARCH_CACHE[cache_key]
@@ -69,6 +73,7 @@ def search_tenders_prod(
             limit=MAX_FETCH,
             cursor=None,
             sort_amount=effective_sort,
+            sort_risk=effective_sort_risk,
         )
 
         rows_after_text = _apply_text_query(raw_rows, query)
@@ -90,6 +95,7 @@ def search_tenders_prod(
             raw_filters.get("purchaseType"),
             raw_filters.get("features"),
             raw_filters.get("status"),
+            raw_filters.get("riskLevel"),
         ]
     )
 
@@ -0,0 +1,113 @@
+"""changed_fields и построение запроса search_page; коллекция Firestore подменена."""
+
+import math
+
+import pytest
+from google.cloud import firestore
+
+from db.firestore_repo import RISK_LEVEL_FIELD, RISK_SCORE_FIELD, FirestoreTenderRepo, changed_fields
+
+AMOUNT = "`Сумма, тг.`"
+ASC, DESC = firestore.Query.ASCENDING, firestore.Query.DESCENDING
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeQuery:
+    """Записывает цепочку where / order_by / start_after / limit и отдаёт docs."""
+
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.calls = []
+
+    def where(self, field, op, value):
+        self.calls.append(("where", field, op, value))
+        return self
+
+    def order_by(self, field, direction=ASC):
+        self.calls.append(("order_by", field, direction))
+        return self
+
+    def start_after(self, values):
+        self.calls.append(("start_after", values))
+        return self
+
+    def limit(self, count):
+        self.calls.append(("limit", count))
+        return self
+
+    def stream(self):
+        return iter(self.docs)
+
+
+@pytest.fixture
+def repo():
+    repo = FirestoreTenderRepo.__new__(FirestoreTenderRepo)
+    repo.collection = FakeQuery()
+    return repo
+
+
+def test_changed_fields():
+    stored = {"ID": "1-1", "Статус": "Опубликовано", "Сумма, тг.": 100.0, "risk_score": math.nan}
+
+    assert changed_fields(stored, dict(stored)) == {}
+    # NaN в обоих — не изменение
+    assert changed_fields(stored, {"risk_score": math.nan}) == {}
+    assert changed_fields(stored, {"ID": "1-1", "Статус": "Завершено", "Сумма, тг.": 100.0}) == {"Статус": "Завершено"}
+    assert changed_fields(stored, {"risk_score": 3, "risk_level": "low"}) == {"risk_score": 3, "risk_level": "low"}
+    # риск сбросился в NaN — изменение
+    assert math.isnan(changed_fields({"risk_score": 3}, {"risk_score": math.nan})["risk_score"])
+
+
+def test_search_page_without_sort_orders_by_name(repo):
+    repo.search_page({"status": ["Опубликовано"]}, limit=10, cursor=None, sort_amount=None)
+
+    assert repo.collection.calls == [
+        ("where", "`Статус`", "in", ["Опубликовано"]),
+        ("order_by", "__name__", ASC),
+        ("limit", 10),
+    ]
+
+
+def test_search_page_risk_filter_and_sort(repo):
+    repo.search_page({"riskLevel": ["high", "medium"]}, limit=10, cursor=None, sort_amount=None, sort_risk="desc")
+
+    # без order_by("__name__"): порядок задаёт risk_score
+    assert repo.collection.calls == [
+        ("where", RISK_LEVEL_FIELD, "in", ["high", "medium"]),
+        ("order_by", RISK_SCORE_FIELD, DESC),
+        ("limit", 10),
+    ]
+
+
+def test_search_page_risk_then_amount(repo):
+    repo.search_page({"riskLevel": []}, limit=5, cursor="7-1", sort_amount="asc", sort_risk="asc")
+
+    assert repo.collection.calls == [
+        ("order_by", RISK_SCORE_FIELD, ASC),
+        ("order_by", AMOUNT, ASC),
+        ("start_after", {"ID": "7-1"}),
+        ("limit", 5),
+    ]
+
+
+def test_search_page_ignores_unknown_sort(repo):
+    repo.search_page({}, limit=5, cursor=None, sort_amount="up", sort_risk="high")
+
+    assert repo.collection.calls == [("order_by", "__name__", ASC), ("limit", 5)]
+
+
+def test_search_page_returns_items_and_cursor(repo):
+    repo.collection.docs = [FakeSnapshot("1-1", {"ID": "1-1"}), FakeSnapshot("2-1", {"Статус": "Завершено"})]
+
+    items, cursor = repo.search_page({}, limit=2, cursor=None, sort_amount=None)
+
+    assert items == [{"ID": "1-1"}, {"Статус": "Завершено", "ID": "2-1"}]
+    assert cursor == "2-1"
@@ -0,0 +1,69 @@
+"""Стадия записи ingest: Firestore и модель риска подменены."""
+
+import asyncio
+
+import pytest
+
+from services import ingest_pipeline
+
+
+class FakeRepo:
+    """upsert_many записывает только ID из stored; fail — запись батча падает."""
+
+    def __init__(self, stored, fail=False):
+        self.stored = stored
+        self.fail = fail
+
+    def upsert_many(self, items, dry_run=False):
+        if self.fail:
+            raise RuntimeError("Firestore недоступен")
+        return [item["ID"] for item in items if item["ID"] in self.stored], []
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(ingest_pipeline, "INGEST_DRY_RUN", False)
+    monkeypatch.setattr(ingest_pipeline, "INGEST_RISK_SCORING", True)
+    monkeypatch.setattr(ingest_pipeline, "score_batch", lambda items: items)
+    monkeypatch.setattr(
+        ingest_pipeline, "record_supplier_pairs", lambda items: recorded.extend(i["ID"] for i in items) or len(items)
+    )
+    return recorded
+
+
+def write(repo, ids):
+    stats = {"normalized": 0, "normalized_by_source": {"goszakup": 0}, "batches": 0, "failed_batches": 0,
+             "inserted_new": 0, "updated": 0, "risk_scored": 0, "risk_errors": 0}
+
+    async def run():
+        queue = asyncio.Queue()
+        for tender_id in ids:
+            queue.put_nowait({"ID": tender_id, ingest_pipeline.SOURCE_FIELD: "goszakup"})
+        queue.put_nowait(ingest_pipeline._DONE)
+        await ingest_pipeline._write_stage(repo, queue, stats)
+
+    asyncio.run(run())
+    return stats
+
+
+def test_only_written_tenders_reach_supplier_graph(recorded):
+    stats = write(FakeRepo(stored={"1-1"}), ["1-1", "2-1"])
+
+    assert recorded == ["1-1"]
+    assert stats["inserted_new"] == 1
+
+
+def test_failed_write_records_no_pairs(recorded):
+    stats = write(FakeRepo(stored={"1-1"}, fail=True), ["1-1"])
+
+    assert recorded == []
+    assert stats["failed_batches"] == 1
+
+
+def test_dry_run_records_no_pairs(recorded, monkeypatch):
+    monkeypatch.setattr(ingest_pipeline, "INGEST_DRY_RUN", True)
+
+    write(FakeRepo(stored={"1-1"}), ["1-1"])
+
+    assert recorded == []
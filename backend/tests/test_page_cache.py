@@ -0,0 +1,59 @@
+import os
+import time
+
+from parsers.page_cache import PageCache
+
+BODY = b"<html>" + b"x" * 4000 + b"</html>"
+
+
+def url(i):
+    return f"https://goszakup.gov.kz/ru/announce/index/{i}?tab=general"
+
+
+def fill(cache, n, now):
+    """n записей; запись i последний раз использовалась i часов назад."""
+    for i in range(n):
+        cache.put(url(i), BODY, "utf-8", {"Детали_Номер объявления": str(i)})
+        base = cache._base_path(url(i))
+        used_at = now - i * 3600
+        for suffix in (".json", ".html.gz"):
+            os.utime(base + suffix, (used_at, used_at))
+
+
+def entry_size(cache):
+    base = cache._base_path(url(0))
+    return os.path.getsize(base + ".json") + os.path.getsize(base + ".html.gz")
+
+
+def test_sweep_removes_expired_entries(tmp_path):
+    cache = PageCache(str(tmp_path))
+    fill(cache, 4, time.time())
+
+    result = cache.sweep(max_age_seconds=1.5 * 3600)
+
+    assert result["removed"] == 2
+    assert [cache.get(url(i)) is not None for i in range(4)] == [True, True, False, False]
+    assert cache.body(url(3)) is None
+
+
+def test_sweep_evicts_least_recently_used_over_limit(tmp_path):
+    cache = PageCache(str(tmp_path))
+    now = time.time()
+    fill(cache, 4, now)
+    size = entry_size(cache)
+    # чтение освежает запись: самая старая (3) становится самой свежей
+    assert cache.get(url(3)) is not None
+
+    result = cache.sweep(max_bytes=2 * size)
+
+    assert result["entries"] == 2
+    assert result["bytes"] <= 2 * size
+    assert [os.path.exists(cache._base_path(url(i)) + ".json") for i in range(4)] == [True, False, False, True]
+
+
+def test_sweep_without_limits_keeps_everything(tmp_path):
+    cache = PageCache(str(tmp_path))
+    fill(cache, 3, time.time())
+
+    assert cache.sweep()["removed"] == 0
+    assert cache.sweep(max_bytes=10 * entry_size(cache), max_age_seconds=24 * 3600)["removed"] == 0
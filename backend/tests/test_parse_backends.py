@@ -0,0 +1,117 @@
+"""Паритет бэкендов парсинга goszakup (bs4 — эталон, lxml, потоковый ListRowStream)
+на обезличенных страницах из tests/fixtures/goszakup."""
+
+from pathlib import Path
+
+import pytest
+
+from parsers.ai_procure_parser import PARSER_BACKENDS, get_parser_backend
+from parsers.lxml_backend import ListRowStream
+
+FIXTURES = Path(__file__).parent / "fixtures" / "goszakup"
+REFERENCE_BACKEND = "bs4"
+# индекс функции в кортеже get_parser_backend()
+KINDS = {"list": 0, "detail": 1, "tabs": 2}
+# 1 байт режет многобайтные символы UTF-8 и теги; 1 МБ — страница одним куском
+CHUNK_SIZES = (1, 7, 256, 4096, 1 << 20)
+
+
+def fixture_pages(kind):
+    pages = sorted((FIXTURES / kind).rglob("*.html"))
+    return pytest.mark.parametrize("page", pages, ids=[str(p.relative_to(FIXTURES)) for p in pages])
+
+
+def parse(kind, backend, page):
+    return get_parser_backend(backend)[KINDS[kind]](page.read_bytes())
+
+
+def stream_rows(content: bytes, chunk_size: int):
+    stream = ListRowStream()
+    rows = []
+    for i in range(0, len(content), chunk_size):
+        rows.extend(stream.feed(content[i:i + chunk_size]))
+    rows.extend(stream.close())
+    return rows, stream.found_table
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_fixtures_present(kind):
+    assert list((FIXTURES / kind).rglob("*.html"))
+
+
+@fixture_pages("list")
+@pytest.mark.parametrize("backend", [b for b in PARSER_BACKENDS if b != REFERENCE_BACKEND])
+def test_list_backends_match(page, backend):
+    assert parse("list", backend, page) == parse("list", REFERENCE_BACKEND, page)
+
+
+@fixture_pages("list")
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_list_stream_matches(page, chunk_size):
+    expected = parse("list", REFERENCE_BACKEND, page)
+    rows, found_table = stream_rows(page.read_bytes(), chunk_size)
+    assert found_table == (expected is not None)
+    assert rows == (expected or [])
+
+
+@fixture_pages("detail")
+@pytest.mark.parametrize("backend", [b for b in PARSER_BACKENDS if b != REFERENCE_BACKEND])
+def test_detail_backends_match(page, backend):
+    assert parse("detail", backend, page) == parse("detail", REFERENCE_BACKEND, page)
+
+
+@fixture_pages("tabs")
+@pytest.mark.parametrize("backend", [b for b in PARSER_BACKENDS if b != REFERENCE_BACKEND])
+def test_tab_backends_match(page, backend):
+    assert parse("tabs", backend, page) == parse("tabs", REFERENCE_BACKEND, page)
+
+
+# Паритет не ловит ошибку, одинаковую в обоих бэкендах, поэтому эталон проверяется по сути
+
+
+def test_list_reference():
+    rows = parse("list", REFERENCE_BACKEND, FIXTURES / "list" / "page1.html")
+    assert [row["ID"] for row in rows] == ["15234567-1", "15234568-2", "15234569-1", None, "15234571-1"]
+    first = rows[0]
+    assert first["Ссылка"] == "https://goszakup.gov.kz/ru/announce/index/15234567"
+    assert first["Лотов"] == "3"
+    assert first["Организатор"] == 'ГУ "Отдел образования района Тестовый"'
+    assert first["Сумма, тг."] == "1 234 567,89"
+    # перенос строки внутри ячейки бэкенды сохраняют одинаково
+    assert first["Окончание приема заявок"].split() == ["17.02.2024", "09:00:00"]
+    # без <a> и без <strong> в сумме
+    assert rows[3]["Ссылка"] is None
+    assert rows[3]["Сумма, тг."] == ""
+    assert rows[3]["Статус"] == "Отменено"
+
+    assert parse("list", REFERENCE_BACKEND, FIXTURES / "list" / "empty.html") == []
+    assert parse("list", REFERENCE_BACKEND, FIXTURES / "list" / "no_table.html") is None
+
+
+def test_detail_reference():
+    detail = parse("detail", REFERENCE_BACKEND, FIXTURES / "detail" / "15234567.html")
+    assert detail["Детали_Номер объявления"] == "15234567-1"
+    assert detail["Детали_Наименование объявления"] == "Услуги по уборке помещений и прилегающей территории"
+    assert detail["Общие_Приглашенный поставщик"] == 'ТОО "Чистый город"'
+    assert detail["Общие_Признаки"] == [
+        "Закупка среди организаций инвалидов",
+        "Закупка с применением особого порядка",
+    ]
+    assert detail["Организатор_БИН организатора"] == "000000000001"
+    assert detail["Дополнительная информация (справочно)_Примечание"] == "Подача через веб-портал"
+    assert "Общие_Сумма закупки" not in detail
+
+
+def test_tab_reference():
+    lots = parse("tabs", REFERENCE_BACKEND, FIXTURES / "tabs" / "lots" / "15234567.html")
+    assert [lot["Номер лота"] for lot in lots] == ["75000001-ЗЦП1", "75000002-ЗЦП1", "75000003-ЗЦП1"]
+    assert lots[0]["Ссылки"] == ["https://goszakup.gov.kz/ru/announce/lot/75000001"]
+    assert "Ссылки" not in lots[2]
+
+    documents = parse("tabs", REFERENCE_BACKEND, FIXTURES / "tabs" / "documents" / "15234567.html")
+    assert documents[0]["Ссылки"] == [
+        "https://v3bl.goszakup.gov.kz/files/download_file/1000001/",
+        "https://goszakup.gov.kz/files/download_file/1000002/",
+    ]
+    assert len(documents) == 3
+    assert parse("tabs", REFERENCE_BACKEND, FIXTURES / "tabs" / "documents" / "empty.html") == []
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+
+import pytest
+
+from models.risk import TenderRiskItem, TenderRiskRequest
+from services import risk_batcher
+from services.risk_batcher import BatcherUnavailable, RiskScoreBatcher
+
+
+def tender(i):
+    return TenderRiskItem(id=str(i), name="Услуги по уборке", price=1000.0, organizer="ГУ «Акимат»")
+
+
+def echo_scores(tenders):
+    return {"tenders": [{"id": t.id} for t in tenders]}
+
+
+@pytest.fixture
+def blocking_scores(monkeypatch):
+    """score_tenders, который не возвращается, пока тест не отпустит release."""
+    started, release = threading.Event(), threading.Event()
+
+    def score(tenders):
+        started.set()
+        release.wait(5)
+        return echo_scores(tenders)
+
+    monkeypatch.setattr(risk_batcher, "score_tenders", score)
+    yield started, release
+    release.set()
+
+
+async def wait_started(started):
+    while not started.is_set():
+        await asyncio.sleep(0.001)
+
+
+def test_close_fails_in_flight_and_queued_requests(blocking_scores):
+    async def run():
+        started, release = blocking_scores
+        batcher = RiskScoreBatcher()
+        in_flight = asyncio.create_task(batcher.score([tender(1)]))
+        await wait_started(started)
+        queued = [asyncio.create_task(batcher.score([tender(i)])) for i in (2, 3)]
+        await asyncio.sleep(0)
+
+        await batcher.close()
+        results = await asyncio.wait_for(asyncio.gather(in_flight, *queued, return_exceptions=True), 1)
+        assert all(isinstance(r, BatcherUnavailable) for r in results)
+        assert batcher.snapshot()["abandoned"] == 3
+        # поток со скорингом досчитывает впустую; asyncio.run ждёт его при выходе
+        release.set()
+
+    asyncio.run(run())
+
+
+def test_worker_death_fails_pending_and_worker_restarts(monkeypatch):
+    monkeypatch.setattr(risk_batcher, "score_tenders", echo_scores)
+
+    async def broken_flush(self, batch):
+        raise RuntimeError("сломался воркер")
+
+    async def run():
+        batcher = RiskScoreBatcher()
+        with monkeypatch.context() as m:
+            m.setattr(RiskScoreBatcher, "_flush", broken_flush)
+            with pytest.raises(BatcherUnavailable):
+                await asyncio.wait_for(batcher.score([tender(1)]), 1)
+        # следующий запрос поднимает новый воркер
+        assert await batcher.score([tender(2)]) == {"tenders": [{"id": "2"}]}
+        await batcher.close()
+
+    asyncio.run(run())
+
+
+def test_endpoint_falls_back_to_direct_scoring(monkeypatch):
+    from routers import risk
+
+    monkeypatch.setattr(risk, "score_tenders", echo_scores)
+
+    async def unavailable(tenders):
+        raise BatcherUnavailable("батчер риска остановлен")
+
+    monkeypatch.setattr(risk.RISK_BATCHER, "score", unavailable)
+    body = TenderRiskRequest(tenders=[tender(1), tender(2)])
+    assert asyncio.run(risk.tender_risk_score(body)) == {"tenders": [{"id": "1"}, {"id": "2"}]}
+
+
+def test_failed_batch_fails_only_offending_request(monkeypatch):
+    calls = []
+
+    def score(tenders):
+        calls.append([t.id for t in tenders])
+        if any(t.id == "bad" for t in tenders):
+            raise ValueError("битый тендер")
+        return echo_scores(tenders)
+
+    monkeypatch.setattr(risk_batcher, "score_tenders", score)
+
+    async def run():
+        batcher = RiskScoreBatcher()
+        results = await asyncio.gather(
+            batcher.score([tender(1)]), batcher.score([tender("bad"), tender(2)]), batcher.score([tender(3)]),
+            return_exceptions=True,
+        )
+        await batcher.close()
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results[0] == {"tenders": [{"id": "1"}]}
+    assert isinstance(results[1], ValueError)
+    assert results[2] == {"tenders": [{"id": "3"}]}
+    # одна общая пачка, затем каждый запрос отдельно
+    assert calls == [["1", "bad", "2", "3"], ["1"], ["bad", "2"], ["3"]]
+    snapshot = batcher.snapshot()
+    assert (snapshot["batches"], snapshot["errors"], snapshot["failed_requests"]) == (1, 1, 1)
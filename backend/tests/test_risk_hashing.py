@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import risk_hashing
+from services.risk_hashing import fit_hashing_model
+from services.risk_model import TenderRiskModel
+from services.risk_training import ClusterPriceSketches
+
+sklearn = pytest.importorskip("sklearn")
+
+TEXTS = ["уборка помещений", "уборка территории", "вывоз снега", "вывоз мусора"]
+
+
+def frame(n, start=0):
+    model = TenderRiskModel()
+    return pd.DataFrame({
+        model.text_col: [TEXTS[i % len(TEXTS)] for i in range(start, start + n)],
+        model.price_col: [100.0 * (i + 1) for i in range(start, start + n)],
+    })
+
+
+@pytest.fixture
+def priced(monkeypatch):
+    """Все цены, попавшие в скетчи."""
+    priced = []
+
+    class Sketches(ClusterPriceSketches):
+        def update(self, clusters, prices):
+            priced.extend(np.asarray(prices).tolist())
+            super().update(clusters, prices)
+
+    monkeypatch.setattr(risk_hashing, "ClusterPriceSketches", Sketches)
+    return priced
+
+
+def test_small_chunks_are_not_lost(priced):
+    # первые чанки меньше n_clusters, последний — короткий хвост выгрузки
+    chunks = [frame(1, 0), frame(1, 1), frame(20, 2), frame(1, 22)]
+
+    model = fit_hashing_model(lambda: iter(chunks), n_features=64, n_clusters=3)
+
+    assert sorted(priced) == sorted(pd.concat(chunks)[model.price_col].tolist())
+    assert len(model.cluster_price_stats_)
+
+
+def test_too_few_tenders_for_clusters():
+    with pytest.raises(ValueError, match="3 кластеров"):
+        fit_hashing_model(lambda: iter([frame(1), frame(1, 1)]), n_features=64, n_clusters=3)
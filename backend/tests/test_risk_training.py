@@ -0,0 +1,125 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import risk_training
+from services.risk_artifact import load_artifact
+from services.risk_model import TenderRiskModel
+from services.risk_training import STATS_COLUMNS, ClusterPriceSketches, IncrementalRiskTrainer
+
+sklearn = pytest.importorskip("sklearn")
+
+TEXTS = ["уборка помещений", "уборка территории", "вывоз снега", "вывоз мусора"]
+
+
+def make_model():
+    from sklearn.cluster import KMeans
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    model = TenderRiskModel(n_clusters=2)
+    model.tfidf = TfidfVectorizer().fit(TEXTS)
+    X = model.tfidf.transform(TEXTS)
+    model.kmeans = KMeans(n_clusters=2, n_init=1, random_state=0).fit(X)
+    clusters = model.kmeans.predict(X)
+    sketches = ClusterPriceSketches()
+    sketches.update(clusters, np.array([100.0, 200.0, 300.0, 400.0]))
+    model.cluster_price_stats_ = sketches.stats_frame()
+    return model, clusters, sketches
+
+
+def chunk(model, texts, prices):
+    return pd.DataFrame({model.text_col: texts, model.price_col: prices})
+
+
+def test_stats_frame_keeps_previous_row_for_empty_cluster():
+    model, _, _ = make_model()
+    sketches = ClusterPriceSketches()
+    sketches.update(np.array([0, 0]), np.array([10.0, 20.0]))
+    # скетч есть, но цен в нём нет
+    sketches.update(np.array([1]), np.array([np.nan]))
+
+    stats = sketches.stats_frame(previous=model.cluster_price_stats_)
+    assert list(stats.index) == [0, 1]
+    assert stats.index.dtype == np.int32
+    assert not stats.isna().any().any()
+    pd.testing.assert_series_equal(stats.loc[1], model.cluster_price_stats_.loc[1][STATS_COLUMNS])
+
+
+@pytest.mark.parametrize("with_sketches", [True, False])
+def test_refit_falls_back_for_cluster_without_samples(with_sketches):
+    model, clusters, sketches = make_model()
+    previous_stats = model.cluster_price_stats_.copy()
+    empty = int(clusters[-1])
+    texts = [t for t, c in zip(TEXTS, clusters) if c != empty]
+
+    trainer = IncrementalRiskTrainer(model, batch_size=4, previous=sketches if with_sketches else None)
+    trainer.partial_fit(chunk(model, texts, [150.0] * len(texts)))
+    stats = trainer.finalize().cluster_price_stats_
+
+    assert not stats.isna().any().any()
+    pd.testing.assert_series_equal(stats.loc[empty], previous_stats.loc[empty])
+    if with_sketches:
+        # скетч пустого кластера переходит в новый файл скетчей
+        assert trainer.sketches.digests[empty].count == sketches.digests[empty].count
+
+
+def test_refit_resumes_from_artifact(tmp_path, monkeypatch):
+    model, _, _ = make_model()
+    pkl = tmp_path / "model.pkl"
+    joblib.dump(model, pkl)
+    csv = tmp_path / "tenders.csv"
+    chunk(model, TEXTS, [100.0, 200.0, 300.0, 400.0]).to_csv(csv, index=False)
+    paths = ["--pkl", str(pkl), "--artifact", str(tmp_path / "artifact"), "--sketches", str(tmp_path / "s.npz")]
+
+    risk_training.main(["refit", str(csv), *paths])
+    centers = np.array(load_artifact(str(tmp_path / "artifact")).centers)
+
+    started_from = []
+
+    class Trainer(IncrementalRiskTrainer):
+        def __init__(self, model, **kwargs):
+            super().__init__(model, **kwargs)
+            started_from.append(self.kmeans.init)
+
+    monkeypatch.setattr(risk_training, "IncrementalRiskTrainer", Trainer)
+    # pickle нужен только первому refit
+    pkl.unlink()
+    risk_training.main(["refit", str(csv), *paths])
+
+    np.testing.assert_array_equal(started_from[0], centers)
+    assert load_artifact(str(tmp_path / "artifact")).centers.shape == centers.shape
+
+
+def test_seeded_sketches_reproduce_stats():
+    model, _, _ = make_model()
+    stats = model.cluster_price_stats_
+
+    seeded = ClusterPriceSketches.from_stats(stats, weight=100)
+
+    pd.testing.assert_frame_equal(seeded.stats_frame(), stats)
+
+
+def test_update_bounds_from_clean_tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(risk_training, "RISK_SKETCH_SEED_WEIGHT", 40)
+    # в репозитории только pickle: ни артефакта, ни скетчей
+    model, clusters, _ = make_model()
+    pkl = tmp_path / "model.pkl"
+    joblib.dump(model, pkl)
+    grown = int(clusters[0])
+    texts = [t for t, c in zip(TEXTS, clusters) if c == grown]
+    csv = tmp_path / "new_tenders.csv"
+    chunk(model, texts * 50, [10_000.0] * len(texts) * 50).to_csv(csv, index=False)
+    artifact, sketches = tmp_path / "artifact", tmp_path / "sketches.npz"
+
+    risk_training.main([
+        "update-bounds", str(csv), "--pkl", str(pkl), "--artifact", str(artifact), "--sketches", str(sketches),
+    ])
+
+    stats = load_artifact(str(artifact)).cluster_price_stats_
+    before = model.cluster_price_stats_
+    # новые цены сдвинули границы своего кластера, остальные остались как были
+    assert stats.loc[grown, "q3"] > before.loc[grown, "q3"]
+    other = stats.index != grown
+    pd.testing.assert_frame_equal(stats[other], before[other], check_dtype=False)
+    assert ClusterPriceSketches.load(str(sketches)).digests[grown].count == 40 + 50 * len(texts)
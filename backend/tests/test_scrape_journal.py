@@ -0,0 +1,72 @@
+from parsers.scrape_journal import MAX_DETAIL_ATTEMPTS, ScrapeJournal
+
+ROW = {"ID": "15000000-1", "Ссылка": "https://goszakup.gov.kz/ru/announce/index/15000000"}
+
+
+def run(path, *results):
+    """Один завершённый прогон, в котором ROW обработан с результатами results."""
+    journal = ScrapeJournal(str(path))
+    journal.start()
+    attempts = [journal.record_detail(ROW, ok) for ok in results]
+    journal.finish()
+    journal.close()
+    return attempts
+
+
+def retryable_ids(path):
+    journal = ScrapeJournal(str(path))
+    try:
+        return [row["ID"] for row in journal.retryable_failures()]
+    finally:
+        journal.close()
+
+
+def test_failure_after_successes_is_retried(tmp_path):
+    path = tmp_path / "journal.sqlite3"
+    for _ in range(MAX_DETAIL_ATTEMPTS + 1):
+        assert run(path, True) == [0]
+
+    assert run(path, False) == [1]
+    assert retryable_ids(path) == [ROW["ID"]]
+
+
+def test_consecutive_failures_exhaust_attempts(tmp_path):
+    path = tmp_path / "journal.sqlite3"
+    attempts = [run(path, False)[0] for _ in range(MAX_DETAIL_ATTEMPTS)]
+
+    assert attempts == list(range(1, MAX_DETAIL_ATTEMPTS + 1))
+    assert retryable_ids(path) == []
+
+
+def test_success_resets_failures(tmp_path):
+    path = tmp_path / "journal.sqlite3"
+    for _ in range(MAX_DETAIL_ATTEMPTS - 1):
+        run(path, False)
+
+    assert run(path, True) == [0]
+    assert run(path, False) == [1]
+
+
+def test_failures_within_resumed_run_accumulate(tmp_path):
+    path = tmp_path / "journal.sqlite3"
+    journal = ScrapeJournal(str(path))
+    journal.start()
+    assert journal.record_detail(ROW, False) == 1
+    journal.close()
+
+    # рестарт пода: тот же незавершённый прогон
+    journal = ScrapeJournal(str(path))
+    journal.start()
+    assert journal.resumed
+    assert journal.record_detail(ROW, False) == 2
+    journal.close()
+
+
+def test_row_without_id_is_not_journaled(tmp_path):
+    path = tmp_path / "journal.sqlite3"
+    journal = ScrapeJournal(str(path))
+    journal.start()
+    assert journal.record_detail({"ID": None, "Ссылка": ROW["Ссылка"]}, False) == 0
+    assert journal.record_detail({"Ссылка": ROW["Ссылка"]}, False) == 0
+    assert journal.conn.execute("SELECT COUNT(*) FROM details").fetchone()[0] == 0
+    journal.close()
@@ -0,0 +1,183 @@
+"""scrape_tenders целиком: сеть подменена (stream_page, download_tab_page),
+журнал и состояние — во временном каталоге."""
+
+import asyncio
+import sqlite3
+
+import aiohttp
+import pytest
+
+from parsers import ai_procure_parser as parser
+from parsers.scrape_journal import MAX_DETAIL_ATTEMPTS
+
+
+def row(tender_id, link=True):
+    return {
+        "ID": tender_id,
+        "Наименование объявления": f"Закупка {tender_id}",
+        "Ссылка": f"https://goszakup.gov.kz/ru/announce/index/{tender_id}" if link else None,
+    }
+
+
+class FakeSite:
+    """Страницы-списки и детали; failing — ID и номера страниц, которые отдают ошибку."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.failing = set()
+        self.list_requests = []
+        self.detail_requests = []
+
+    async def stream_page(self, session, page_number, limiter=None):
+        self.list_requests.append(page_number)
+        if page_number in self.failing:
+            raise aiohttp.ClientConnectionError(f"страница {page_number} недоступна")
+        for r in self.pages.get(page_number, []):
+            yield dict(r)
+
+    async def download_tab_page(self, session, url, tab="general", max_retries=3, cache=None, limiter=None):
+        tender_id = url.split("?")[0].rsplit("/", 1)[-1]
+        self.detail_requests.append(tender_id)
+        if tender_id in self.failing:
+            return None
+        return {"url": url, "tab": tab, "detail": {"Детали_Номер объявления": tender_id}}
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    site = FakeSite({})
+    monkeypatch.setattr(parser, "stream_page", site.stream_page)
+    monkeypatch.setattr(parser, "download_tab_page", site.download_tab_page)
+    monkeypatch.setattr(parser, "PAGES_TO_SCRAPE", [1, 2, 3])
+    monkeypatch.setattr(parser, "LIST_MAX_RETRIES", 1)
+    monkeypatch.setattr(parser, "DETAIL_CACHE", False)
+    monkeypatch.setattr(parser, "SCRAPE_STATE_PATH", str(tmp_path / "scrape_state.json"))
+    monkeypatch.setattr(parser, "SCRAPE_JOURNAL_PATH", str(tmp_path / "scrape_journal.sqlite3"))
+    yield site
+    parser.shutdown_parse_pool()
+
+
+def scrape(incremental=True):
+    records = []
+
+    async def collect(record):
+        records.append(record)
+
+    asyncio.run(parser.scrape_tenders(collect, incremental))
+    return records
+
+
+def journal_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT tender_id, status, attempts FROM details ORDER BY run_id, tender_id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_row_without_link_is_emitted_at_once(site):
+    site.pages = {1: [row("1-1"), row("2-1", link=False)]}
+
+    records = scrape()
+
+    assert sorted(r["ID"] for r in records) == ["1-1", "2-1"]
+    assert site.detail_requests == ["1-1"]
+    # строка без ссылки — готовый результат, а не упавший detail-запрос
+    assert journal_rows(parser.SCRAPE_JOURNAL_PATH) == [("1-1", "done", 0), ("2-1", "done", 0)]
+    # и в следующем прогоне она уже известна
+    assert scrape() == []
+
+
+def test_rows_without_id_are_skipped(site):
+    no_id = [{**row("x"), "ID": None}, {**row("y"), "ID": ""}]
+    site.pages = {1: [row("1-1"), *no_id]}
+
+    records = scrape()
+
+    assert [r["ID"] for r in records] == ["1-1"]
+    assert site.detail_requests == ["1-1"]
+    assert journal_rows(parser.SCRAPE_JOURNAL_PATH) == [("1-1", "done", 0)]
+
+
+def test_exhausted_tender_becomes_known(site):
+    site.pages = {1: [row("1-1"), row("2-1")]}
+    site.failing.add("2-1")
+
+    emitted = [[r["ID"] for r in scrape()] for _ in range(MAX_DETAIL_ATTEMPTS)]
+    # без деталей тендер отдаётся, только когда попытки исчерпаны
+    assert emitted == [["1-1"]] + [[]] * (MAX_DETAIL_ATTEMPTS - 2) + [["2-1"]]
+    assert site.detail_requests.count("2-1") == MAX_DETAIL_ATTEMPTS
+
+    # дальше страница полностью известна: ни повторов, ни новых запросов
+    site.list_requests.clear()
+    assert scrape() == []
+    assert site.detail_requests.count("2-1") == MAX_DETAIL_ATTEMPTS
+    assert site.list_requests == [1]
+
+
+def test_failed_list_page_is_fetched_on_resume_before_incremental_stop(site):
+    site.pages = {1: [row("1-1")]}
+    assert [r["ID"] for r in scrape()] == ["1-1"]
+
+    # прогон, в котором страница 2 не загрузилась, прервался (рестарт пода)
+    journal = parser.ScrapeJournal(parser.SCRAPE_JOURNAL_PATH)
+    journal.start()
+    journal.record_page_failure(2)
+    journal.close()
+
+    site.pages = {1: [row("1-1")], 2: [row("2-1")]}
+    site.list_requests.clear()
+    # страница 1 полностью известна, но упавшую страницу 2 прогон дозагружает
+    assert [r["ID"] for r in scrape()] == ["2-1"]
+    assert site.list_requests[:2] == [1, 2]
+
+    journal = parser.ScrapeJournal(parser.SCRAPE_JOURNAL_PATH)
+    assert journal.conn.execute("SELECT COUNT(*) FROM runs WHERE finished_at IS NULL").fetchone()[0] == 0
+    journal.close()
+
+
+def test_list_page_failure_keeps_run_unfinished_until_fetched(site):
+    site.pages = {1: [row("1-1")], 2: [row("2-1")]}
+    site.failing.add(2)
+    assert [r["ID"] for r in scrape()] == ["1-1"]
+
+    site.failing.clear()
+    site.list_requests.clear()
+    assert [r["ID"] for r in scrape()] == ["2-1"]
+    # страница 1 — из журнала прогона, страница 2 — из сети
+    assert site.list_requests[0] == 2
+
+
+@pytest.fixture
+def queue_mode(site, tmp_path, monkeypatch):
+    from parsers import detail_worker
+
+    monkeypatch.setattr(parser, "DETAIL_MODE", "queue")
+    monkeypatch.setattr(parser, "DETAIL_QUEUE_PATH", str(tmp_path / "detail_queue.sqlite3"))
+    monkeypatch.setattr(detail_worker, "QUEUE_POLL_SECONDS", 0.01)
+    return site
+
+
+def test_queue_without_workers_is_rejected_before_list(queue_mode, monkeypatch):
+    monkeypatch.setattr(parser, "DETAIL_QUEUE_LOCAL_WORKERS", 0)
+    queue_mode.pages = {1: [row("1-1")]}
+
+    with pytest.raises(ValueError, match="DETAIL_QUEUE_EXTERNAL_WORKERS"):
+        scrape()
+    assert queue_mode.list_requests == []
+
+
+def test_queue_without_results_times_out(queue_mode, monkeypatch):
+    monkeypatch.setattr(parser, "DETAIL_QUEUE_LOCAL_WORKERS", 0)
+    monkeypatch.setattr(parser, "DETAIL_QUEUE_EXTERNAL_WORKERS", True)
+    monkeypatch.setattr(parser, "DETAIL_QUEUE_IDLE_TIMEOUT", 0.1)
+    queue_mode.pages = {1: [row("1-1")]}
+
+    with pytest.raises(TimeoutError):
+        scrape()
+
+
+def test_queue_with_local_worker_completes(queue_mode):
+    queue_mode.pages = {1: [row("1-1"), row("2-1", link=False)]}
+
+    assert sorted(r["ID"] for r in scrape()) == ["1-1", "2-1"]
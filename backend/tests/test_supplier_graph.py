@@ -0,0 +1,66 @@
+from services.supplier_graph import SupplierGraph
+
+ROWS = [
+    ("1-1", "ГУ «Отдел образования»", "ТОО «Альфа»", 1000.0, True),
+    ("2-1", "ГУ «Отдел образования»", "ТОО «Альфа»", 2000.0, True),
+    ("3-1", "ГУ «Отдел образования»", None, 500.0, False),
+]
+
+
+def pair(graph):
+    return graph.pair_columns(["ГУ «Отдел образования»"], ["ТОО «Альфа»"])
+
+
+def test_reingest_does_not_inflate_pairs(tmp_path):
+    path = str(tmp_path / "graph.sqlite3")
+    graph = SupplierGraph(path)
+    assert graph.record(ROWS) == 3
+    before = pair(graph)
+    assert before["supplier_pair_tenders"] == [2]
+
+    # тот же тендер повторно, в том числе с пробелами вокруг ID
+    assert graph.record(ROWS) == 0
+    assert graph.record([(" 1-1 ", *ROWS[0][1:])]) == 0
+    assert pair(graph) == before
+
+    reloaded = SupplierGraph(path)
+    assert pair(reloaded) == before
+    assert reloaded.snapshot()["tenders"] == 3
+
+
+def test_changed_tender_moves_contribution(tmp_path):
+    graph = SupplierGraph(str(tmp_path / "graph.sqlite3"))
+    graph.record(ROWS)
+    assert graph.record([("2-1", "ГУ «Отдел образования»", "ТОО «Бета»", 2000.0, True)]) == 1
+
+    assert pair(graph)["supplier_pair_tenders"] == [1]
+    beta = graph.pair_columns(["ГУ «Отдел образования»"], ["ТОО «Бета»"])
+    assert beta["supplier_pair_tenders"] == [1]
+    assert graph.organizers["гу отдел образования"][0] == 3
+
+
+def test_pending_rows_are_counted_without_recording(tmp_path):
+    path = str(tmp_path / "graph.sqlite3")
+    graph = SupplierGraph(path)
+    graph.record(ROWS[:1])
+    pending = [
+        ROWS[1],
+        # уже внесённый тендер сменил поставщика, а новый встречается в пачке дважды
+        ("1-1", "ГУ «Отдел образования»", "ТОО «Бета»", 1000.0, True),
+        ("4-1", "ГУ «Отдел образования»", "ТОО «Альфа»", 300.0, True),
+        ("4-1", "ГУ «Отдел образования»", "ТОО «Альфа»", 300.0, True),
+    ]
+    keys = (["ГУ «Отдел образования»"] * 2, ["ТОО «Альфа»", "ТОО «Бета»"])
+    before = graph.pair_columns(*keys)
+    snapshot = graph.snapshot()
+
+    preview = graph.pair_columns(*keys, pending=pending)
+
+    # граф и его SQLite не изменились
+    assert graph.pair_columns(*keys) == before
+    assert graph.snapshot() == snapshot
+    assert SupplierGraph(path).pair_columns(*keys) == before
+    # а признаки такие же, как после записи пачки
+    graph.record(pending)
+    assert preview == graph.pair_columns(*keys)
+    assert preview["supplier_pair_tenders"] == [2, 1]